@@ -1,7 +1,4 @@
 import streamlit as st
-import yfinance as yf
-import pandas as pd
-import pandas_ta as ta
 import plotly.graph_objects as go
 import base64
 import html
@@ -13,7 +10,26 @@ import json
 import re
 import secrets
 from urllib.parse import urlencode, quote_plus
-from ta_indicators import calculate_all_indicators
+from cassette import Cassette, ReplaySource
+from indicator_cache import IndicatorCache
+from indicator_state import IndicatorStates, IndicatorStateStore
+from market_data import source_loader
+from ohlcv_store import OHLCVStore
+from price_panel import SharedPricePanel
+from rate_limit import limiter_stats
+from rule_plan import RuleStats
+from scan_cache import ScanCache
+from scan_scheduler import PrewarmJob, PrewarmScheduler, VersionWatcher, us_market_open
+from signal_index import SignalIndex
+from scanner import (
+    CUSTOM_ALL_SYMBOLS,
+    CUSTOM_RULE_UNIVERSES,
+    parse_custom_rules,
+    parse_rule_expression,
+    rule_to_label,
+    run_custom_rule_scan,
+    run_quick_scan,
+)
 from streamlit.runtime.scriptrunner import get_script_run_ctx
 from streamlit.web.server.server import Server
 import streamlit.components.v1 as components
@@ -74,51 +90,6 @@ if 'subscription_lookup' not in st.session_state:
 SUBSCRIPTION_PRICE = float(os.getenv("SUBSCRIPTION_AMOUNT", "5"))
 SUBSCRIPTION_PRICE_LABEL = f"${SUBSCRIPTION_PRICE:,.2f}"
 
-def _dedupe_symbols(symbols):
-    seen = set()
-    ordered = []
-    for sym in symbols:
-        if sym not in seen:
-            seen.add(sym)
-            ordered.append(sym)
-    return ordered
-
-
-TOP_CRYPTO_SYMBOLS = [
-    "BTC-USD","ETH-USD","SOL-USD","XRP-USD","DOGE-USD","ADA-USD","AVAX-USD","MATIC-USD","LINK-USD","BNB-USD",
-    "DOT-USD","LTC-USD","ATOM-USD","FIL-USD","OP-USD","ARB-USD","PEPE-USD","BONK-USD","TIA-USD","RUNE-USD",
-]
-EMERGING_CRYPTO_SYMBOLS = [
-    "SUI-USD","APT-USD","INJ-USD","AAVE-USD","PYTH-USD","IMX-USD","NEAR-USD","HBAR-USD","SEI-USD","WIF-USD",
-]
-TOP_STOCK_SYMBOLS = [
-    "NVDA","TSLA","AAPL","MSFT","GOOGL","AMZN","META","NFLX","AMD","SMCI",
-    "AVGO","ASML","SHOP","SNOW","UBER","PLTR","COIN","MARA","RIOT","SQ",
-]
-GROWTH_STOCK_SYMBOLS = [
-    "CELH","CRWD","SPOT","ROKU","ABNB","PYPL","AI","NIO","OXY","ARKK",
-]
-
-CUSTOM_CRYPTO_SYMBOLS = _dedupe_symbols(TOP_CRYPTO_SYMBOLS + EMERGING_CRYPTO_SYMBOLS + [
-    "HBAR-USD","XLM-USD","VET-USD","GRT-USD","ALGO-USD","ETC-USD","TRX-USD","FLOW-USD","SAND-USD","GALA-USD",
-])
-CUSTOM_STOCK_SYMBOLS = _dedupe_symbols(TOP_STOCK_SYMBOLS + GROWTH_STOCK_SYMBOLS + [
-    "BABA","DIS","NVDA","MSFT","META","AMAT","NVDS","TQQQ","IWM","QQQ",
-])
-CUSTOM_ALL_SYMBOLS = _dedupe_symbols(CUSTOM_CRYPTO_SYMBOLS + CUSTOM_STOCK_SYMBOLS)
-
-QUICK_SNIPE_UNIVERSES = {
-    "All": _dedupe_symbols(TOP_CRYPTO_SYMBOLS + TOP_STOCK_SYMBOLS),
-    "Crypto": TOP_CRYPTO_SYMBOLS,
-    "Stocks": TOP_STOCK_SYMBOLS,
-}
-
-CUSTOM_RULE_UNIVERSES = {
-    "All": CUSTOM_ALL_SYMBOLS,
-    "Crypto": CUSTOM_CRYPTO_SYMBOLS,
-    "Stocks": CUSTOM_STOCK_SYMBOLS,
-}
-
 def map_to_tradingview_symbol(sym: str) -> str:
     """Map Yahoo-style symbols to TradingView symbols in a best-effort way."""
     base = (sym or "").upper().strip()
@@ -895,6 +866,60 @@ LEMON_CHECKOUT_URL = os.getenv("LEMON_CHECKOUT_URL", "")
 LEMON_VARIANT_ID = os.getenv("LEMON_VARIANT_ID", "")
 LEMON_API_KEY = os.getenv("LEMON_API_KEY", "")
 WEBHOOK_STATUS_URL = os.getenv("WEBHOOK_STATUS_URL", "")
+@st.cache_resource(show_spinner=False)
+def get_ohlcv_store():
+    return OHLCVStore()
+
+
+@st.cache_resource(show_spinner=False)
+def get_price_panel():
+    return SharedPricePanel(interval="1d")
+
+
+@st.cache_resource(show_spinner=False)
+def get_scan_cache():
+    return ScanCache(ttl=900, stale_ttl=3600)
+
+
+@st.cache_resource(show_spinner=False)
+def get_indicator_cache():
+    # Shared across users: different rule sets over unchanged bars reuse series
+    return IndicatorCache()
+
+
+@st.cache_resource(show_spinner=False)
+def get_indicator_states():
+    # Streaming indicators advanced with each refresh's new bars, saved beside them
+    return IndicatorStates(IndicatorStateStore(get_ohlcv_store().path))
+
+
+@st.cache_resource(show_spinner=False)
+def get_rule_stats():
+    # Pass rates and costs learned from every user's scans order the next one's rules
+    return RuleStats()
+
+
+@st.cache_resource(show_spinner=False)
+def get_signal_index():
+    # Rebuilt whenever the stored bars change; custom scans over its bars become bitmap lookups
+    return SignalIndex()
+
+
+# Set SCAN_CASSETTE=/path/to/file.cassette with SCAN_CASSETTE_MODE=record to capture
+# the market data every scan sees, or =replay to serve scans from it with no network.
+SCAN_CASSETTE = os.getenv("SCAN_CASSETTE", "")
+SCAN_CASSETTE_MODE = os.getenv("SCAN_CASSETTE_MODE", "record")
+
+
+def get_scan_loader():
+    if SCAN_CASSETTE and SCAN_CASSETTE_MODE == "replay":
+        return source_loader(ReplaySource(SCAN_CASSETTE))
+    load = get_price_panel().loader(get_ohlcv_store())
+    if SCAN_CASSETTE:
+        return Cassette(SCAN_CASSETTE).recording_loader(load)
+    return load
+
+
 @st.cache_resource(show_spinner=False)
 def get_supabase_client():
     if not create_client:
@@ -1043,479 +1068,14 @@ def increment_free_scan_count(email):
         pass
 
 
-def parse_custom_rules(rule_text):
-    """Parse custom rules from natural language - supports 50+ indicators"""
-    rules = []
-    original_text = rule_text
-    rule_text_upper = rule_text.upper()
-    
-    # Split by AND/OR to handle multiple rules
-    rule_parts = re.split(r'\s+AND\s+|\s+OR\s+', rule_text_upper)
-    
-    for part in rule_parts:
-        part = part.strip()
-        if not part:
-            continue
-        
-        # Extract numbers from rule
-        numbers = re.findall(r'\d+(?:\.\d+)?', part)
-        
-        # PRICE ABOVE/BELOW EMA
-        if ("PRICE" in part and "EMA" in part) or ("ABOVE" in part and "EMA" in part and "PRICE" in part):
-            ema_length = 200  # default
-            if numbers:
-                for num in numbers:
-                    if int(float(num)) in [9, 12, 20, 26, 50, 100, 200]:
-                        ema_length = int(float(num))
-                        break
-            if "ABOVE" in part or ">" in part:
-                rules.append(("PRICE_ABOVE_EMA", ">", ema_length))
-            elif "BELOW" in part or "<" in part:
-                rules.append(("PRICE_BELOW_EMA", "<", ema_length))
-        
-        # PRICE ABOVE/BELOW SMA
-        elif ("PRICE" in part and "SMA" in part) or ("ABOVE" in part and "SMA" in part):
-            sma_length = 200
-            if numbers:
-                for num in numbers:
-                    if int(float(num)) in [20, 50, 100, 200]:
-                        sma_length = int(float(num))
-                        break
-            if "ABOVE" in part or ">" in part:
-                rules.append(("PRICE_ABOVE_SMA", ">", sma_length))
-            elif "BELOW" in part or "<" in part:
-                rules.append(("PRICE_BELOW_SMA", "<", sma_length))
-        
-        # RSI
-        elif "RSI" in part:
-            value = 30 if "<" in part or "BELOW" in part else 70
-            if numbers:
-                value = float(numbers[0])
-            if "<" in part or "BELOW" in part or "UNDER" in part:
-                rules.append(("RSI", "<", value))
-            elif ">" in part or "ABOVE" in part or "OVER" in part:
-                rules.append(("RSI", ">", value))
-        
-        # MACD
-        elif "MACD" in part:
-            if "BULL" in part or "CROSS" in part and "ABOVE" in part:
-                rules.append(("MACD_CROSS", "BULL", None))
-            elif "BEAR" in part or "CROSS" in part and "BELOW" in part:
-                rules.append(("MACD_CROSS", "BEAR", None))
-            elif "HIST" in part:
-                if numbers:
-                    value = float(numbers[0])
-                    if ">" in part or "ABOVE" in part:
-                        rules.append(("MACD_HIST", ">", value))
-                    elif "<" in part or "BELOW" in part:
-                        rules.append(("MACD_HIST", "<", value))
-        
-        # Volume
-        elif "VOLUME" in part:
-            multiplier = 2.0
-            if "2X" in part or "2 X" in part or "DOUBLE" in part:
-                multiplier = 2.0
-            elif "3X" in part or "3 X" in part or "TRIPLE" in part:
-                multiplier = 3.0
-            elif numbers:
-                multiplier = float(numbers[0])
-            if ">" in part or "ABOVE" in part or "SPIKE" in part:
-                rules.append(("VOLUME", ">", multiplier))
-        
-        # Bollinger Bands
-        elif "BOLLINGER" in part or "BB" in part:
-            if "UPPER" in part and ("TOUCH" in part or "BREAK" in part):
-                rules.append(("BB_TOUCH", "UPPER", None))
-            elif "LOWER" in part and ("TOUCH" in part or "BREAK" in part):
-                rules.append(("BB_TOUCH", "LOWER", None))
-            elif "SQUEEZE" in part:
-                rules.append(("BB_SQUEEZE", None, None))
-        
-        # Stochastic
-        elif "STOCH" in part or "STOCHASTIC" in part:
-            value = 20 if "<" in part else 80
-            if numbers:
-                value = float(numbers[0])
-            if "<" in part or "BELOW" in part:
-                rules.append(("STOCH", "<", value))
-            elif ">" in part or "ABOVE" in part:
-                rules.append(("STOCH", ">", value))
-        
-        # ADX
-        elif "ADX" in part:
-            value = 25
-            if numbers:
-                value = float(numbers[0])
-            if ">" in part or "ABOVE" in part:
-                rules.append(("ADX", ">", value))
-        
-        # ATR
-        elif "ATR" in part:
-            if numbers:
-                value = float(numbers[0])
-                if ">" in part:
-                    rules.append(("ATR", ">", value))
-        
-        # CCI
-        elif "CCI" in part:
-            value = -100 if "<" in part else 100
-            if numbers:
-                value = float(numbers[0])
-            if "<" in part:
-                rules.append(("CCI", "<", value))
-            elif ">" in part:
-                rules.append(("CCI", ">", value))
-        
-        # Williams %R
-        elif "WILLIAMS" in part or "WILLR" in part:
-            value = -80 if "<" in part else -20
-            if numbers:
-                value = float(numbers[0])
-            if "<" in part:
-                rules.append(("WILLR", "<", value))
-            elif ">" in part:
-                rules.append(("WILLR", ">", value))
-        
-        # OBV
-        elif "OBV" in part:
-            if "DIVERGENCE" in part or "DIV" in part:
-                rules.append(("OBV_DIVERGENCE", None, None))
-        
-        # VWAP
-        elif "VWAP" in part:
-            if "ABOVE" in part or ">" in part:
-                rules.append(("PRICE_ABOVE_VWAP", None, None))
-            elif "BELOW" in part or "<" in part:
-                rules.append(("PRICE_BELOW_VWAP", None, None))
-        
-        # EMA Cross
-        elif "GOLDEN CROSS" in part or ("EMA" in part and "CROSS" in part and "50" in part and "200" in part):
-            if "GOLDEN" in part or "50 > 200" in part:
-                rules.append(("EMA_CROSS", "GOLDEN", None))
-            elif "DEATH" in part or "50 < 200" in part:
-                rules.append(("EMA_CROSS", "DEATH", None))
-        
-        # SuperTrend
-        elif "SUPERTREND" in part or "ST" in part:
-            if "ABOVE" in part or "BULL" in part:
-                rules.append(("SUPERTREND", "BULL", None))
-            elif "BELOW" in part or "BEAR" in part:
-                rules.append(("SUPERTREND", "BEAR", None))
-        
-        # Parabolic SAR
-        elif "PSAR" in part or "SAR" in part:
-            if "ABOVE" in part or "BULL" in part:
-                rules.append(("PSAR", "BULL", None))
-            elif "BELOW" in part or "BEAR" in part:
-                rules.append(("PSAR", "BEAR", None))
-        
-        # Aroon
-        elif "AROON" in part:
-            if "UP" in part and ">" in part:
-                if numbers:
-                    rules.append(("AROON_UP", ">", float(numbers[0])))
-            elif "DOWN" in part and ">" in part:
-                if numbers:
-                    rules.append(("AROON_DOWN", ">", float(numbers[0])))
-        
-        # MFI (Money Flow Index)
-        elif "MFI" in part:
-            value = 20 if "<" in part else 80
-            if numbers:
-                value = float(numbers[0])
-            if "<" in part:
-                rules.append(("MFI", "<", value))
-            elif ">" in part:
-                rules.append(("MFI", ">", value))
-        
-        # ROC (Rate of Change)
-        elif "ROC" in part:
-            if numbers:
-                value = float(numbers[0])
-                if ">" in part:
-                    rules.append(("ROC", ">", value))
-                elif "<" in part:
-                    rules.append(("ROC", "<", value))
-        
-        # Generic price rule (dollar amount)
-        elif "PRICE" in part and "$" in original_text:
-            price_matches = re.findall(r'\$(\d+(?:\.\d+)?)', original_text)
-            if price_matches:
-                value = float(price_matches[0])
-                if ">" in part or "ABOVE" in part:
-                    rules.append(("PRICE", ">", value))
-                elif "<" in part or "BELOW" in part:
-                    rules.append(("PRICE", "<", value))
-    
-    return rules
-
-
-def rule_to_label(rule):
-    rule_type, operator, value = rule
-    if rule_type == "PRICE_ABOVE_EMA":
-        return f"Price > EMA{value}"
-    if rule_type == "PRICE_BELOW_EMA":
-        return f"Price < EMA{value}"
-    if rule_type == "PRICE_ABOVE_SMA":
-        return f"Price > SMA{value}"
-    if rule_type == "PRICE_BELOW_SMA":
-        return f"Price < SMA{value}"
-    if rule_type == "RSI":
-        return f"RSI {operator} {value}"
-    if rule_type == "VOLUME":
-        return f"Volume {operator} {value}x avg"
-    if rule_type == "MACD_CROSS":
-        return f"MACD {operator} cross"
-    if rule_type == "EMA_CROSS":
-        return f"{operator.title()} Cross"
-    if rule_type == "BB_TOUCH":
-        return f"Bollinger {operator} touch"
-    if rule_type == "STOCH":
-        return f"Stochastic {operator} {value}"
-    if rule_type == "ADX":
-        return f"ADX {operator} {value}"
-    if rule_type == "ATR":
-        return f"ATR {operator} {value}"
-    if rule_type == "CCI":
-        return f"CCI {operator} {value}"
-    if rule_type == "WILLR":
-        return f"Williams %R {operator} {value}"
-    if rule_type == "OBV_DIVERGENCE":
-        return "OBV divergence"
-    if rule_type == "PRICE_ABOVE_VWAP":
-        return "Price > VWAP"
-    if rule_type == "PRICE_BELOW_VWAP":
-        return "Price < VWAP"
-    if rule_type == "SUPERTREND":
-        return f"SuperTrend {operator}"
-    if rule_type == "PSAR":
-        return f"Parabolic SAR {operator}"
-    if rule_type == "AROON_UP":
-        return f"Aroon Up {operator} {value}"
-    if rule_type == "AROON_DOWN":
-        return f"Aroon Down {operator} {value}"
-    if rule_type == "MFI":
-        return f"MFI {operator} {value}"
-    if rule_type == "ROC":
-        return f"ROC {operator} {value}"
-    if rule_type == "PRICE":
-        return f"Price {operator} {value}"
-    return rule_type
-
-
-def classify_bias(signals):
-    """Rudimentary sentiment classifier driven by signal wording."""
-    if not signals:
-        return "Neutral"
-    bull_keywords = ["above", "bull", "golden", "oversold", "support", "spike", "breakout", "accumulation"]
-    bear_keywords = ["below", "bear", "death", "overbought", "resistance", "sell", "short", "breakdown"]
-    bull_hits = sum(any(keyword in signal.lower() for keyword in bull_keywords) for signal in signals)
-    bear_hits = sum(any(keyword in signal.lower() for keyword in bear_keywords) for signal in signals)
-    if bull_hits > bear_hits:
-        return "Bullish"
-    if bear_hits > bull_hits:
-        return "Bearish"
-    return "Neutral"
-
-
-def action_from_bias(bias, score):
-    """Map bias + score to a plain-English trading action."""
-    if bias == "Bullish":
-        return "Potential BUY setup" if score >= 60 else "Bullish but wait for confirmation"
-    if bias == "Bearish":
-        return "Potential SELL / hedge setup" if score >= 60 else "Bearish but patience is advised"
-    return "Indecisive - stay on watch"
-
-
-def build_ai_summary(symbol, timeframe, score, price, change_pct, bias, signals, action, extra_context=None):
-    """Generate a human-readable narrative for the scan result."""
-    key_signals = ", ".join(signals[:3]) if signals else "no major signals"
-    change_str = f"{change_pct:+.2f}%" if change_pct is not None else "0.00%"
-    bias_text = bias.lower() if bias != "Neutral" else "mixed"
-    context = ""
-    if extra_context:
-        context_bits = [part for part in extra_context if part]
-        if context_bits:
-            context = f" Notables: {', '.join(context_bits[:2])}."
-    return (
-        f"{symbol} on the {timeframe} chart looks {bias_text} (score {score}/100). "
-        f"Price is near ${price:,.2f} ({change_str} today) with signals such as {key_signals}. "
-        f"{action}.{context}"
-    ).strip()
-
-def create_enhanced_chart(df, sym_clean, score, indicators=None, rules=None):
-    """Create a high-quality Plotly chart with premium styling."""
-    fig = go.Figure()
-    
-    # Enhanced candlesticks with thicker lines and better colors
-    fig.add_trace(
-        go.Candlestick(
-            x=df.index,
-            open=df.Open,
-            high=df.High,
-            low=df.Low,
-            close=df.Close,
-            name="Price",
-            increasing_line_color="#00ff88",
-            decreasing_line_color="#ff4d4d",
-            increasing_fillcolor="#00ff88",
-            decreasing_fillcolor="#ff4d4d",
-            line=dict(width=2),
-            whiskerwidth=0.8,
-        )
-    )
-    
-    # Add EMAs with thicker, smoother lines
-    if indicators:
-        if indicators.get('EMA_50') is not None:
-            ema50 = indicators['EMA_50']
-            fig.add_trace(go.Scatter(
-                x=df.index,
-                y=ema50,
-                name="EMA50",
-                line=dict(color="#ffb347", width=2.5, smoothing=1.3),
-                opacity=0.9,
-            ))
-        if indicators.get('EMA_200') is not None:
-            ema200 = indicators['EMA_200']
-            fig.add_trace(go.Scatter(
-                x=df.index,
-                y=ema200,
-                name="EMA200",
-                line=dict(color="#9b59b6", width=2.5, smoothing=1.3),
-                opacity=0.9,
-            ))
-        
-        # Add Bollinger Bands if used
-        if rules and any(r[0] == "BB_TOUCH" for r in rules):
-            if indicators.get('BB_Upper') is not None:
-                fig.add_trace(go.Scatter(
-                    x=df.index,
-                    y=indicators['BB_Upper'],
-                    name="BB Upper",
-                    line=dict(color="#2980b9", dash="dash", width=1.5),
-                    opacity=0.7,
-                ))
-            if indicators.get('BB_Lower') is not None:
-                fig.add_trace(go.Scatter(
-                    x=df.index,
-                    y=indicators['BB_Lower'],
-                    name="BB Lower",
-                    line=dict(color="#2980b9", dash="dash", width=1.5),
-                    opacity=0.7,
-                ))
-        
-        # Add VWAP if used
-        if rules and any(r[0] in ["PRICE_ABOVE_VWAP", "PRICE_BELOW_VWAP"] for r in rules):
-            if indicators.get('VWAP') is not None:
-                fig.add_trace(go.Scatter(
-                    x=df.index,
-                    y=indicators['VWAP'],
-                    name="VWAP",
-                    line=dict(color="#f1c40f", width=2, dash="dot"),
-                    opacity=0.8,
-                ))
-    else:
-        # Fallback for Quick Snipe (no indicators dict)
-        if "EMA50" in df.columns:
-            fig.add_trace(go.Scatter(
-                x=df.index,
-                y=df.EMA50,
-                name="EMA50",
-                line=dict(color="#ffb347", width=2.5, smoothing=1.3),
-                opacity=0.9,
-            ))
-        if "EMA200" in df.columns:
-            fig.add_trace(go.Scatter(
-                x=df.index,
-                y=df.EMA200,
-                name="EMA200",
-                line=dict(color="#9b59b6", width=2.5, smoothing=1.3),
-                opacity=0.9,
-            ))
-    
-    # Enhanced volume bars
-    if "Volume" in df.columns and not df["Volume"].isna().all():
-        fig.add_trace(
-            go.Bar(
-                x=df.index,
-                y=df["Volume"],
-                name="Volume",
-                marker=dict(
-                    color="rgba(0,255,136,0.35)",
-                    line=dict(color="rgba(0,255,136,0.5)", width=0.5),
-                ),
-                yaxis="y2",
-                opacity=0.6,
-            )
-        )
-    
-    # Premium layout with enhanced styling
-    fig.update_layout(
-        height=580,
-        title=dict(
-            text=f"{sym_clean} – Score {score}/100",
-            font=dict(size=20, color="#e6f8ff", family="Arial Black, sans-serif"),
-            x=0.5,
-        ),
-        template="plotly_dark",
-        paper_bgcolor="#0a0e1a",
-        plot_bgcolor="#0a0e1a",
-        xaxis=dict(
-            gridcolor="rgba(255,255,255,0.1)",
-            gridwidth=1,
-            showgrid=True,
-            zeroline=False,
-            tickfont=dict(color="#a0a0a0", size=11),
-        ),
-        yaxis=dict(
-            title=dict(text="Price", font=dict(color="#00ff88", size=13)),
-            gridcolor="rgba(255,255,255,0.1)",
-            gridwidth=1,
-            showgrid=True,
-            zeroline=False,
-            tickfont=dict(color="#a0a0a0", size=11),
-        ),
-        yaxis2=dict(
-            title=dict(text="Volume", font=dict(color="#00ff88", size=13)),
-            overlaying="y",
-            side="right",
-            showgrid=False,
-            rangemode="tozero",
-            tickfont=dict(color="#00ff88", size=10),
-        ),
-        xaxis_rangeslider_visible=False,
-        hovermode="x unified",
-        margin=dict(l=50, r=50, t=70, b=50),
-        legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=1.02,
-            xanchor="right",
-            x=1,
-            bgcolor="rgba(10,14,26,0.8)",
-            bordercolor="rgba(0,255,136,0.3)",
-            borderwidth=1,
-            font=dict(color="#e6f8ff", size=11),
-        ),
-        hoverlabel=dict(
-            bgcolor="rgba(0,0,0,0.9)",
-            bordercolor="#00ff88",
-            font=dict(color="#e6f8ff", size=12),
-        ),
-    )
-    
-    return fig
-
-def scan_with_custom_rules(custom_rules_text, universe_key="All"):
+def scan_with_custom_rules(custom_rules_text, universe_key="All", source=None):
     """Scan market with custom rules - supports 50+ indicators, 5-rule limit"""
-    results = []
     symbols = CUSTOM_RULE_UNIVERSES.get(universe_key, CUSTOM_ALL_SYMBOLS)
-    scan_targets = symbols[:500]
-    total_targets = len(scan_targets)
+    total_targets = len(symbols[:500])
     
     # Parse rules
     rules = parse_custom_rules(custom_rules_text)
+    expression = parse_rule_expression(custom_rules_text)
     rule_labels = [rule_to_label(r) for r in rules]
     rule_tally = [0] * len(rules)
     
@@ -1526,361 +1086,21 @@ def scan_with_custom_rules(custom_rules_text, universe_key="All"):
     if not rules:
         return [], "Could not parse rules. Try: 'RSI < 30 AND Volume > 2x average AND Price above 200 EMA'", {"rule_labels": [], "rule_tally": [], "total_symbols": total_targets}
     
-    for sym in scan_targets:
-        try:
-            # Download data - use up to 2 years to ensure EMA/indicator coverage
-            df = yf.download(sym, period="2y", interval="1d", progress=False, auto_adjust=False)
-            if len(df) < 60:
-                continue
-            if isinstance(df.columns, pd.MultiIndex):
-                df.columns = df.columns.droplevel(1)
-            df = df.dropna(subset=["Close", "High", "Low", "Volume"])
-            
-            # Calculate all indicators
-            indicators = calculate_all_indicators(df)
-            
-            latest = df.iloc[-1]
-            prev = df.iloc[-2] if len(df) > 1 else latest
-            
-            matches = []
-            score = 0
-            signals = []
-            explanation_parts = []
-            
-            # Check each rule
-            for idx, rule in enumerate(rules):
-                rule_type, operator, value = rule
-                matched = False
-                
-                try:
-                    # RSI
-                    if rule_type == "RSI" and indicators.get('RSI') is not None:
-                        rsi_val = indicators['RSI'].iloc[-1] if hasattr(indicators['RSI'], 'iloc') else indicators['RSI']
-                        if operator == "<" and rsi_val < value:
-                            matched = True
-                            score += 30
-                            signals.append(f"RSI {rsi_val:.1f} < {value}")
-                            explanation_parts.append(f"RSI oversold at {rsi_val:.1f}")
-                        elif operator == ">" and rsi_val > value:
-                            matched = True
-                            score += 30
-                            signals.append(f"RSI {rsi_val:.1f} > {value}")
-                            explanation_parts.append(f"RSI overbought at {rsi_val:.1f}")
-                    
-                    # Price above/below EMA
-                    elif rule_type == "PRICE_ABOVE_EMA":
-                        ema_key = f'EMA_{value}'
-                        if ema_key in indicators and indicators[ema_key] is not None:
-                            ema_val = indicators[ema_key].iloc[-1] if hasattr(indicators[ema_key], 'iloc') else indicators[ema_key]
-                            if latest.Close > ema_val:
-                                matched = True
-                                score += 30
-                                signals.append(f"Price above EMA{value}")
-                                explanation_parts.append(f"Price ${latest.Close:.2f} > EMA{value} ${ema_val:.2f}")
-                    
-                    elif rule_type == "PRICE_BELOW_EMA":
-                        ema_key = f'EMA_{value}'
-                        if ema_key in indicators and indicators[ema_key] is not None:
-                            ema_val = indicators[ema_key].iloc[-1] if hasattr(indicators[ema_key], 'iloc') else indicators[ema_key]
-                            if latest.Close < ema_val:
-                                matched = True
-                                score += 30
-                                signals.append(f"Price below EMA{value}")
-                                explanation_parts.append(f"Price ${latest.Close:.2f} < EMA{value} ${ema_val:.2f}")
-                    
-                    # Price above/below SMA
-                    elif rule_type == "PRICE_ABOVE_SMA":
-                        sma_key = f'SMA_{value}'
-                        if sma_key in indicators and indicators[sma_key] is not None:
-                            sma_val = indicators[sma_key].iloc[-1] if hasattr(indicators[sma_key], 'iloc') else indicators[sma_key]
-                            if latest.Close > sma_val:
-                                matched = True
-                                score += 30
-                                signals.append(f"Price above SMA{value}")
-                    
-                    elif rule_type == "PRICE_BELOW_SMA":
-                        sma_key = f'SMA_{value}'
-                        if sma_key in indicators and indicators[sma_key] is not None:
-                            sma_val = indicators[sma_key].iloc[-1] if hasattr(indicators[sma_key], 'iloc') else indicators[sma_key]
-                            if latest.Close < sma_val:
-                                matched = True
-                                score += 30
-                                signals.append(f"Price below SMA{value}")
-                    
-                    # Volume
-                    elif rule_type == "VOLUME":
-                        vol_ratio = indicators.get('Volume_Ratio')
-                        if vol_ratio is not None:
-                            vol_val = vol_ratio.iloc[-1] if hasattr(vol_ratio, 'iloc') else vol_ratio
-                            if operator == ">" and vol_val >= value:
-                                matched = True
-                                score += 25
-                                signals.append(f"Volume {vol_val:.1f}x average")
-                                explanation_parts.append(f"Volume spike: {vol_val:.1f}x normal")
-                    
-                    # MACD
-                    elif rule_type == "MACD_CROSS":
-                        macd = indicators.get('MACD')
-                        macd_sig = indicators.get('MACD_Signal')
-                        if macd is not None and macd_sig is not None:
-                            macd_curr = macd.iloc[-1] if hasattr(macd, 'iloc') else macd
-                            macd_prev = macd.iloc[-2] if hasattr(macd, 'iloc') and len(macd) > 1 else macd_curr
-                            sig_curr = macd_sig.iloc[-1] if hasattr(macd_sig, 'iloc') else macd_sig
-                            sig_prev = macd_sig.iloc[-2] if hasattr(macd_sig, 'iloc') and len(macd_sig) > 1 else sig_curr
-                            
-                            if operator == "BULL" and macd_curr > sig_curr and macd_prev <= sig_prev:
-                                matched = True
-                                score += 35
-                                signals.append("MACD Bull Cross")
-                                explanation_parts.append("MACD crossed above signal line")
-                            elif operator == "BEAR" and macd_curr < sig_curr and macd_prev >= sig_prev:
-                                matched = True
-                                score += 35
-                                signals.append("MACD Bear Cross")
-                    
-                    # EMA Cross
-                    elif rule_type == "EMA_CROSS":
-                        ema50 = indicators.get('EMA_50')
-                        ema200 = indicators.get('EMA_200')
-                        if ema50 is not None and ema200 is not None:
-                            ema50_curr = ema50.iloc[-1] if hasattr(ema50, 'iloc') else ema50
-                            ema50_prev = ema50.iloc[-2] if hasattr(ema50, 'iloc') and len(ema50) > 1 else ema50_curr
-                            ema200_curr = ema200.iloc[-1] if hasattr(ema200, 'iloc') else ema200
-                            ema200_prev = ema200.iloc[-2] if hasattr(ema200, 'iloc') and len(ema200) > 1 else ema200_curr
-                            
-                            if operator == "GOLDEN" and ema50_curr > ema200_curr and ema50_prev <= ema200_prev:
-                                matched = True
-                                score += 35
-                                signals.append("Golden Cross")
-                                explanation_parts.append("EMA50 crossed above EMA200")
-                            elif operator == "DEATH" and ema50_curr < ema200_curr and ema50_prev >= ema200_prev:
-                                matched = True
-                                score += 35
-                                signals.append("Death Cross")
-                    
-                    # Bollinger Bands
-                    elif rule_type == "BB_TOUCH":
-                        bb_upper = indicators.get('BB_Upper')
-                        bb_lower = indicators.get('BB_Lower')
-                        if bb_upper is not None and operator == "UPPER" and latest.Close >= bb_upper.iloc[-1]:
-                            matched = True
-                            score += 25
-                            signals.append("Price touched BB Upper")
-                        elif bb_lower is not None and operator == "LOWER" and latest.Close <= bb_lower.iloc[-1]:
-                            matched = True
-                            score += 25
-                            signals.append("Price touched BB Lower")
-                    
-                    # Stochastic
-                    elif rule_type == "STOCH":
-                        stoch_k = indicators.get('Stoch_K')
-                        if stoch_k is not None:
-                            stoch_val = stoch_k.iloc[-1] if hasattr(stoch_k, 'iloc') else stoch_k
-                            if operator == "<" and stoch_val < value:
-                                matched = True
-                                score += 25
-                                signals.append(f"Stoch {stoch_val:.1f} < {value}")
-                            elif operator == ">" and stoch_val > value:
-                                matched = True
-                                score += 25
-                                signals.append(f"Stoch {stoch_val:.1f} > {value}")
-                    
-                    # ADX
-                    elif rule_type == "ADX":
-                        adx = indicators.get('ADX')
-                        if adx is not None:
-                            adx_val = adx.iloc[-1] if hasattr(adx, 'iloc') else adx
-                            if operator == ">" and adx_val > value:
-                                matched = True
-                                score += 30
-                                signals.append(f"ADX {adx_val:.1f} > {value} (strong trend)")
-                    
-                    # CCI
-                    elif rule_type == "CCI":
-                        cci = indicators.get('CCI')
-                        if cci is not None:
-                            cci_val = cci.iloc[-1] if hasattr(cci, 'iloc') else cci
-                            if operator == "<" and cci_val < value:
-                                matched = True
-                                score += 25
-                                signals.append(f"CCI {cci_val:.1f} < {value}")
-                            elif operator == ">" and cci_val > value:
-                                matched = True
-                                score += 25
-                                signals.append(f"CCI {cci_val:.1f} > {value}")
-                    
-                    # Williams %R
-                    elif rule_type == "WILLR":
-                        willr = indicators.get('Williams_R')
-                        if willr is not None:
-                            willr_val = willr.iloc[-1] if hasattr(willr, 'iloc') else willr
-                            if operator == "<" and willr_val < value:
-                                matched = True
-                                score += 25
-                                signals.append(f"Williams %R {willr_val:.1f} < {value}")
-                            elif operator == ">" and willr_val > value:
-                                matched = True
-                                score += 25
-                                signals.append(f"Williams %R {willr_val:.1f} > {value}")
-                    
-                    # VWAP
-                    elif rule_type == "PRICE_ABOVE_VWAP":
-                        vwap = indicators.get('VWAP')
-                        if vwap is not None:
-                            vwap_val = vwap.iloc[-1] if hasattr(vwap, 'iloc') else vwap
-                            if latest.Close > vwap_val:
-                                matched = True
-                                score += 30
-                                signals.append("Price above VWAP")
-                                explanation_parts.append("Bullish VWAP position")
-                    
-                    elif rule_type == "PRICE_BELOW_VWAP":
-                        vwap = indicators.get('VWAP')
-                        if vwap is not None:
-                            vwap_val = vwap.iloc[-1] if hasattr(vwap, 'iloc') else vwap
-                            if latest.Close < vwap_val:
-                                matched = True
-                                score += 30
-                                signals.append("Price below VWAP")
-                    
-                    # SuperTrend
-                    elif rule_type == "SUPERTREND":
-                        st = indicators.get('SuperTrend')
-                        if st is not None:
-                            st_val = st.iloc[-1] if hasattr(st, 'iloc') else st
-                            if operator == "BULL" and latest.Close > st_val:
-                                matched = True
-                                score += 30
-                                signals.append("SuperTrend Bullish")
-                            elif operator == "BEAR" and latest.Close < st_val:
-                                matched = True
-                                score += 30
-                                signals.append("SuperTrend Bearish")
-                    
-                    # Parabolic SAR
-                    elif rule_type == "PSAR":
-                        psar = indicators.get('PSAR')
-                        if psar is not None:
-                            psar_val = psar.iloc[-1] if hasattr(psar, 'iloc') else psar
-                            if operator == "BULL" and latest.Close > psar_val:
-                                matched = True
-                                score += 25
-                                signals.append("PSAR Bullish")
-                            elif operator == "BEAR" and latest.Close < psar_val:
-                                matched = True
-                                score += 25
-                                signals.append("PSAR Bearish")
-                    
-                    # MFI
-                    elif rule_type == "MFI":
-                        mfi = indicators.get('MFI')
-                        if mfi is not None:
-                            mfi_val = mfi.iloc[-1] if hasattr(mfi, 'iloc') else mfi
-                            if operator == "<" and mfi_val < value:
-                                matched = True
-                                score += 25
-                                signals.append(f"MFI {mfi_val:.1f} < {value}")
-                            elif operator == ">" and mfi_val > value:
-                                matched = True
-                                score += 25
-                                signals.append(f"MFI {mfi_val:.1f} > {value}")
-                    
-                    # ROC
-                    elif rule_type == "ROC":
-                        roc = indicators.get('ROC')
-                        if roc is not None:
-                            roc_val = roc.iloc[-1] if hasattr(roc, 'iloc') else roc
-                            if operator == ">" and roc_val > value:
-                                matched = True
-                                score += 25
-                                signals.append(f"ROC {roc_val:.2f}% > {value}%")
-                            elif operator == "<" and roc_val < value:
-                                matched = True
-                                score += 25
-                                signals.append(f"ROC {roc_val:.2f}% < {value}%")
-                    
-                    # Aroon
-                    elif rule_type == "AROON_UP":
-                        aroon_up = indicators.get('Aroon_Up')
-                        if aroon_up is not None:
-                            aroon_val = aroon_up.iloc[-1] if hasattr(aroon_up, 'iloc') else aroon_up
-                            if operator == ">" and aroon_val > value:
-                                matched = True
-                                score += 25
-                                signals.append(f"Aroon Up {aroon_val:.1f} > {value}")
-                    
-                    elif rule_type == "AROON_DOWN":
-                        aroon_down = indicators.get('Aroon_Down')
-                        if aroon_down is not None:
-                            aroon_val = aroon_down.iloc[-1] if hasattr(aroon_down, 'iloc') else aroon_down
-                            if operator == ">" and aroon_val > value:
-                                matched = True
-                                score += 25
-                                signals.append(f"Aroon Down {aroon_val:.1f} > {value}")
-                    
-                    # Generic price
-                    elif rule_type == "PRICE":
-                        if operator == ">" and latest.Close > value:
-                            matched = True
-                            score += 20
-                            signals.append(f"Price ${latest.Close:.2f} > ${value}")
-                        elif operator == "<" and latest.Close < value:
-                            matched = True
-                            score += 20
-                            signals.append(f"Price ${latest.Close:.2f} < ${value}")
-                
-                except Exception as e:
-                    pass
-                
-                matches.append(matched)
-                if matched:
-                    rule_tally[idx] += 1
-            
-            # Only include if ALL rules match
-            if all(matches) and len(matches) == len(rules) and len(matches) > 0:
-                sym_clean = sym.replace("-USD","")
-                timeframe_label = "1D (Daily)"
-                change_pct = float(((latest.Close - prev.Close) / prev.Close) * 100) if prev.Close != 0 else 0.0
-                price_val = float(latest.Close)
-
-                # Create enhanced chart with premium styling
-                fig = create_enhanced_chart(df, sym_clean, score, indicators, rules)
-                fig.update_layout(title=dict(text=f"{sym_clean} – Custom Rules Match (Score: {score}/100)"))
-                
-                figure_dict = fig.to_dict()
-                explanation = " | ".join(explanation_parts) if explanation_parts else "Matches all your custom rules"
-                bias = classify_bias(signals)
-                action = action_from_bias(bias, score)
-                narrative = build_ai_summary(
-                    sym_clean,
-                    timeframe_label,
-                    score,
-                    price_val,
-                    change_pct,
-                    bias,
-                    signals,
-                    action,
-                    explanation_parts,
-                )
-                
-                results.append({
-                    "sym": sym_clean,
-                    "score": score,
-                    "signals": signals,
-                    "figure": figure_dict,
-                    "explanation": explanation,
-                    "timeframe": timeframe_label,
-                    "bias": bias,
-                    "action": action,
-                    "narrative": narrative,
-                    "price": price_val,
-                    "change_pct": change_pct,
-                })
-        except Exception as e:
-            pass
+    # An explicit data source (offline fixtures, benchmarks) bypasses the shared store and cache
+    if source is not None:
+        return run_custom_rule_scan(rules, universe_key, source_loader(source), expression=expression)
     
-    debug_summary = {"rule_labels": rule_labels, "rule_tally": rule_tally, "total_symbols": total_targets}
-    return sorted(results, key=lambda x: x["score"], reverse=True), None, debug_summary
+    # Parsed rules are normalized (see rule_grammar), so users typing the same
+    # strategy in any case or spacing share one in-flight / cached scan
+    load = get_scan_loader()
+    return get_scan_cache().get(
+        ("custom", universe_key, tuple(rules), expression),
+        lambda: run_custom_rule_scan(
+            rules, universe_key, load, get_indicator_cache(), expression, get_rule_stats(), get_signal_index(),
+            get_indicator_states(),
+        ),
+    )
+
 
 # Show payment options
 def show_payment_options():
@@ -2026,6 +1246,7 @@ if st.session_state.show_custom_rules:
                 - Price above/below SMA (20,50,200)
                 - Golden Cross / Death Cross
                 - MACD Bull/Bear Cross
+                - MACD above/below signal
                 - ADX > 25
                 - SuperTrend
                 - Parabolic SAR
@@ -2058,7 +1279,9 @@ if st.session_state.show_custom_rules:
 RSI < 30 AND Volume > 2x average AND MACD bull cross
 Price above VWAP AND SuperTrend bullish AND ADX > 25
 Stochastic < 20 AND Price above 50 EMA AND Volume spike
-Golden Cross AND RSI > 50 AND Price above 200 EMA""", language=None)
+Golden Cross AND RSI > 50 AND Price above 200 EMA
+(RSI < 30 OR Stochastic < 20) AND Price above 200 EMA""", language=None)
+        st.caption("Combine conditions with AND / OR / NOT; NOT binds tightest, then AND, and parentheses group.")
         
         custom_rule = st.text_area("Enter your trading strategy rules (max 5 conditions):", 
                                  placeholder="Example: Price above 200 EMA AND RSI > 40 AND Volume > 2x average",
@@ -2084,14 +1307,44 @@ Golden Cross AND RSI > 50 AND Price above 200 EMA""", language=None)
                 
                 if debug_info.get("rule_labels"):
                     st.markdown("#### Rule Coverage Across Universe")
+                    if debug_info.get("expression"):
+                        st.caption(f"Matching: {debug_info['expression']}")
                     total = debug_info.get("total_symbols", 0)
                     coverage_cols = st.columns(2)
                     labels = debug_info.get("rule_labels", [])
                     tallies = debug_info.get("rule_tally", [])
-                    for i, (label, count) in enumerate(zip(labels, tallies)):
+                    # Rules run cheapest and most selective first, each on the symbols still in play
+                    checked = debug_info.get("rule_evaluated") or [total] * len(tallies)
+                    for i, (label, count, seen) in enumerate(zip(labels, tallies, checked)):
                         col = coverage_cols[i % 2]
                         with col:
-                            st.write(f"• **{label}** → {count}/{total} symbols match")
+                            if seen < total:
+                                st.write(f"• **{label}** → {count}/{seen} remaining symbols match")
+                            else:
+                                st.write(f"• **{label}** → {count}/{total} symbols match")
+                    failed = debug_info.get("failed_symbols") or {}
+                    if failed:
+                        with st.expander(f"⚠️ {len(failed)} symbols could not be scanned"):
+                            for sym, reason in sorted(failed.items()):
+                                st.write(f"• **{sym}** → {reason}")
+                    upstream = limiter_stats().get("yfinance", {})
+                    if upstream.get("throttled"):
+                        st.caption(
+                            f"Yahoo throttled this server {upstream['throttled']}x "
+                            f"({upstream['retries']} retries, {upstream['rejected']} skipped, circuit {upstream['circuit']})."
+                        )
+                    cache_stats = get_indicator_cache().stats()
+                    if cache_stats["hits"] + cache_stats["misses"]:
+                        st.caption(
+                            f"Indicator cache: {cache_stats['hit_rate']:.0%} hit rate, {cache_stats['entries']} series, "
+                            f"{cache_stats['bytes'] / 2**20:.1f} of {cache_stats['max_bytes'] / 2**20:.0f} MB."
+                        )
+                    index_stats = get_signal_index().stats()
+                    if index_stats["hits"] + index_stats["misses"]:
+                        st.caption(
+                            f"Signal index: {index_stats['hits']} of {index_stats['hits'] + index_stats['misses']} "
+                            f"scans answered from {index_stats['bitmaps']} precomputed conditions."
+                        )
             else:
                 st.info("Please enter your custom rules above.")
     st.markdown("---")
@@ -2143,73 +1396,51 @@ if st.session_state.show_scanner:
     )
 
 
-@st.cache_data(ttl=900)
-def scan(universe_key: str):
-    results = []
-    symbols = QUICK_SNIPE_UNIVERSES.get(universe_key, QUICK_SNIPE_UNIVERSES["All"])
-    
-    for sym in symbols:
-        try:
-            df = yf.download(sym, period="6mo", progress=False)
-            if len(df) < 50:
-                continue
-            
-            df["EMA50"] = ta.ema(df.Close, 50)
-            df["EMA200"] = ta.ema(df.Close, 200)
-            df["RSI"] = ta.rsi(df.Close, 14)
-            
-            latest = df.iloc[-1]
-            prev = df.iloc[-2] if len(df) > 1 else latest
-            score = 0
-            signals = []
-            
-            if latest.EMA50 > latest.EMA200 and df.EMA50.iloc[-2] <= df.EMA200.iloc[-2]:
-                signals.append("Golden Cross"); score += 35
-            
-            if latest.RSI < 30:
-                signals.append("Oversold"); score += 25
-            
-            if latest.Volume > df.Volume.rolling(20).mean().iloc[-1]*2:
-                signals.append("Volume Spike"); score += 20
-            
-            if score >= 50:
-                sym_clean = sym.replace("-USD","")
-                timeframe_label = "1D (Daily)"
-                change_pct = float(((latest.Close - prev.Close) / prev.Close) * 100) if prev.Close != 0 else 0.0
-                price_val = float(latest.Close)
-                
-                # Create enhanced chart with premium styling
-                fig = create_enhanced_chart(df, sym_clean, score, indicators=None, rules=None)
-                
-                bias = classify_bias(signals)
-                action = action_from_bias(bias, score)
-                narrative = build_ai_summary(
-                    sym_clean,
-                    timeframe_label,
-                    score,
-                    price_val,
-                    change_pct,
-                    bias,
-                    signals,
-                    action,
-                )
-                
-                results.append({
-                    "sym": sym_clean,
-                    "score": score,
-                    "signals": signals,
-                    "figure": fig.to_dict(),
-                    "timeframe": timeframe_label,
-                    "price": price_val,
-                    "change_pct": change_pct,
-                    "bias": bias,
-                    "action": action,
-                    "narrative": narrative,
-                })
-        except: 
-            pass
-    
-    return sorted(results, key=lambda x: x["score"], reverse=True)[:10]
+def scan(universe_key: str, source=None):
+    if source is not None:
+        return run_quick_scan(universe_key, source_loader(source))
+    # Cache expiry doesn't stampede: one recompute per universe, stale results served meanwhile
+    load = get_scan_loader()
+    return get_scan_cache().get(("quick", universe_key), lambda: run_quick_scan(universe_key, load))
+
+
+# Background prewarming fetches the universes on a timer; opt in per deployment
+PREWARM_ENABLED = os.getenv("PREWARM_ENABLED", "0") == "1"
+PREWARM_INTERVAL_SECONDS = float(os.getenv("PREWARM_INTERVAL_SECONDS", "600"))
+# How often the signal index checks the store for new bars
+SIGNAL_INDEX_POLL_SECONDS = float(os.getenv("SIGNAL_INDEX_POLL_SECONDS", "30"))
+
+
+@st.cache_resource(show_spinner=False)
+def start_scan_prewarmer():
+    """Recompute the Quick Snipe universes in the background so clicks hit a warm cache."""
+    load = get_scan_loader()
+    jobs = [
+        # "All" mixes crypto in, so it trades around the clock like "Crypto"
+        PrewarmJob(("quick", "All"), lambda: run_quick_scan("All", load)),
+        PrewarmJob(("quick", "Crypto"), lambda: run_quick_scan("Crypto", load)),
+        PrewarmJob(("quick", "Stocks"), lambda: run_quick_scan("Stocks", load), is_active=us_market_open),
+    ]
+    return PrewarmScheduler(get_scan_cache(), jobs, interval=PREWARM_INTERVAL_SECONDS).start()
+
+
+@st.cache_resource(show_spinner=False)
+def start_signal_index_watcher():
+    """Rebuild the signal index whenever the store's bars change - no rebuilds while they don't."""
+    load, store, interval = get_scan_loader(), get_ohlcv_store(), get_price_panel().interval
+    signal_index, indicator_cache, indicator_states = get_signal_index(), get_indicator_cache(), get_indicator_states()
+    return VersionWatcher(
+        lambda: store.data_version(interval),
+        lambda: signal_index.refresh(load, indicator_cache, indicator_states),
+        interval=SIGNAL_INDEX_POLL_SECONDS,
+        name="signal-index",
+    ).start()
+
+
+# Only from a live Streamlit session, so importing app.py never starts fetch threads
+if PREWARM_ENABLED and get_script_run_ctx() is not None:
+    start_scan_prewarmer()
+    start_signal_index_watcher()
 
 st.markdown("---")
 
@@ -0,0 +1,179 @@
+"""
+Cassette Module
+Record market data seen by real scans and replay it offline
+"""
+import argparse
+import cProfile
+import gzip
+import os
+import pickle
+import pstats
+import threading
+import time
+
+import pandas as pd
+
+from market_data import MarketDataSource, slice_window
+
+
+def _key(symbol, interval, period, start):
+    return (symbol, interval, period, None if start is None else pd.Timestamp(start).value)
+
+
+class Cassette:
+    """Append-only, gzip-compressed file of recorded OHLCV frames.
+
+    Each record holds the exact frame returned for one
+    ``(symbol, interval, period, start)`` request. Records are appended as
+    separate gzip members, so a recording survives a crash mid-scan and can
+    be copied off a production box while it is still being written.
+
+    A request is recorded once: the first frame seen for a key is kept and
+    repeats are skipped, so rescanning while recording does not grow the
+    file and a replay sees one consistent snapshot.
+
+    Cassettes are pickles - only replay files you recorded yourself.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._index = None
+        self._recorded = None
+
+    def record(self, symbol, interval, period, start, frame):
+        """Append ``frame`` for its request key; returns False if the key was already recorded."""
+        key = _key(symbol, interval, period, start)
+        with self._lock:
+            if self._recorded is None:
+                # Keys from earlier sessions count too, so a restarted recording appends only new requests
+                self._recorded = {entry["key"] for entry in self.records()}
+            if key in self._recorded:
+                return False
+            entry = {"key": key, "recorded_at": time.time(), "frame": pd.DataFrame(frame).copy()}
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with gzip.open(self.path, "ab") as fh:
+                pickle.dump(entry, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            self._recorded.add(key)
+            self._index = None
+            return True
+
+    def records(self):
+        """Yield every record in recording order."""
+        if not os.path.exists(self.path):
+            return
+        with gzip.open(self.path, "rb") as fh:
+            while True:
+                try:
+                    yield pickle.load(fh)
+                except EOFError:
+                    return
+
+    def index(self):
+        """{key: frame}; files from before keys were deduplicated let later recordings win."""
+        with self._lock:
+            if self._index is None:
+                self._index = {entry["key"]: entry["frame"] for entry in self.records()}
+            return self._index
+
+    def recording_loader(self, load, interval="1d"):
+        """Wrap a scanner ``load(symbols, period)`` hook so each request it answers is recorded once."""
+        def recording_load(symbols, period):
+            frames, failures = load(symbols, period)
+            for sym, df in frames.items():
+                self.record(sym, interval, period, None, df)
+            return frames, failures
+        return recording_load
+
+
+class RecordingSource(MarketDataSource):
+    """Pass-through source that records each request ``inner`` answers, once."""
+
+    name = "recording"
+
+    def __init__(self, inner, cassette):
+        self.inner = inner
+        self.upstream = inner.upstream
+        self.cassette = cassette if isinstance(cassette, Cassette) else Cassette(cassette)
+
+    def fetch(self, symbols, period="2y", interval="1d", start=None, timeout=None, **kwargs):
+        frames = self.inner.fetch(symbols, period=period, interval=interval, start=start, timeout=timeout, **kwargs)
+        for sym, df in frames.items():
+            self.cassette.record(sym, interval, period, start, df)
+        return frames
+
+
+class ReplaySource(MarketDataSource):
+    """Serve recorded frames with no network.
+
+    Requests are matched exactly on ``(symbol, interval, period, start)``.
+    Unless ``strict`` is set, a request that was never recorded falls back to
+    the longest recording of that symbol cut to the requested window.
+    """
+
+    name = "replay"
+
+    def __init__(self, cassette, strict=False):
+        self.cassette = cassette if isinstance(cassette, Cassette) else Cassette(cassette)
+        self.strict = strict
+
+    def _fallback(self, symbol, interval):
+        candidates = [
+            frame for (sym, ivl, _, _), frame in self.cassette.index().items()
+            if sym == symbol and ivl == interval
+        ]
+        return max(candidates, key=len) if candidates else None
+
+    def fetch(self, symbols, period="2y", interval="1d", start=None, timeout=None, **kwargs):
+        index = self.cassette.index()
+        frames = {}
+        for sym in symbols:
+            df = index.get(_key(sym, interval, period, start))
+            if df is None and not self.strict:
+                df = self._fallback(sym, interval)
+                if df is not None:
+                    df = slice_window(df, period=period, start=start)
+            if df is not None and not df.empty:
+                # Hand out copies so a scan can't alter the recording between runs
+                frames[sym] = df.copy()
+        return frames
+
+
+def main():
+    from market_data import source_loader
+    from scanner import parse_custom_rules, parse_rule_expression, run_custom_rule_scan, run_quick_scan
+
+    parser = argparse.ArgumentParser(description="Replay a recorded scan offline, optionally under cProfile.")
+    parser.add_argument("cassette", help="path to a cassette file")
+    parser.add_argument("rules", nargs="?", help="custom rules text; omit to replay a Quick Snipe scan")
+    parser.add_argument("--universe", default="All")
+    parser.add_argument("--runs", type=int, default=1)
+    parser.add_argument("--profile", action="store_true", help="print the top cProfile entries")
+    args = parser.parse_args()
+
+    load = source_loader(ReplaySource(args.cassette))
+    if args.rules:
+        rules = parse_custom_rules(args.rules)
+        expression = parse_rule_expression(args.rules)
+        run = lambda: run_custom_rule_scan(rules, args.universe, load, expression=expression)
+    else:
+        run = lambda: run_quick_scan(args.universe, load)
+
+    profiler = cProfile.Profile() if args.profile else None
+    for i in range(max(1, args.runs)):
+        started = time.perf_counter()
+        if profiler:
+            profiler.enable()
+        result = run()
+        if profiler:
+            profiler.disable()
+        matches = result[0] if args.rules else result
+        print(f"run {i + 1}: {time.perf_counter() - started:.2f}s, {len(matches)} matches")
+    if profiler:
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(25)
+
+
+if __name__ == "__main__":
+    main()
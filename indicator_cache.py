@@ -0,0 +1,147 @@
+"""
+Indicator Cache Module
+Content-addressed, byte-budgeted LRU cache of computed indicator series
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from ta_indicators import as_series
+
+INDICATOR_CACHE_BYTES = int(os.getenv("INDICATOR_CACHE_BYTES", str(256 * 1024 * 1024)))
+# Keep cached series as float32 views on the frame's index (about 7 significant digits)
+INDICATOR_CACHE_COMPACT = os.getenv("INDICATOR_CACHE_COMPACT", "0") == "1"
+
+# Charged for a cached None (an indicator the frame was too short for)
+_ENTRY_OVERHEAD = 64
+
+
+def frame_key(symbol, interval, df):
+    """Content address of ``df``: the bars it spans, which fix every value computed from it.
+
+    The first/last timestamps and bar count identify the window. The last
+    bar's values catch a still-forming bar being refreshed in place, and the
+    first bar's catch a dividend/split re-adjustment of the history. A new
+    bar or a different tail length yields a new address; old entries age out.
+    The edge bars go in as raw bytes with NaN made canonical: a tuple of
+    floats holding NaN never equals itself, so such a frame would never hit.
+    """
+    if df is None or df.empty:
+        return None
+    # One array view for single-dtype frames; per-column access costs ~15x more
+    values = df.to_numpy()
+    edges = np.array(values[[0, -1]], dtype=np.float64)
+    edges[np.isnan(edges)] = np.nan
+    return (symbol, interval, df.index[0].value, df.index[-1].value, len(df), edges.tobytes())
+
+
+def _nbytes(series, index=True):
+    if series is None:
+        return _ENTRY_OVERHEAD
+    try:
+        # Counting the index makes series that share one an upper bound
+        return int(series.memory_usage(index=index, deep=False)) + _ENTRY_OVERHEAD
+    except Exception:
+        return _ENTRY_OVERHEAD
+
+
+class IndicatorCache:
+    """Indicator series keyed by (frame address, indicator key), evicted LRU past ``max_bytes``.
+
+    Indicator keys carry their parameters (``EMA_50``, ``SMA_20``), and the
+    rest use fixed defaults, so ``(frame_key, key)`` fully determines a value.
+    Entries are cached per indicator, so rule sets that overlap share them.
+
+    With ``compact`` series are stored as float32 sharing the frame's index,
+    which halves the values and drops the per-series index copies.
+
+    Cached series are shared between scans and must not be mutated.
+    """
+
+    def __init__(self, max_bytes=INDICATOR_CACHE_BYTES, compact=INDICATOR_CACHE_COMPACT):
+        self.max_bytes = max_bytes
+        self.compact = compact
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, address, keys):
+        """({key: cached series}, {keys that must be computed})."""
+        found, missing = {}, set()
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get((address, key)) if address is not None else None
+                if entry is None:
+                    missing.add(key)
+                    continue
+                self._entries.move_to_end((address, key))
+                found[key] = entry[0]
+            self.hits += len(found)
+            self.misses += len(missing)
+        return found, missing
+
+    def store(self, address, indicators, keys, index=None):
+        """Cache ``indicators[key]`` for every key in ``keys`` (None when it could not be computed).
+
+        Scalar entries are broadcast to Series over ``index`` (the frame's).
+        Returns ``{key: series}`` as stored, so a first scan sees the same
+        (possibly float32) values later cache hits will.
+        """
+        stored = {key: indicators.get(key) for key in keys}
+        if index is not None:
+            stored = {key: as_series(value, index) for key, value in stored.items()}
+        if self.compact:
+            stored = {
+                key: series.astype(np.float32) if isinstance(series, pd.Series) and series.dtype != np.float32 else series
+                for key, series in stored.items()
+            }
+        if address is None:
+            return stored
+        with self._lock:
+            for key, series in stored.items():
+                size = _nbytes(series, index=not self.compact)
+                if size > self.max_bytes:
+                    continue
+                previous = self._entries.pop((address, key), None)
+                if previous is not None:
+                    self._bytes -= previous[1]
+                self._entries[(address, key)] = (series, size)
+                self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                _, (_, size) = self._entries.popitem(last=False)
+                self._bytes -= size
+                self.evictions += 1
+        return stored
+
+    def get(self, symbol, interval, df, keys, compute):
+        """``{key: series}`` for ``keys`` of ``df``, calling ``compute(df, missing_keys)`` for misses."""
+        address = frame_key(symbol, interval, df)
+        indicators, missing = self.lookup(address, keys)
+        if missing:
+            indicators.update(self.store(address, compute(df, missing), missing, df.index))
+        return {key: series for key, series in indicators.items() if series is not None}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "compact": self.compact,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
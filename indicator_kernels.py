@@ -0,0 +1,266 @@
+"""
+Indicator Kernels Module
+NumPy kernels for the recursive indicators pandas-ta computes in Python loops
+"""
+import sys
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+# Block length for the linear-recurrence scan. Within a block the running
+# product of decay factors must stay far from underflow; 16 bars of the
+# fastest KAMA decay (~0.56) is ~1e-4, which keeps the scan at ~1e-12 accuracy.
+_BLOCK = 16
+
+_EPSILON = sys.float_info.epsilon
+
+
+def linear_recurrence(a, b, y0, start=0):
+    """Solve ``y[i] = a[i] * y[i-1] + b[i]`` for ``i > start`` with ``y[start] = y0``.
+
+    Blocked prefix products/sums replace the per-bar Python loop: each block
+    is closed-form (``y = P * (y_prev + cumsum(b / P))``) and only the block
+    boundaries are sequential. Entries before ``start`` are NaN.
+    """
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    y = np.full(len(a), np.nan)
+    if start >= len(a):
+        return y
+    y[start] = y0
+    carry = y0
+    for lo in range(start + 1, len(a), _BLOCK):
+        hi = min(lo + _BLOCK, len(a))
+        prod = np.cumprod(a[lo:hi])
+        y[lo:hi] = prod * (carry + np.cumsum(b[lo:hi] / prod))
+        carry = y[hi - 1]
+    return y
+
+
+def wilder(values, length):
+    """pandas-ta ATR smoothing: SMA of the first ``length`` values, then RMA."""
+    values = np.asarray(values, dtype=float)
+    if len(values) < length:
+        return np.full(len(values), np.nan)
+    alpha = 1.0 / length
+    seed = np.nanmean(values[:length])
+    return linear_recurrence(np.full(len(values), 1.0 - alpha), alpha * values, seed, start=length - 1)
+
+
+def true_range(high, low, close):
+    prev_close = np.concatenate(([np.nan], close[:-1]))
+    return np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(prev_close - low)))
+
+
+def non_zero_range(diff):
+    """pandas-ta's ``non_zero_range``: a difference series with any exact zero is shifted by epsilon."""
+    if (diff == 0).any():
+        return diff + _EPSILON
+    return diff
+
+
+def kama(close, length=10, fast=2, slow=30):
+    """Kaufman adaptive moving average, as ``ta.kama``.
+
+    The adaptive smoothing is a linear recurrence with per-bar coefficients,
+    so it runs through ``linear_recurrence`` instead of a Python loop.
+    """
+    close = np.asarray(close, dtype=float)
+    m = len(close)
+    if m < max(fast, slow, length):
+        return np.full(m, np.nan)
+    fr, sr = 2.0 / (fast + 1), 2.0 / (slow + 1)
+    # A flat stretch would make the efficiency ratio 0/0 and the NaN would
+    # ride the recurrence to the end; pandas-ta nudges zero moves by epsilon
+    change = np.full(m, np.nan)
+    change[length:] = np.abs(non_zero_range(close[length:] - close[:-length]))
+    step = np.full(m, np.nan)
+    step[1:] = np.abs(non_zero_range(close[1:] - close[:-1]))
+    volatility = np.full(m, np.nan)
+    volatility[length:] = np.convolve(step[1:], np.ones(length), mode="valid")
+    sc = (change / volatility * (fr - sr) + sr) ** 2
+    # Seed: the SMA of the first ``length`` closes, as ma("sma", close[:length]) in ta.kama
+    return linear_recurrence(1.0 - sc, sc * close, close[:length].mean(), start=length - 1)
+
+
+def supertrend(high, low, close, length=7, multiplier=3.0, atr=None):
+    """SuperTrend line (``SUPERT`` column of ``ta.supertrend``).
+
+    The band ratchet flips on every trend change, so the scan stays
+    sequential; it runs over plain floats, which is far cheaper than the
+    ``.iat`` access pandas-ta uses.
+    """
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    close = np.asarray(close, dtype=float)
+    if atr is None:
+        atr = wilder(true_range(high, low, close), length)
+    hl2 = 0.5 * (high + low)
+    lb = (hl2 - multiplier * atr).tolist()
+    ub = (hl2 + multiplier * atr).tolist()
+    closes = close.tolist()
+    trend = [np.nan] * len(closes)
+    bull = True
+    for i in range(1, len(closes)):
+        if closes[i] > ub[i - 1]:
+            bull = True
+        elif closes[i] < lb[i - 1]:
+            bull = False
+        else:
+            if bull and lb[i] < lb[i - 1]:
+                lb[i] = lb[i - 1]
+            if not bull and ub[i] > ub[i - 1]:
+                ub[i] = ub[i - 1]
+        trend[i] = lb[i] if bull else ub[i]
+    return np.array(trend)
+
+
+def psar(high, low, af0=0.02, max_af=0.2):
+    """Parabolic SAR as one series (``ta.psar``'s long column filled with its short one).
+
+    Same reversal logic as pandas-ta, run over plain floats.
+    """
+    highs = np.asarray(high, dtype=float).tolist()
+    lows = np.asarray(low, dtype=float).tolist()
+    m = len(highs)
+    out = [np.nan] * m
+    if m < 2:
+        return np.array(out)
+    # Initial direction: the second bar's -DM is positive
+    up, dn = highs[1] - highs[0], lows[0] - lows[1]
+    falling = dn > up and dn > 0
+    ep = lows[0] if falling else highs[0]
+    sar = highs[0] if falling else lows[0]
+    af = af0
+    for i in range(1, m):
+        sar = sar + af * (ep - sar)
+        if falling:
+            reverse = highs[i] > sar
+            if lows[i] < ep:
+                ep = lows[i]
+                af = min(af + af0, max_af)
+            sar = max(highs[i - 1], sar)
+        else:
+            reverse = lows[i] < sar
+            if highs[i] > ep:
+                ep = highs[i]
+                af = min(af + af0, max_af)
+            sar = min(lows[i - 1], sar)
+        if reverse:
+            sar = ep
+            af = af0
+            falling = not falling
+            ep = lows[i] if falling else highs[i]
+        out[i] = sar
+    return np.array(out)
+
+
+def rolling_extreme(values, length, largest=True):
+    """(rolling max or min of ``values``, position of its most recent occurrence), O(n).
+
+    A monotonic deque of ``(position, value)`` pairs whose values strictly
+    decrease (increase for a minimum) from the front, so the front is the
+    window's extreme. A new value evicts every entry it ties or beats, which
+    makes the reported position the *most recent* occurrence of the extreme -
+    the convention Aroon's "bars since the high" uses. A NaN blanks every
+    window containing it, as pandas' rolling max/min does. Positions are -1
+    while the window is filling.
+    """
+    values = np.asarray(values, dtype=float).tolist()
+    extreme, at = [np.nan] * len(values), [-1] * len(values)
+    entries = deque()
+    last_nan = -length
+    for i, x in enumerate(values):
+        if x != x:
+            last_nan = i
+        elif largest:
+            while entries and entries[-1][1] <= x:
+                entries.pop()
+            entries.append((i, x))
+        else:
+            while entries and entries[-1][1] >= x:
+                entries.pop()
+            entries.append((i, x))
+        # Positions are consecutive, so at most one entry expires per value
+        if entries and entries[0][0] <= i - length:
+            entries.popleft()
+        if i >= length - 1 and last_nan <= i - length and entries:
+            at[i], extreme[i] = entries[0]
+    return np.array(extreme, dtype=float), np.array(at, dtype=int)
+
+
+def rolling_extrema(high, low, windows):
+    """``{window: (highest, highest_at, lowest, lowest_at)}`` of ``high``/``low`` for each length."""
+    return {
+        w: rolling_extreme(high, w) + rolling_extreme(low, w, largest=False)
+        for w in windows
+    }
+
+
+def _reference(name, df):
+    import pandas_ta as ta
+
+    if name == "PSAR":
+        result = ta.psar(df.High, df.Low)
+        return result.iloc[:, 0].fillna(result.iloc[:, 1]).to_numpy()
+    if name == "SuperTrend":
+        return ta.supertrend(df.High, df.Low, df.Close).iloc[:, 0].to_numpy()
+    return ta.kama(df.Close).to_numpy()
+
+
+def _kernel(name, df):
+    if name == "PSAR":
+        return psar(df.High.to_numpy(), df.Low.to_numpy())
+    if name == "SuperTrend":
+        return supertrend(df.High.to_numpy(), df.Low.to_numpy(), df.Close.to_numpy())
+    return kama(df.Close.to_numpy())
+
+
+KERNEL_NAMES = ("PSAR", "SuperTrend", "KAMA")
+
+
+def _random_walk(bars, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, bars)))
+    spread = np.abs(rng.normal(0, 0.01, bars)) * close
+    index = pd.date_range("2000-01-03", periods=bars, freq="D")
+    return pd.DataFrame({"High": close + spread, "Low": close - spread, "Close": close}, index=index)
+
+
+def check_parity(lengths=(250, 1000, 10000), rtol=1e-8, atol=1e-8):
+    """{(indicator, bars): max abs difference} for kernels that disagree with pandas-ta."""
+    mismatches = {}
+    for bars in lengths:
+        df = _random_walk(bars)
+        for name in KERNEL_NAMES:
+            expected, actual = _reference(name, df), _kernel(name, df)
+            if not np.allclose(actual, expected, rtol=rtol, atol=atol, equal_nan=True):
+                mismatches[(name, bars)] = float(np.nanmax(np.abs(actual - expected)))
+    return mismatches
+
+
+def benchmark(lengths=(250, 1000, 2500, 10000), runs=3):
+    """{(indicator, bars): (pandas-ta seconds, kernel seconds)}, best of ``runs``."""
+    timings = {}
+    for bars in lengths:
+        df = _random_walk(bars)
+        for name in KERNEL_NAMES:
+            best = []
+            for fn in (_reference, _kernel):
+                elapsed = float("inf")
+                for _ in range(runs):
+                    started = time.perf_counter()
+                    fn(name, df)
+                    elapsed = min(elapsed, time.perf_counter() - started)
+                best.append(elapsed)
+            timings[(name, bars)] = tuple(best)
+    return timings
+
+
+if __name__ == "__main__":
+    print("parity mismatches:", check_parity() or "none")
+    for (name, bars), (reference, kernel) in benchmark().items():
+        print(f"{name:>10} {bars:>6} bars: pandas-ta {reference * 1e3:8.2f}ms  numpy {kernel * 1e3:7.2f}ms"
+              f"  ({reference / kernel:5.1f}x)")
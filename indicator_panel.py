@@ -0,0 +1,405 @@
+"""
+Indicator Panel Module
+Vectorized indicators over a symbols x bars panel, one pass per indicator for the whole universe
+"""
+import sys
+import threading
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from ta_indicators import calculate_all_indicators, moving_average_spec
+
+_EPSILON = sys.float_info.epsilon
+
+# key -> (function, keys it needs computed first); functions fill a dict of
+# (symbols, bars) arrays the same way ta_indicators groups fill theirs
+_KERNELS = {}
+_ORDER = []
+
+
+def panel_indicator(*keys, requires=()):
+    def register(fn):
+        for key in keys:
+            _KERNELS[key] = (fn, tuple(requires))
+        _ORDER.append(fn)
+        return fn
+    return register
+
+
+# Rows are right-aligned and left-padded with NaN (the PricePanel layout), so
+# every helper below treats leading NaN as "no bar yet".
+
+def _first_valid(x):
+    """Per-row index of the first non-NaN value (``x.shape[1]`` when there is none)."""
+    valid = ~np.isnan(x)
+    return np.where(valid.any(axis=1), valid.argmax(axis=1), x.shape[1])
+
+
+def _shift(x, n=1):
+    out = np.full_like(x, np.nan)
+    out[:, n:] = x[:, :-n]
+    return out
+
+
+def _rolling(x, length, reduce, **kwargs):
+    """Trailing-window reduction; windows reaching into padding are NaN."""
+    out = np.full_like(x, np.nan)
+    if x.shape[1] >= length:
+        out[:, length - 1:] = reduce(sliding_window_view(x, length, axis=1), axis=-1, **kwargs)
+    return out
+
+
+def _ewm(x, alpha, seed_length=1, start=None):
+    """pandas ``ewm(alpha, adjust=False)`` per row, seeded like pandas-ta.
+
+    The first output sits ``seed_length - 1`` bars after ``start`` (default:
+    each row's first valid value) and is the mean of the bars up to it - the
+    SMA seed ``ta.ema`` and ``ta.atr`` (``presma``) use. ``seed_length=1`` is
+    ``ta.rma`` itself: ewm(adjust=False) from the first valid value, which is
+    what ``ta.rsi`` and ``ta.adx`` smooth with. The recurrence is exact from
+    the first bar, not just once converged.
+    """
+    rows, bars = x.shape
+    start = _first_valid(x) if start is None else start
+    seed_at = start + seed_length - 1
+    window = np.clip(start[:, None] + np.arange(seed_length), 0, bars - 1)
+    with warnings.catch_warnings():
+        # Rows too short for a seed come out all-NaN, as per symbol
+        warnings.simplefilter("ignore", RuntimeWarning)
+        seed = np.nanmean(np.take_along_axis(x, window, axis=1), axis=1)
+
+    out = np.full_like(x, np.nan)
+    prev = np.full(rows, np.nan)
+    decay = 1.0 - alpha
+    for t in range(bars):
+        value = alpha * x[:, t] + decay * prev
+        value = np.where(seed_at == t, seed, value)
+        value = np.where(seed_at > t, np.nan, value)
+        out[:, t] = value
+        prev = value
+    return out
+
+
+def _non_zero(x):
+    return np.where(x == 0, _EPSILON, x)
+
+
+# Kernels - each mirrors the per-symbol implementation in ta_indicators
+
+def _sma_kernel(length):
+    @panel_indicator(f"SMA_{length}")
+    def compute(p, out):
+        out[f"SMA_{length}"] = _rolling(p.close, length, np.mean)
+    return compute
+
+
+def _ema_kernel(length):
+    @panel_indicator(f"EMA_{length}")
+    def compute(p, out):
+        out[f"EMA_{length}"] = _ewm(p.close, 2.0 / (length + 1), seed_length=length)
+    return compute
+
+
+for _length in (20, 50, 200):
+    _sma_kernel(_length)
+for _length in (9, 12, 26, 50, 200):
+    _ema_kernel(_length)
+
+
+@panel_indicator("tr")
+def _true_range(p, out):
+    # ta.true_range (prenan=False): bar 0 has no previous close and is high - low;
+    # only ADX blanks it, as ta.adx passes prenan=True to its ATR
+    prev_close = _shift(p.close)
+    out['tr'] = np.fmax(
+        _non_zero(p.high - p.low),
+        np.fmax(np.abs(p.high - prev_close), np.abs(prev_close - p.low)),
+    )
+
+
+@panel_indicator("close_std_20")
+def _close_std(p, out):
+    out['close_std_20'] = _rolling(p.close, 20, np.std, ddof=1)
+
+
+@panel_indicator("MACD", "MACD_Signal", "MACD_Hist", requires=("EMA_12", "EMA_26"))
+def _macd(p, out):
+    macd = out['EMA_12'] - out['EMA_26']
+    signal = _ewm(macd, 2.0 / 10, seed_length=9)
+    out['MACD'] = macd
+    out['MACD_Signal'] = signal
+    out['MACD_Hist'] = macd - signal
+
+
+@panel_indicator("ADX", requires=("tr",))
+def _adx(p, out, length=14):
+    tr = out['tr'].copy()
+    tr[np.arange(len(tr)), np.minimum(p.offsets, tr.shape[1] - 1)] = np.nan
+    k = 100 / _ewm(tr, 1.0 / length, seed_length=length, start=p.offsets)
+    up = p.high - _shift(p.high)
+    dn = _shift(p.low) - p.low
+    with np.errstate(invalid="ignore"):
+        pos = ((up > dn) & (up > 0)) * up
+        neg = ((dn > up) & (dn > 0)) * dn
+    pos = np.where(np.abs(pos) < _EPSILON, 0.0, pos)
+    neg = np.where(np.abs(neg) < _EPSILON, 0.0, neg)
+    dmp = k * _ewm(pos, 1.0 / length)
+    dmn = k * _ewm(neg, 1.0 / length)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        dx = 100 * np.abs(dmp - dmn) / (dmp + dmn)
+    out['ADX'] = _ewm(dx, 1.0 / length)
+
+
+@panel_indicator("SuperTrend", requires=("tr",))
+def _supertrend(p, out, length=7, multiplier=3.0):
+    hl2 = 0.5 * (p.high + p.low)
+    matr = multiplier * _ewm(out['tr'], 1.0 / length, seed_length=length)
+    lb = hl2 - matr
+    ub = hl2 + matr
+    close = p.close
+    trend = np.full_like(close, np.nan)
+    bull = np.ones(len(close), dtype=bool)
+    with np.errstate(invalid="ignore"):
+        for t in range(1, close.shape[1]):
+            up = close[:, t] > ub[:, t - 1]
+            down = close[:, t] < lb[:, t - 1]
+            hold = ~(up | down)
+            bull = np.where(up, True, np.where(down, False, bull))
+            lb[:, t] = np.where(hold & bull & (lb[:, t] < lb[:, t - 1]), lb[:, t - 1], lb[:, t])
+            ub[:, t] = np.where(hold & ~bull & (ub[:, t] > ub[:, t - 1]), ub[:, t - 1], ub[:, t])
+            trend[:, t] = np.where(bull, lb[:, t], ub[:, t])
+    # Each symbol's first bar has no previous bands to compare against
+    rows = np.flatnonzero(p.offsets < close.shape[1])
+    trend[rows, p.offsets[rows]] = np.nan
+    out['SuperTrend'] = trend
+
+
+@panel_indicator("RSI")
+def _rsi(p, out, length=14):
+    diff = p.close - _shift(p.close)
+    positive = np.where(diff < 0, 0.0, diff)
+    negative = np.where(diff > 0, 0.0, diff)
+    positive_avg = _ewm(positive, 1.0 / length)
+    negative_avg = _ewm(negative, 1.0 / length)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rsi = 100 * positive_avg / (positive_avg + np.abs(negative_avg))
+    # bfill: the first bar of each symbol takes the first computed value
+    rows = np.flatnonzero(p.offsets + 1 < rsi.shape[1])
+    rsi[rows, p.offsets[rows]] = rsi[rows, p.offsets[rows] + 1]
+    out['RSI'] = rsi
+
+
+@panel_indicator("Stoch_K", "Stoch_D")
+def _stoch(p, out, k=14, d=3, smooth_k=3):
+    lowest = _rolling(p.low, k, np.min)
+    highest = _rolling(p.high, k, np.max)
+    stoch = 100 * (p.close - lowest) / _non_zero(highest - lowest)
+    out['Stoch_K'] = _rolling(stoch, smooth_k, np.mean)
+    out['Stoch_D'] = _rolling(out['Stoch_K'], d, np.mean)
+
+
+@panel_indicator("Williams_R")
+def _willr(p, out, length=14):
+    lowest = _rolling(p.low, length, np.min)
+    highest = _rolling(p.high, length, np.max)
+    out['Williams_R'] = 100 * ((p.close - lowest) / (highest - lowest) - 1)
+
+
+@panel_indicator("ROC")
+def _roc(p, out, length=10):
+    previous = _shift(p.close, length)
+    out['ROC'] = 100 * (p.close - previous) / previous
+
+
+@panel_indicator("BB_Upper", "BB_Middle", "BB_Lower", requires=("SMA_20", "close_std_20"))
+def _bbands(p, out, width=2.0):
+    mid, std = out['SMA_20'], out['close_std_20']
+    out['BB_Upper'] = mid + width * std
+    out['BB_Middle'] = mid
+    out['BB_Lower'] = mid - width * std
+
+
+@panel_indicator("ATR", requires=("tr",))
+def _atr(p, out, length=14):
+    out['ATR'] = _ewm(out['tr'], 1.0 / length, seed_length=length)
+
+
+@panel_indicator("STD", requires=("close_std_20",))
+def _std(p, out):
+    out['STD'] = out['close_std_20']
+
+
+@panel_indicator("Volume_MA")
+def _volume_ma(p, out):
+    out['Volume_MA'] = _rolling(p.volume, 20, np.mean)
+
+
+@panel_indicator("Volume_Ratio", requires=("Volume_MA",))
+def _volume_ratio(p, out):
+    volume_ma = out['Volume_MA']
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ratio = p.volume / volume_ma
+    out['Volume_Ratio'] = np.where((volume_ma[:, -1] > 0)[:, None], ratio, 0.0)
+
+
+@panel_indicator("Donchian_High", "Donchian_Low")
+def _donchian(p, out):
+    out['Donchian_High'] = _rolling(p.high, 20, np.max)
+    out['Donchian_Low'] = _rolling(p.low, 20, np.min)
+
+
+@panel_indicator("Donchian_Mid", requires=("Donchian_High", "Donchian_Low"))
+def _donchian_mid(p, out):
+    out['Donchian_Mid'] = (out['Donchian_High'] + out['Donchian_Low']) / 2
+
+
+_INTERMEDIATES = {"tr", "close_std_20"}
+# The standard set; moving averages of other lengths are added by supported_keys()
+PANEL_KEYS = frozenset(key for key in _KERNELS if key not in _INTERMEDIATES)
+
+
+_REGISTER_LOCK = threading.Lock()
+
+
+def supported_keys(keys):
+    """The subset of ``keys`` the panel computes, registering EMA/SMA kernels of new lengths."""
+    supported = set()
+    for key in keys:
+        if key not in _KERNELS:
+            spec = moving_average_spec(key)
+            if spec is None:
+                continue
+            with _REGISTER_LOCK:
+                if key not in _KERNELS:
+                    kind, length = spec
+                    (_sma_kernel if kind == "SMA" else _ema_kernel)(length)
+        if key not in _INTERMEDIATES:
+            supported.add(key)
+    return supported
+
+
+class IndicatorPanel:
+    """OHLCV arrays of shape (symbols, bars), right-aligned like PricePanel."""
+
+    def __init__(self, symbols, high, low, close, volume, offsets, indexes=None):
+        self.symbols = list(symbols)
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.indexes = indexes or {}
+
+    @classmethod
+    def from_frames(cls, frames):
+        """Stack ``{symbol: OHLCV frame}`` into a panel (empty frames are skipped)."""
+        symbols = [sym for sym, df in frames.items() if df is not None and not df.empty]
+        bars = max((len(frames[sym]) for sym in symbols), default=0)
+        arrays = {field: np.full((len(symbols), bars), np.nan) for field in ("High", "Low", "Close", "Volume")}
+        offsets = []
+        for row, sym in enumerate(symbols):
+            df = frames[sym]
+            offset = bars - len(df)
+            for field, values in arrays.items():
+                values[row, offset:] = df[field].to_numpy(dtype=np.float64)
+            offsets.append(offset)
+        indexes = {sym: frames[sym].index for sym in symbols}
+        return cls(symbols, arrays["High"], arrays["Low"], arrays["Close"], arrays["Volume"], offsets, indexes)
+
+    @classmethod
+    def from_price_panel(cls, panel):
+        """Wrap a published PricePanel without copying its OHLCV arrays."""
+        return cls(
+            panel.symbols, panel.field("High"), panel.field("Low"), panel.field("Close"),
+            panel.field("Volume"), panel.offsets,
+        )
+
+    def compute(self, keys):
+        """{key: (symbols, bars) array} for the supported ``keys`` and nothing else."""
+        out = {}
+        needed = set()
+        pending = [key for key in keys if key in _KERNELS]
+        while pending:
+            key = pending.pop()
+            if key not in needed:
+                needed.add(key)
+                pending.extend(_KERNELS[key][1])
+        # Snapshots: other scans may register moving-average kernels meanwhile
+        kernels = list(_KERNELS.items())
+        for fn in list(_ORDER):
+            produced = [key for key, (kernel, _) in kernels if kernel is fn]
+            if any(key in needed for key in produced):
+                fn(self, out)
+        return {key: out[key] for key in keys if key in out and key not in _INTERMEDIATES}
+
+
+def panel_indicators(frames, keys):
+    """{symbol: {key: Series}} for the panel-supported ``keys``, computed for all symbols at once.
+
+    Drop-in for the matching part of ``calculate_all_indicators(df, only=keys)``;
+    unsupported keys are left for the per-symbol path.
+    """
+    keys = supported_keys(keys)
+    if not keys:
+        return {}
+    panel = IndicatorPanel.from_frames(frames)
+    computed = panel.compute(keys)
+    result = {}
+    for row, sym in enumerate(panel.symbols):
+        offset = panel.offsets[row]
+        index = panel.indexes[sym]
+        result[sym] = {key: pd.Series(values[row, offset:], index=index) for key, values in computed.items()}
+    return result
+
+
+def check_parity(frames, keys=PANEL_KEYS, rtol=1e-8, atol=1e-8):
+    """{symbol: [keys that differ from calculate_all_indicators()]} - empty when everything matches."""
+    panel = panel_indicators(frames, keys)
+    mismatches = {}
+    for sym, df in frames.items():
+        expected = calculate_all_indicators(df, only=keys)
+        bad = []
+        for key, series in panel.get(sym, {}).items():
+            reference = expected.get(key)
+            if reference is None:
+                continue
+            reference = np.broadcast_to(np.asarray(reference, dtype=float), series.shape)
+            if not np.allclose(series.to_numpy(), reference, rtol=rtol, atol=atol, equal_nan=True):
+                bad.append(key)
+        if bad:
+            mismatches[sym] = bad
+    return mismatches
+
+
+def benchmark_panel(frames, keys=PANEL_KEYS, runs=3):
+    """Seconds per pass: per-symbol calculate_all_indicators vs one panel pass."""
+    timings = {}
+    for label, fn in (
+        ("per_symbol", lambda: [calculate_all_indicators(df, only=keys) for df in frames.values()]),
+        ("panel", lambda: panel_indicators(frames, keys)),
+    ):
+        best = float("inf")
+        for _ in range(runs):
+            started = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - started)
+        timings[label] = best
+    return timings
+
+
+if __name__ == "__main__":
+    from market_data import StubSource
+    from scanner import CUSTOM_ALL_SYMBOLS
+
+    source = StubSource(latency=0)
+    frames = source.fetch(CUSTOM_ALL_SYMBOLS, period="2y")
+    print("parity mismatches:", check_parity(frames) or "none")
+    for size in (len(frames), 1000):
+        universe = {f"SYM{i}": frames[sym] for i, sym in enumerate(list(frames) * (size // len(frames) + 1))}
+        universe = dict(list(universe.items())[:size])
+        for label, seconds in benchmark_panel(universe, runs=1).items():
+            print(f"{size:>5} symbols {label:>10}: {seconds:.3f}s")
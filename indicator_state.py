@@ -0,0 +1,537 @@
+"""
+Indicator State Module
+Streaming indicator state advanced one bar at a time instead of recomputing history
+"""
+import functools
+import math
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import closing
+
+import pandas as pd
+
+from ohlcv_store import DEFAULT_STORE_PATH
+from ta_indicators import calculate_all_indicators, moving_average_spec
+
+_NAN = float("nan")
+
+
+class _Seeded:
+    """Exponential smoothing seeded with the mean of its first ``seed_length`` inputs.
+
+    Same recurrence as pandas ``ewm(alpha, adjust=False)`` over pandas-ta's
+    SMA seed, so streamed values equal the batch ones.
+    """
+
+    def __init__(self, alpha, seed_length=1):
+        self.alpha = alpha
+        self.seed_length = seed_length
+        self.count = 0
+        self.total = 0.0
+        self.value = _NAN
+
+    def update(self, x):
+        if self.count < self.seed_length:
+            self.count += 1
+            self.total += x
+            if self.count == self.seed_length:
+                self.value = self.total / self.seed_length
+        else:
+            self.value = self.alpha * x + (1.0 - self.alpha) * self.value
+        return self.value
+
+
+def _ema(length):
+    return _Seeded(2.0 / (length + 1), seed_length=length)
+
+
+class _Window:
+    """Last ``length`` values; every statistic is O(length), i.e. constant per bar."""
+
+    def __init__(self, length):
+        self.length = length
+        self.values = deque(maxlen=length)
+
+    def update(self, x):
+        self.values.append(x)
+
+    @property
+    def full(self):
+        return len(self.values) == self.length
+
+    def mean(self):
+        return math.fsum(self.values) / self.length if self.full else _NAN
+
+    def std(self):
+        if not self.full:
+            return _NAN
+        mean = self.mean()
+        return math.sqrt(math.fsum((v - mean) ** 2 for v in self.values) / (self.length - 1))
+
+    def max(self):
+        return max(self.values) if self.full else _NAN
+
+    def min(self):
+        return min(self.values) if self.full else _NAN
+
+
+# key -> factory for the state that produces it; one state may serve several keys
+# (classes are registered directly so pickled states stay importable)
+_STATES = {}
+
+
+def streaming(*keys):
+    def register(cls):
+        for key in keys:
+            _STATES[key] = cls
+        return cls
+    return register
+
+
+class _StreamState:
+    keys = ()
+
+    def update(self, bar, out):
+        raise NotImplementedError
+
+
+class MovingAverageState(_StreamState):
+    def __init__(self, kind, length):
+        self.key = f"{kind}_{length}"
+        self.keys = (self.key,)
+        self.ema = _ema(length) if kind == "EMA" else None
+        self.window = _Window(length) if kind == "SMA" else None
+
+    def update(self, bar, out):
+        if self.ema is not None:
+            out[self.key] = self.ema.update(bar["Close"])
+        else:
+            self.window.update(bar["Close"])
+            out[self.key] = self.window.mean()
+
+
+for _length in (20, 50, 200):
+    _STATES[f"SMA_{_length}"] = functools.partial(MovingAverageState, "SMA", _length)
+for _length in (9, 12, 26, 50, 200):
+    _STATES[f"EMA_{_length}"] = functools.partial(MovingAverageState, "EMA", _length)
+
+
+@streaming("MACD", "MACD_Signal", "MACD_Hist")
+class MacdState(_StreamState):
+    keys = ("MACD", "MACD_Signal", "MACD_Hist")
+
+    def __init__(self):
+        self.fast, self.slow, self.signal = _ema(12), _ema(26), _ema(9)
+
+    def update(self, bar, out):
+        macd = self.fast.update(bar["Close"]) - self.slow.update(bar["Close"])
+        signal = self.signal.update(macd) if not math.isnan(macd) else _NAN
+        out["MACD"], out["MACD_Signal"], out["MACD_Hist"] = macd, signal, macd - signal
+
+
+@streaming("RSI")
+class RsiState(_StreamState):
+    keys = ("RSI",)
+
+    def __init__(self, length=14):
+        self.prev_close = None
+        # ta.rma is ewm(adjust=False) seeded with the first change - no SMA seed -
+        # so this equals ta.rsi from its first value, not only once converged
+        self.gain = _Seeded(1.0 / length)
+        self.loss = _Seeded(1.0 / length)
+
+    def update(self, bar, out):
+        close = bar["Close"]
+        if self.prev_close is None:
+            value = _NAN
+        else:
+            change = close - self.prev_close
+            gain = self.gain.update(max(change, 0.0))
+            loss = abs(self.loss.update(min(change, 0.0)))
+            value = 100 * gain / (gain + loss) if gain + loss else _NAN
+        self.prev_close = close
+        out["RSI"] = value
+
+
+@streaming("ATR")
+class AtrState(_StreamState):
+    keys = ("ATR",)
+
+    def __init__(self, length=14):
+        self.prev_close = None
+        self.atr = _Seeded(1.0 / length, seed_length=length)
+
+    def update(self, bar, out):
+        high, low = bar["High"], bar["Low"]
+        true_range = high - low
+        if self.prev_close is not None:
+            true_range = max(true_range, abs(high - self.prev_close), abs(self.prev_close - low))
+        self.prev_close = bar["Close"]
+        out["ATR"] = self.atr.update(true_range)
+
+
+@streaming("OBV")
+class ObvState(_StreamState):
+    """Signed-volume running total; like pandas-ta the first bar has no direction and stays NaN."""
+
+    keys = ("OBV",)
+
+    def __init__(self):
+        self.prev_close = None
+        self.total = 0.0
+
+    def update(self, bar, out):
+        close = bar["Close"]
+        if self.prev_close is None:
+            out["OBV"] = _NAN
+        else:
+            direction = (close > self.prev_close) - (close < self.prev_close)  # sign of the change
+            self.total += direction * bar["Volume"]
+            out["OBV"] = self.total
+        self.prev_close = close
+
+
+@streaming("VWAP")
+class VwapState(_StreamState):
+    """Session VWAP: typical price weighted by volume, reset at each new calendar day."""
+
+    keys = ("VWAP",)
+
+    def __init__(self):
+        self.session = None
+        self.price_volume = 0.0
+        self.volume = 0.0
+
+    def update(self, bar, out):
+        session = pd.Timestamp(bar["ts"]).date()
+        if session != self.session:
+            self.session, self.price_volume, self.volume = session, 0.0, 0.0
+        typical = (bar["High"] + bar["Low"] + bar["Close"]) / 3
+        self.price_volume += typical * bar["Volume"]
+        self.volume += bar["Volume"]
+        out["VWAP"] = self.price_volume / self.volume if self.volume else _NAN
+
+
+@streaming("BB_Upper", "BB_Middle", "BB_Lower", "STD")
+class BollingerState(_StreamState):
+    keys = ("BB_Upper", "BB_Middle", "BB_Lower", "STD")
+
+    def __init__(self, length=20, width=2.0):
+        self.window = _Window(length)
+        self.width = width
+
+    def update(self, bar, out):
+        self.window.update(bar["Close"])
+        mid, std = self.window.mean(), self.window.std()
+        out["BB_Upper"], out["BB_Middle"], out["BB_Lower"] = mid + self.width * std, mid, mid - self.width * std
+        out["STD"] = std
+
+
+@streaming("Volume_MA", "Volume_Ratio")
+class VolumeState(_StreamState):
+    keys = ("Volume_MA", "Volume_Ratio")
+
+    def __init__(self, length=20):
+        self.window = _Window(length)
+
+    def update(self, bar, out):
+        self.window.update(bar["Volume"])
+        volume_ma = self.window.mean()
+        out["Volume_MA"] = volume_ma
+        out["Volume_Ratio"] = bar["Volume"] / volume_ma if volume_ma > 0 else 0
+
+
+@streaming("Donchian_High", "Donchian_Low", "Donchian_Mid")
+class DonchianState(_StreamState):
+    keys = ("Donchian_High", "Donchian_Low", "Donchian_Mid")
+
+    def __init__(self, length=20):
+        self.highs = _Window(length)
+        self.lows = _Window(length)
+
+    def update(self, bar, out):
+        self.highs.update(bar["High"])
+        self.lows.update(bar["Low"])
+        high, low = self.highs.max(), self.lows.min()
+        out["Donchian_High"], out["Donchian_Low"], out["Donchian_Mid"] = high, low, (high + low) / 2
+
+
+@streaming("ROC")
+class RocState(_StreamState):
+    keys = ("ROC",)
+
+    def __init__(self, length=10):
+        self.closes = deque(maxlen=length + 1)
+
+    def update(self, bar, out):
+        self.closes.append(bar["Close"])
+        if len(self.closes) == self.closes.maxlen:
+            out["ROC"] = 100 * (self.closes[-1] - self.closes[0]) / self.closes[0]
+        else:
+            out["ROC"] = _NAN
+
+
+# The standard set; moving averages of other lengths are added by streaming_keys()
+STREAMING_KEYS = frozenset(_STATES)
+
+
+_REGISTER_LOCK = threading.Lock()
+
+
+def streaming_keys(keys):
+    """The subset of ``keys`` with a streaming state, registering EMA/SMA states of new lengths."""
+    for key in keys:
+        if key in _STATES or moving_average_spec(key) is None:
+            continue
+        with _REGISTER_LOCK:
+            if key not in _STATES:
+                _STATES[key] = functools.partial(MovingAverageState, *moving_average_spec(key))
+    return {key for key in keys if key in _STATES}
+
+
+class SymbolState:
+    """Latest indicator values for one symbol, advanced bar by bar.
+
+    ``values`` holds the newest value of every key and ``previous`` the one
+    before it, which is all the rule checks read. Feeding a bar with the same
+    timestamp as the last one replaces it (the still-forming daily bar during
+    an intraday refresh) by rolling back to the state before it.
+    """
+
+    def __init__(self, keys):
+        self.keys = tuple(sorted(streaming_keys(keys)))
+        self.states = []
+        for factory in dict.fromkeys(_STATES[key] for key in self.keys):
+            self.states.append(factory())
+        self.last_ts = None
+        self.bars = 0
+        self.values = {}
+        self.previous = {}
+        self._checkpoint = None
+
+    @classmethod
+    def from_frame(cls, df, keys):
+        state = cls(keys)
+        state.advance(df)
+        return state
+
+    def _apply(self, bar):
+        out = {}
+        for state in self.states:
+            state.update(bar, out)
+        self.previous, self.values = self.values, {key: out[key] for key in self.keys}
+
+    def update(self, ts, open_, high, low, close, volume, checkpoint=True):
+        """Feed one bar; returns the updated ``values``.
+
+        ``checkpoint=False`` skips saving the rollback point, for bulk feeds
+        where the bar is known not to be the last one.
+        """
+        ts = pd.Timestamp(ts)
+        if self.last_ts is not None and ts < self.last_ts:
+            return self.values
+        if self.last_ts is not None and ts == self.last_ts:
+            if self._checkpoint is None:
+                return self.values
+            self.states, self.values, self.previous, self.bars = pickle.loads(self._checkpoint)
+        elif checkpoint:
+            # Pickled rather than deep-copied: a C round trip is several times cheaper
+            self._checkpoint = pickle.dumps((self.states, self.values, self.previous, self.bars),
+                                            protocol=pickle.HIGHEST_PROTOCOL)
+        else:
+            self._checkpoint = None
+        bar = {"ts": ts, "Open": float(open_), "High": float(high), "Low": float(low),
+               "Close": float(close), "Volume": float(volume)}
+        self._apply(bar)
+        self.last_ts = ts
+        self.bars += 1
+        return self.values
+
+    def advance(self, df):
+        """Feed every bar of ``df`` at or after the last one seen; returns the number fed."""
+        if df is None or df.empty:
+            return 0
+        if self.last_ts is not None:
+            df = df.iloc[df.index.searchsorted(self.last_ts):]
+        columns = [df[name].to_numpy(dtype=float).tolist() for name in ("Open", "High", "Low", "Close", "Volume")]
+        last = len(df) - 1
+        for i, ts in enumerate(df.index):
+            self.update(ts, *(column[i] for column in columns), checkpoint=i == last)
+        return len(df)
+
+    def follows(self, df):
+        """Whether ``df`` still holds the last bar fed, so ``advance(df)`` continues this state."""
+        if self.last_ts is None or df is None or df.empty:
+            return False
+        pos = df.index.searchsorted(self.last_ts)
+        return pos < len(df) and df.index[pos] == self.last_ts
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS indicator_state (
+    symbol TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    keys TEXT NOT NULL,
+    last_ts INTEGER,
+    updated_at REAL NOT NULL,
+    state BLOB NOT NULL,
+    PRIMARY KEY (symbol, interval, keys)
+) WITHOUT ROWID;
+"""
+
+
+class IndicatorStateStore:
+    """Per-symbol SymbolState persisted next to the bars in the OHLCV SQLite file.
+
+    States are pickled; only load databases this app wrote.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def _keys(keys):
+        return ",".join(sorted(streaming_keys(keys)))
+
+    def get(self, symbol, interval, keys):
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT state FROM indicator_state WHERE symbol = ? AND interval = ? AND keys = ?",
+                (symbol, interval, self._keys(keys)),
+            ).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def put(self, symbol, interval, state):
+        last_ts = state.last_ts.value if state.last_ts is not None else None
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO indicator_state VALUES (?, ?, ?, ?, ?, ?)",
+                (symbol, interval, ",".join(state.keys), last_ts, time.time(),
+                 pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)),
+            )
+
+    def advance(self, ohlcv_store, symbols, keys, interval="1d"):
+        """{symbol: SymbolState} brought up to the newest stored bar.
+
+        Symbols with saved state only read the bars since their last one;
+        the rest are warmed up from their full stored history once.
+        """
+        states = {}
+        for sym in symbols:
+            state = self.get(sym, interval, keys)
+            start = state.last_ts if state is not None else None
+            bars = ohlcv_store.read(sym, interval, start=start)
+            if state is None:
+                if bars is None or bars.empty:
+                    continue
+                state = SymbolState(keys)
+            if state.advance(bars):
+                self.put(sym, interval, state)
+            states[sym] = state
+        return states
+
+
+class IndicatorStates:
+    """Shared SymbolState per (symbol, interval), advanced from the bars scans load.
+
+    Every scan passes the frames it just loaded; each state only takes the
+    bars at or after its last one, so unchanged bars cost one rollback and
+    a new bar one update instead of a recompute. A state is rebuilt from
+    the frame when it lacks a requested key or the frame no longer holds the
+    bar it stopped at. An ``IndicatorStateStore`` keeps the warm states
+    across restarts.
+    """
+
+    def __init__(self, store=None):
+        self.store = store
+        self._states = {}
+        self._lock = threading.Lock()
+        self.rebuilds = 0
+
+    def latest(self, frames, keys, interval="1d"):
+        """({symbol: {key: (current, previous)}}, streamed keys) for the streaming subset of ``keys``."""
+        keys = streaming_keys(keys)
+        if not keys:
+            return {}, keys
+        latest = {}
+        with self._lock:
+            for sym, df in frames.items():
+                state = self._advance(sym, interval, df, keys)
+                latest[sym] = {key: (state.values[key], state.previous.get(key, state.values[key])) for key in keys}
+        return latest, keys
+
+    def _advance(self, symbol, interval, df, keys):
+        state = self._states.get((symbol, interval))
+        wanted = keys | set(state.keys if state is not None else STREAMING_KEYS)
+        if state is None and self.store is not None:
+            state = self.store.get(symbol, interval, wanted)
+        if state is not None and wanted <= set(state.keys) and state.follows(df):
+            last_ts = state.last_ts
+            state.advance(df)
+            saved = state.last_ts == last_ts
+        else:
+            state = SymbolState.from_frame(df, wanted)
+            self.rebuilds += 1
+            saved = False
+        if self.store is not None and not saved:
+            # Revisions of the forming bar are not worth a write; a new bar is
+            self.store.put(symbol, interval, state)
+        self._states[(symbol, interval)] = state
+        return state
+
+
+def check_parity(frames, keys=STREAMING_KEYS, rtol=1e-9, atol=1e-9):
+    """{symbol: [keys whose streamed value differs from calculate_all_indicators()]}."""
+    mismatches = {}
+    for sym, df in frames.items():
+        streamed = SymbolState.from_frame(df, keys).values
+        expected = calculate_all_indicators(df, only=keys)
+        bad = []
+        for key in streamed:
+            reference = expected.get(key)
+            if reference is None:
+                continue
+            reference = float(reference.iloc[-1]) if hasattr(reference, "iloc") else float(reference)
+            if not math.isclose(streamed[key], reference, rel_tol=rtol, abs_tol=atol) and not (
+                math.isnan(streamed[key]) and math.isnan(reference)
+            ):
+                bad.append(key)
+        if bad:
+            mismatches[sym] = bad
+    return mismatches
+
+
+if __name__ == "__main__":
+    from market_data import StubSource
+    from scanner import CUSTOM_ALL_SYMBOLS
+    frames = StubSource(latency=0).fetch(CUSTOM_ALL_SYMBOLS, period="2y")
+    print("parity mismatches:", check_parity(frames) or "none")
+
+    df = next(iter(frames.values()))
+    bars = list(zip(df.index, *(df[name].to_numpy(dtype=float).tolist()
+                                for name in ("Open", "High", "Low", "Close", "Volume"))))
+    state = SymbolState.from_frame(df.iloc[:-100], STREAMING_KEYS)
+    started = time.perf_counter()
+    for bar in bars[-100:]:
+        state.update(*bar)
+    new_bar = (time.perf_counter() - started) / 100
+    started = time.perf_counter()
+    for _ in range(100):
+        state.update(*bars[-1])
+    same_bar = (time.perf_counter() - started) / 100
+    started = time.perf_counter()
+    calculate_all_indicators(df, only=STREAMING_KEYS)
+    full = time.perf_counter() - started
+    print(f"new bar: {new_bar * 1e6:.0f}us, revised bar: {same_bar * 1e6:.0f}us, full recompute: {full * 1e3:.1f}ms")
@@ -0,0 +1,474 @@
+"""
+Market Data Module
+Batched OHLCV downloads shared by the scanners
+"""
+import itertools
+import logging
+import os
+import random
+import threading
+import time
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+try:
+    from yfinance.exceptions import YFRateLimitError
+except ImportError:  # yfinance < 0.2.54 reports throttling only in its error log
+    class YFRateLimitError(Exception):
+        pass
+
+from rate_limit import ThrottledError, get_limiter, is_throttle_message
+
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+# Yahoo happily serves a few dozen tickers per request; larger chunks start
+# timing out on the chart endpoint, so universes are fetched in slices.
+DEFAULT_BATCH_SIZE = 25
+
+# Fetch engine limits - overridable per deployment
+DEFAULT_MAX_WORKERS = int(os.getenv("SCAN_MAX_WORKERS", "4"))
+DEFAULT_SYMBOL_TIMEOUT = float(os.getenv("SCAN_SYMBOL_TIMEOUT", "20"))
+DEFAULT_SCAN_DEADLINE = float(os.getenv("SCAN_DEADLINE", "90"))
+
+
+def chunk_symbols(symbols, size=DEFAULT_BATCH_SIZE):
+    """Yield consecutive slices of at most ``size`` symbols."""
+    size = max(1, int(size))
+    for start in range(0, len(symbols), size):
+        yield list(symbols[start:start + size])
+
+
+def normalize_ohlcv(df):
+    """Flatten yfinance columns and drop bars without a full OHLCV print."""
+    if df is None or df.empty:
+        return pd.DataFrame(columns=OHLCV_COLUMNS)
+    if isinstance(df.columns, pd.MultiIndex):
+        df = df.copy()
+        df.columns = df.columns.droplevel(1)
+    present = [col for col in OHLCV_COLUMNS if col in df.columns]
+    if len(present) < len(OHLCV_COLUMNS):
+        return pd.DataFrame(columns=OHLCV_COLUMNS)
+    # Multi-ticker frames are aligned on the union of all trading days, so a
+    # stock carries empty weekend rows next to crypto - drop them here.
+    return df.dropna(subset=["Close", "High", "Low", "Volume"])
+
+
+def split_batch_frame(raw, symbols):
+    """Split a multi-ticker yfinance frame into per-symbol OHLCV frames."""
+    frames = {}
+    if raw is None or raw.empty:
+        return frames
+    if not isinstance(raw.columns, pd.MultiIndex):
+        # A single ticker comes back with flat columns
+        if len(symbols) == 1:
+            df = normalize_ohlcv(raw)
+            if not df.empty:
+                frames[symbols[0]] = df
+        return frames
+
+    # group_by="ticker" puts the symbol on level 0, the default layout puts it on level 1
+    level = 0 if set(symbols) & set(raw.columns.get_level_values(0)) else 1
+    available = set(raw.columns.get_level_values(level))
+    for sym in symbols:
+        if sym not in available:
+            continue
+        df = normalize_ohlcv(raw.xs(sym, axis=1, level=level))
+        if not df.empty:
+            frames[sym] = df
+    return frames
+
+
+def period_to_timedelta(period):
+    """Convert a yfinance period string ("6mo", "2y", "5d") to a Timedelta; None for "max"."""
+    period = (period or "max").strip().lower()
+    if period == "max":
+        return None
+    if period == "ytd":
+        now = pd.Timestamp.now()
+        return now - pd.Timestamp(now.year, 1, 1)
+    units = {"y": 365, "mo": 30, "wk": 7, "d": 1}
+    for suffix, days in units.items():
+        if period.endswith(suffix):
+            return pd.Timedelta(days=float(period[:-len(suffix)]) * days)
+    raise ValueError(f"Unsupported period: {period}")
+
+
+def slice_window(df, period=None, start=None, anchor=None):
+    """Cut ``df`` to bars from ``start``, or to ``period`` before ``anchor`` (default: its last bar)."""
+    if df is None or df.empty:
+        return df
+    if start is not None:
+        return df[df.index >= pd.Timestamp(start)]
+    window = period_to_timedelta(period)
+    if window is None:
+        return df
+    anchor = pd.Timestamp(anchor) if anchor is not None else df.index[-1]
+    return df[df.index >= anchor - window]
+
+
+class MarketDataSource:
+    """Where OHLCV bars come from.
+
+    ``fetch(symbols, period, interval, start, timeout)`` returns
+    ``{symbol: OHLCV frame}`` for one chunk of symbols and may raise; symbols
+    it has nothing for are left out. Sources are callables so they plug
+    straight into ``fetch_universe(fetcher=...)``.
+    """
+
+    name = "base"
+    # Upstream whose process-wide rate limiter guards this source; None for offline sources
+    upstream = None
+
+    def fetch(self, symbols, period="2y", interval="1d", start=None, timeout=None, **kwargs):
+        raise NotImplementedError
+
+    def __call__(self, symbols, period="2y", interval="1d", start=None, timeout=None, **kwargs):
+        return self.fetch(symbols, period=period, interval=interval, start=start, timeout=timeout, **kwargs)
+
+
+class _CallErrors(logging.Handler):
+    """yfinance error log lines emitted on the calling thread while installed.
+
+    ``yf.download`` swallows per-ticker errors and only logs them (one
+    ``"['SYM', ...]: <error>"`` line per distinct error) from the thread that
+    called it, after its workers finish. Filtering on that thread keeps
+    concurrent chunks from seeing each other's errors.
+    """
+
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.thread = threading.get_ident()
+        self.messages = []
+
+    def emit(self, record):
+        if record.thread == self.thread:
+            self.messages.append(record.getMessage())
+
+    def __enter__(self):
+        logging.getLogger("yfinance").addHandler(self)
+        return self
+
+    def __exit__(self, *exc):
+        logging.getLogger("yfinance").removeHandler(self)
+
+
+def throttled_symbols(missing, messages):
+    """Symbols of ``missing`` that an error message reports as throttled.
+
+    A throttle message naming none of them (older yfinance summaries) counts
+    for all of them.
+    """
+    throttles = [message for message in messages if is_throttle_message(message)]
+    named = [sym for sym in missing if any(repr(sym) in message for message in throttles)]
+    return named or (list(missing) if throttles else [])
+
+
+class YFinanceSource(MarketDataSource):
+    """Live Yahoo Finance data, one multi-ticker request per chunk."""
+
+    name = "yfinance"
+    upstream = "yfinance"
+
+    def fetch(self, symbols, period="2y", interval="1d", start=None, timeout=DEFAULT_SYMBOL_TIMEOUT, **kwargs):
+        try:
+            with _CallErrors() as errors:
+                raw = yf.download(
+                    symbols,
+                    period=None if start is not None else period,
+                    start=start,
+                    interval=interval,
+                    group_by="ticker",
+                    progress=False,
+                    threads=True,
+                    timeout=timeout or DEFAULT_SYMBOL_TIMEOUT,
+                    **kwargs,
+                )
+        except YFRateLimitError as exc:
+            raise ThrottledError(f"Yahoo throttled {len(symbols)} symbols") from exc
+        frames = split_batch_frame(raw, symbols)
+        # Surface throttling so the limiter backs off and retries instead of reporting "no data"
+        throttled = throttled_symbols([sym for sym in symbols if sym not in frames], errors.messages)
+        if throttled:
+            raise ThrottledError(f"Yahoo throttled {len(throttled)} of {len(symbols)} symbols")
+        return frames
+
+
+class LocalFileSource(MarketDataSource):
+    """Offline bars from ``<directory>/<interval>/<SYMBOL>.parquet`` or ``.csv``.
+
+    Files directly under ``directory`` are used when there is no interval
+    sub-directory. Fixtures are frozen in time, so ``period`` is measured back
+    from each file's last bar rather than from today. Parquet needs pyarrow.
+    """
+
+    name = "local"
+    extensions = (".parquet", ".csv")
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._cache = {}
+
+    def path_for(self, symbol, interval="1d"):
+        for folder in (os.path.join(self.directory, interval), self.directory):
+            for ext in self.extensions:
+                path = os.path.join(folder, f"{symbol}{ext}")
+                if os.path.exists(path):
+                    return path
+        return None
+
+    def read(self, path):
+        mtime = os.path.getmtime(path)
+        cached = self._cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        if path.endswith(".parquet"):
+            df = pd.read_parquet(path)
+        else:
+            df = pd.read_csv(path, index_col=0, parse_dates=True)
+        df.index = pd.DatetimeIndex(df.index, name="Date")
+        df = normalize_ohlcv(df.sort_index())
+        self._cache[path] = (mtime, df)
+        return df
+
+    def fetch(self, symbols, period="2y", interval="1d", start=None, timeout=None, **kwargs):
+        frames = {}
+        for sym in symbols:
+            path = self.path_for(sym, interval)
+            if path is None:
+                continue
+            df = slice_window(self.read(path), period=period, start=start)
+            if not df.empty:
+                frames[sym] = df
+        return frames
+
+
+def write_fixtures(frames, directory, interval="1d", fmt="parquet"):
+    """Save {symbol: frame} as LocalFileSource fixtures and return the paths written."""
+    folder = os.path.join(directory, interval)
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for sym, df in frames.items():
+        path = os.path.join(folder, f"{sym}.{fmt}")
+        if fmt == "parquet":
+            df.to_parquet(path)
+        else:
+            df.to_csv(path)
+        paths.append(path)
+    return paths
+
+
+def fetch_universe(
+    symbols,
+    period="2y",
+    interval="1d",
+    fetcher=None,
+    batch_size=DEFAULT_BATCH_SIZE,
+    max_workers=DEFAULT_MAX_WORKERS,
+    symbol_timeout=DEFAULT_SYMBOL_TIMEOUT,
+    deadline=DEFAULT_SCAN_DEADLINE,
+    **kwargs,
+):
+    """Fetch a universe through a bounded worker pool.
+
+    Symbols are grouped into chunks of ``batch_size`` and each chunk is one
+    ``fetcher`` call. Chunk members are fetched concurrently upstream, so a
+    chunk gets ``symbol_timeout`` seconds once it starts running. A chunk
+    that runs out of time is abandoned and its symbols are retried one per
+    call, so only a ticker that is slow on its own times out. Each abandoned
+    chunk is retried on a fresh pool with a worker per symbol: the stalled
+    calls keep holding their workers until the HTTP timeout fires, so
+    retries queued behind them would time out too. The whole call gives up
+    after ``deadline`` seconds.
+
+    Returns ``(frames, failures)`` where ``failures`` maps each symbol that
+    produced no data to a short reason.
+    """
+    fetcher = fetcher or YFinanceSource()
+    frames = {}
+    failures = {}
+    chunks = list(chunk_symbols(symbols, batch_size))
+    if not chunks:
+        return frames, failures
+
+    scan_started = time.monotonic()
+    started = {}
+
+    upstream = getattr(fetcher, "upstream", None)
+    limiter = get_limiter(upstream) if upstream else None
+
+    def run(chunk_id, chunk):
+        started[chunk_id] = time.monotonic()
+        if limiter is None:
+            return fetcher(chunk, period=period, interval=interval, timeout=symbol_timeout, **kwargs)
+        return limiter.call(
+            fetcher, chunk, period=period, interval=interval, timeout=symbol_timeout, cost=len(chunk), **kwargs
+        )
+
+    executor = ThreadPoolExecutor(max_workers=max(1, int(max_workers)), thread_name_prefix="snipe-fetch")
+    retry_executors = []
+    pending = {}
+    chunk_ids = itertools.count()
+
+    def submit(chunk, pool=executor):
+        chunk_id = next(chunk_ids)
+        pending[pool.submit(run, chunk_id, chunk)] = (chunk_id, chunk)
+
+    try:
+        for chunk in chunks:
+            submit(chunk)
+
+        while pending:
+            now = time.monotonic()
+            scan_left = deadline - (now - scan_started) if deadline else None
+            if scan_left is not None and scan_left <= 0:
+                for _, chunk in pending.values():
+                    for sym in chunk:
+                        failures[sym] = f"scan deadline of {deadline:g}s exceeded"
+                break
+
+            # Wake up for whichever comes first: a finished chunk, a chunk
+            # running out of time, or the scan deadline
+            wake_times = [started[cid] + symbol_timeout - now for cid, _ in pending.values() if cid in started]
+            if scan_left is not None:
+                wake_times.append(scan_left)
+            timeout = max(0.01, min(wake_times)) if wake_times else None
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                _, chunk = pending.pop(future)
+                try:
+                    result = future.result() or {}
+                except Exception as exc:
+                    for sym in chunk:
+                        failures[sym] = f"error: {exc.__class__.__name__}: {exc}"
+                    continue
+                for sym in chunk:
+                    df = result.get(sym)
+                    if df is None or df.empty:
+                        failures[sym] = "no data returned"
+                    else:
+                        frames[sym] = df
+
+            now = time.monotonic()
+            for future, (chunk_id, chunk) in list(pending.items()):
+                chunk_started = started.get(chunk_id)
+                if chunk_started is not None and now - chunk_started >= symbol_timeout:
+                    del pending[future]
+                    future.cancel()
+                    if len(chunk) > 1:
+                        # One stalled ticker should not fail the rest of its chunk
+                        retry_executor = ThreadPoolExecutor(max_workers=len(chunk), thread_name_prefix="snipe-retry")
+                        retry_executors.append(retry_executor)
+                        for sym in chunk:
+                            submit([sym], retry_executor)
+                        continue
+                    failures[chunk[0]] = f"timed out after {symbol_timeout:g}s"
+    finally:
+        # Abandon anything still running - the HTTP timeout reaps it eventually
+        executor.shutdown(wait=False, cancel_futures=True)
+        for retry_executor in retry_executors:
+            retry_executor.shutdown(wait=False, cancel_futures=True)
+
+    return frames, failures
+
+
+class StubSource(MarketDataSource):
+    """Offline source producing random-walk OHLCV with configurable latency.
+
+    Used to benchmark the fetch engine and scans without touching the network.
+    ``slow_symbols`` sleep for ``slow_latency`` seconds to mimic a stalled ticker.
+    """
+
+    name = "stub"
+
+    def __init__(self, latency=0.25, jitter=0.1, bars=500, failure_rate=0.0,
+                 slow_symbols=(), slow_latency=30.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.bars = bars
+        self.failure_rate = failure_rate
+        self.slow_symbols = set(slow_symbols)
+        self.slow_latency = slow_latency
+        self._random = random.Random(seed)
+
+    def make_frame(self, symbol):
+        rng = np.random.default_rng(zlib.crc32(symbol.encode()))
+        index = pd.date_range(end=pd.Timestamp.today().normalize(), periods=self.bars, freq="D")
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, self.bars)))
+        spread = close * rng.uniform(0.001, 0.03, self.bars)
+        open_ = close + rng.normal(0, 0.5, self.bars) * spread
+        return pd.DataFrame({
+            "Open": open_,
+            "High": np.maximum(open_, close) + spread,
+            "Low": np.minimum(open_, close) - spread,
+            "Close": close,
+            "Adj Close": close,
+            "Volume": rng.integers(1_000_000, 50_000_000, self.bars).astype(float),
+        }, index=index)
+
+    def fetch(self, symbols, period="2y", interval="1d", start=None, timeout=None, **kwargs):
+        delay = self.latency + self._random.uniform(0, self.jitter)
+        if self.slow_symbols.intersection(symbols):
+            delay = max(delay, self.slow_latency)
+        time.sleep(delay)
+        return {
+            sym: slice_window(self.make_frame(sym), period=period, start=start)
+            for sym in symbols
+            if self._random.random() >= self.failure_rate
+        }
+
+
+def benchmark_fetch(symbols, fetcher=None, runs=3, **engine_kwargs):
+    """Time fetch_universe against ``fetcher`` (a StubSource by default).
+
+    Returns a dict with the best/mean wall time and the failures of the last run.
+    """
+    fetcher = fetcher or StubSource()
+    timings = []
+    failures = {}
+    for _ in range(max(1, runs)):
+        started = time.perf_counter()
+        frames, failures = fetch_universe(symbols, fetcher=fetcher, **engine_kwargs)
+        timings.append(time.perf_counter() - started)
+    return {
+        "symbols": len(symbols),
+        "fetched": len(frames),
+        "best_s": min(timings),
+        "mean_s": sum(timings) / len(timings),
+        "failures": failures,
+    }
+
+
+def download_batch(symbols, period="2y", interval="1d", batch_size=DEFAULT_BATCH_SIZE, **kwargs):
+    """Download a universe in multi-ticker requests and return {symbol: OHLCV frame}.
+
+    Symbols that fail or return nothing are simply absent from the result;
+    use fetch_universe() to find out why. Extra keyword arguments are
+    forwarded to ``yf.download``.
+    """
+    frames, _ = fetch_universe(symbols, period=period, interval=interval, batch_size=batch_size, **kwargs)
+    return frames
+
+
+def source_loader(source, **engine_kwargs):
+    """Adapt ``source`` to the ``load(symbols, period) -> (frames, failures)`` hook the scanners take."""
+    def load(symbols, period):
+        return fetch_universe(symbols, period=period, fetcher=source, auto_adjust=False, **engine_kwargs)
+    return load
+
+
+if __name__ == "__main__":
+    universe = [f"SYM{i:03d}" for i in range(60)]
+    stub = StubSource(latency=0.2, jitter=0.1, slow_symbols={"SYM007"}, slow_latency=5.0, seed=7)
+    for label, kwargs in [
+        ("serial, 1 symbol/request", dict(batch_size=1, max_workers=1)),
+        ("pool of 8, 1 symbol/request", dict(batch_size=1, max_workers=8)),
+        ("pool of 4, 10 symbols/request", dict(batch_size=10, max_workers=4)),
+    ]:
+        report = benchmark_fetch(universe, stub, runs=1, symbol_timeout=1.0, deadline=60, **kwargs)
+        print(f"{label:32s} {report['best_s']:6.2f}s  fetched {report['fetched']}/{report['symbols']}  "
+              f"failed {sorted(report['failures'])}")
@@ -0,0 +1,230 @@
+"""
+OHLCV Store Module
+Persistent on-disk bar store with incremental refresh
+"""
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+import pandas as pd
+
+from market_data import fetch_universe, period_to_timedelta
+
+DEFAULT_STORE_PATH = os.getenv(
+    "OHLCV_STORE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "ohlcv.sqlite"),
+)
+
+# Symbols refreshed more recently than this are served straight from disk
+MIN_REFRESH_SECONDS = float(os.getenv("OHLCV_MIN_REFRESH_SECONDS", "300"))
+
+_BAR_COLUMNS = ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+_SQL_COLUMNS = ["open", "high", "low", "close", "adj_close", "volume"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bars (
+    symbol TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    open REAL, high REAL, low REAL, close REAL, adj_close REAL, volume REAL,
+    PRIMARY KEY (symbol, interval, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS series_meta (
+    symbol TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    history_start INTEGER NOT NULL,
+    refreshed_at REAL NOT NULL,
+    PRIMARY KEY (symbol, interval)
+);
+CREATE TABLE IF NOT EXISTS data_versions (
+    interval TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+"""
+
+
+def _to_ns(index):
+    """DatetimeIndex -> int64 nanoseconds, tz-aware stamps stored as naive UTC."""
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_convert("UTC").tz_localize(None)
+    return index.asi8
+
+
+class OHLCVStore:
+    """SQLite-backed bar store keyed by (symbol, interval).
+
+    Bars are fetched unadjusted (``auto_adjust=False``) so appended bars stay
+    consistent with what is already on disk. Safe to share between processes.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH, source=None, min_refresh_seconds=MIN_REFRESH_SECONDS):
+        self.path = path
+        self.source = source
+        self.min_refresh_seconds = min_refresh_seconds
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _meta(self, symbols, interval):
+        """{symbol: (history_start, refreshed_at, newest bar ns)} for symbols with stored history."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                f"SELECT m.symbol, m.history_start, m.refreshed_at, "
+                f"(SELECT MAX(ts) FROM bars b WHERE b.symbol = m.symbol AND b.interval = m.interval) "
+                f"FROM series_meta m WHERE m.interval = ? AND m.symbol IN ({','.join('?' * len(symbols))})",
+                [interval, *symbols],
+            ).fetchall()
+        return {sym: (history_start, refreshed_at, last_ts) for sym, history_start, refreshed_at, last_ts in rows}
+
+    def last_timestamp(self, symbol, interval="1d"):
+        """Timestamp of the newest stored bar, or None."""
+        last_ts = self._meta([symbol], interval).get(symbol, (None, None, None))[2]
+        return pd.Timestamp(last_ts) if last_ts is not None else None
+
+    def data_version(self, interval="1d"):
+        """Changes only when a bar of ``interval`` is added or its values change.
+
+        Refreshes that fetch nothing new (or re-fetch identical bars) leave it
+        alone, so panels and caches keyed on it survive them.
+        """
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT version FROM data_versions WHERE interval = ?", (interval,)).fetchone()
+        return row[0] if row else 0
+
+    def read(self, symbol, interval="1d", start=None):
+        """Return stored bars for ``symbol`` from ``start`` onwards as an OHLCV frame."""
+        start_ns = _to_ns([start])[0] if start is not None else None
+        query = f"SELECT ts, {', '.join(_SQL_COLUMNS)} FROM bars WHERE symbol = ? AND interval = ?"
+        params = [symbol, interval]
+        if start_ns is not None:
+            query += " AND ts >= ?"
+            params.append(int(start_ns))
+        with closing(self._connect()) as conn:
+            rows = conn.execute(query + " ORDER BY ts", params).fetchall()
+        if not rows:
+            return pd.DataFrame(columns=_BAR_COLUMNS)
+        df = pd.DataFrame.from_records(rows, columns=["ts", *_BAR_COLUMNS])
+        df.index = pd.DatetimeIndex(pd.to_datetime(df.pop("ts")), name="Date")
+        if df["Adj Close"].isna().all():
+            df = df.drop(columns="Adj Close")
+        return df
+
+    def write(self, symbol, interval, df, history_start=None):
+        """Upsert bars for ``symbol``; re-written timestamps replace the stored bar."""
+        if df is None or df.empty:
+            return
+        values = df.reindex(columns=_BAR_COLUMNS).astype(float)
+        records = [
+            (symbol, interval, int(ts), *(None if pd.isna(v) else float(v) for v in row))
+            for ts, row in zip(_to_ns(values.index), values.itertuples(index=False, name=None))
+        ]
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            before = conn.total_changes
+            # Re-fetched bars that are unchanged are not rewritten, so they don't count as changes
+            conn.executemany(
+                f"INSERT INTO bars (symbol, interval, ts, {', '.join(_SQL_COLUMNS)}) "
+                f"VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                f"ON CONFLICT (symbol, interval, ts) DO UPDATE SET "
+                f"{', '.join(f'{col} = excluded.{col}' for col in _SQL_COLUMNS)} "
+                f"WHERE ({', '.join(f'bars.{col}' for col in _SQL_COLUMNS)}) "
+                f"IS NOT ({', '.join(f'excluded.{col}' for col in _SQL_COLUMNS)})",
+                records,
+            )
+            if conn.total_changes != before:
+                conn.execute(
+                    "INSERT INTO data_versions (interval, version) VALUES (?, 1) "
+                    "ON CONFLICT (interval) DO UPDATE SET version = version + 1",
+                    (interval,),
+                )
+            if history_start is not None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO series_meta (symbol, interval, history_start, refreshed_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (symbol, interval, int(history_start), now),
+                )
+            else:
+                conn.execute(
+                    "UPDATE series_meta SET refreshed_at = ? WHERE symbol = ? AND interval = ?",
+                    (now, symbol, interval),
+                )
+
+    def refresh(self, symbols, interval="1d", period="2y", **fetch_kwargs):
+        """Bring ``symbols`` up to date and return {symbol: failure reason}.
+
+        Symbols without enough stored history are backfilled over ``period``;
+        the rest only fetch bars from their newest stored bar onwards. The
+        newest bar is re-fetched because it may have been a partial session.
+        """
+        window = period_to_timedelta(period)
+        window_start = _to_ns([pd.Timestamp.now() - window])[0] if window is not None else 0
+        meta = self._meta(list(symbols), interval)
+        now = time.time()
+
+        backfill = []
+        incremental = {}
+        for sym in symbols:
+            history_start, refreshed_at, last_ts = meta.get(sym, (None, 0.0, None))
+            # Stored history must reach back to the requested window (with a week of slack for holidays)
+            if last_ts is None or history_start > window_start + pd.Timedelta(days=7).value:
+                backfill.append(sym)
+            elif now - refreshed_at >= self.min_refresh_seconds:
+                start = pd.Timestamp(last_ts)
+                incremental.setdefault(start.normalize() if interval == "1d" else start, []).append(sym)
+
+        failures = {}
+        if backfill:
+            frames, failed = fetch_universe(
+                backfill, period=period, interval=interval, fetcher=self.source, auto_adjust=False, **fetch_kwargs
+            )
+            for sym, df in frames.items():
+                self.write(sym, interval, df, history_start=window_start)
+            failures.update(failed)
+        for start, group in incremental.items():
+            frames, failed = fetch_universe(
+                group, period=None, interval=interval, start=start, fetcher=self.source, auto_adjust=False,
+                **fetch_kwargs,
+            )
+            for sym in group:
+                if sym in frames:
+                    self.write(sym, interval, frames[sym])
+                elif failed.get(sym) == "no data returned":
+                    # Nothing new since the last bar (weekend, holiday) still counts as refreshed
+                    self._touch(sym, interval)
+                else:
+                    failures[sym] = failed.get(sym, "no data returned")
+        return failures
+
+    def _touch(self, symbol, interval):
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "UPDATE series_meta SET refreshed_at = ? WHERE symbol = ? AND interval = ?",
+                (time.time(), symbol, interval),
+            )
+
+    def load(self, symbols, interval="1d", period="2y", **fetch_kwargs):
+        """Refresh ``symbols`` and return ``(frames, failures)`` for the requested window.
+
+        A symbol whose refresh failed is still served from disk when it has
+        stored bars; only symbols with no data at all are reported as failures.
+        """
+        failures = self.refresh(symbols, interval=interval, period=period, **fetch_kwargs)
+        window = period_to_timedelta(period)
+        start = pd.Timestamp.now() - window if window is not None else None
+        frames = {}
+        for sym in symbols:
+            df = self.read(sym, interval, start=start)
+            if df.empty:
+                failures.setdefault(sym, "no stored data")
+            else:
+                frames[sym] = df
+                failures.pop(sym, None)
+        return frames, failures
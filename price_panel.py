@@ -0,0 +1,227 @@
+"""
+Price Panel Module
+Memory-mapped symbols x bars x fields OHLCV panel shared across processes
+"""
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from market_data import period_to_timedelta
+from ohlcv_store import DEFAULT_STORE_PATH
+
+DEFAULT_PANEL_DIR = os.getenv(
+    "PRICE_PANEL_DIR",
+    os.path.join(os.path.dirname(DEFAULT_STORE_PATH), "panel"),
+)
+
+# History kept in the panel; shorter scan windows are sliced out of it
+PANEL_PERIOD = os.getenv("PRICE_PANEL_PERIOD", "2y")
+
+PANEL_FIELDS = ("Open", "High", "Low", "Close", "Volume")
+
+# Superseded panel files are kept this many versions back so readers that
+# mapped them mid-rebuild are never left pointing at a deleted file name.
+_KEEP_VERSIONS = 3
+
+_NAT = np.iinfo(np.int64).min
+
+
+def _pointer_path(directory, interval):
+    return os.path.join(directory, f"CURRENT-{interval}")
+
+
+class PricePanel:
+    """Read-only view over one published panel.
+
+    ``values`` has shape (symbols, bars, fields). Each symbol's bars are
+    right-aligned: the last column is its newest bar and shorter histories are
+    left-padded with NaN, so ``field("Close")[:, -1]`` is the latest close of
+    every symbol.
+    """
+
+    def __init__(self, manifest, values, timestamps):
+        self.manifest = manifest
+        self.values = values
+        self.timestamps = timestamps
+        self.version = manifest["version"]
+        self.interval = manifest["interval"]
+        self.source_version = manifest.get("source_version")
+        self.symbols = manifest["symbols"]
+        self.fields = tuple(manifest["fields"])
+        self.offsets = manifest["offsets"]
+        self._row = {sym: i for i, sym in enumerate(self.symbols)}
+
+    @classmethod
+    def open(cls, directory, version):
+        """Map a published panel version read-only."""
+        base = os.path.join(directory, f"panel-{version}")
+        with open(f"{base}.json") as fh:
+            manifest = json.load(fh)
+        values = np.load(f"{base}.values.npy", mmap_mode="r")
+        timestamps = np.load(f"{base}.ts.npy", mmap_mode="r")
+        return cls(manifest, values, timestamps)
+
+    def __contains__(self, symbol):
+        return symbol in self._row
+
+    def field(self, name):
+        """(symbols, bars) view of one field - no copy."""
+        return self.values[:, :, self.fields.index(name)]
+
+    def frame(self, symbol, start=None):
+        """OHLCV DataFrame for ``symbol`` backed by the mapped arrays (no copy).
+
+        The frame is read-only; adding columns is fine, writing into the
+        OHLCV columns is not.
+        """
+        row = self._row[symbol]
+        offset = self.offsets[row]
+        stamps = self.timestamps[row, offset:]
+        if start is not None:
+            offset += int(np.searchsorted(stamps, pd.Timestamp(start).value))
+            stamps = self.timestamps[row, offset:]
+        index = pd.DatetimeIndex(stamps.view("datetime64[ns]"), name="Date")
+        return pd.DataFrame(self.values[row, offset:], index=index, columns=list(self.fields), copy=False)
+
+    def frames(self, symbols, start=None):
+        return {sym: self.frame(sym, start) for sym in symbols if sym in self}
+
+
+def write_panel(directory, frames, interval="1d", source_version=None):
+    """Publish ``frames`` ({symbol: OHLCV frame}) as a new panel version.
+
+    Files are written under a fresh version name and the ``CURRENT`` pointer
+    is swapped atomically, so concurrent readers only ever see complete panels.
+    """
+    os.makedirs(directory, exist_ok=True)
+    symbols = [sym for sym, df in frames.items() if df is not None and not df.empty]
+    bars = max((len(frames[sym]) for sym in symbols), default=0)
+    version = f"{interval}-{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    base = os.path.join(directory, f"panel-{version}")
+
+    values = np.lib.format.open_memmap(
+        f"{base}.values.npy", mode="w+", dtype=np.float64, shape=(len(symbols), bars, len(PANEL_FIELDS))
+    )
+    timestamps = np.lib.format.open_memmap(f"{base}.ts.npy", mode="w+", dtype=np.int64, shape=(len(symbols), bars))
+    values[:] = np.nan
+    timestamps[:] = _NAT
+    offsets = []
+    for row, sym in enumerate(symbols):
+        df = frames[sym]
+        offset = bars - len(df)
+        values[row, offset:] = df.reindex(columns=list(PANEL_FIELDS)).to_numpy(dtype=np.float64)
+        timestamps[row, offset:] = pd.DatetimeIndex(df.index).tz_localize(None).asi8
+        offsets.append(offset)
+    values.flush()
+    timestamps.flush()
+    del values, timestamps
+
+    manifest = {
+        "version": version,
+        "interval": interval,
+        "source_version": source_version,
+        "symbols": symbols,
+        "fields": list(PANEL_FIELDS),
+        "offsets": offsets,
+        "bars": bars,
+        "built_at": time.time(),
+    }
+    with open(f"{base}.json", "w") as fh:
+        json.dump(manifest, fh)
+
+    pointer = _pointer_path(directory, interval)
+    tmp_pointer = f"{pointer}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(tmp_pointer, "w") as fh:
+        fh.write(version)
+    os.replace(tmp_pointer, pointer)
+    _prune_versions(directory, interval)
+    return PricePanel.open(directory, version)
+
+
+def _prune_versions(directory, interval):
+    manifests = sorted(glob.glob(os.path.join(directory, f"panel-{interval}-*.json")), key=os.path.getmtime)
+    for manifest in manifests[:-_KEEP_VERSIONS]:
+        base = manifest[:-len(".json")]
+        for path in (manifest, f"{base}.values.npy", f"{base}.ts.npy"):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+class SharedPricePanel:
+    """Process-local handle on the shared panel of one interval.
+
+    ``load()`` refreshes the OHLCV store, republishes the panel when the store
+    has changed since it was built, and hands out zero-copy frames. Every
+    process re-maps the same files, so the history lives once in the page
+    cache instead of once per process.
+    """
+
+    def __init__(self, directory=DEFAULT_PANEL_DIR, interval="1d", period=PANEL_PERIOD):
+        self.directory = directory
+        self.interval = interval
+        self.period = period
+        self._panel = None
+        self._lock = threading.Lock()
+
+    def current(self):
+        """The newest published panel, re-mapped if another process replaced it."""
+        try:
+            with open(_pointer_path(self.directory, self.interval)) as fh:
+                version = fh.read().strip()
+        except OSError:
+            return None
+        if self._panel is None or self._panel.version != version:
+            try:
+                self._panel = PricePanel.open(self.directory, version)
+            except OSError:
+                return self._panel
+        return self._panel
+
+    def load(self, store, symbols, period="2y", **fetch_kwargs):
+        """Return ``(frames, failures)`` like ``OHLCVStore.load`` but backed by the panel."""
+        window = period_to_timedelta(period)
+        panel_window = period_to_timedelta(self.period)
+        if window is None or (panel_window is not None and window > panel_window):
+            # Longer than the panel keeps - read straight from the store
+            return store.load(symbols, interval=self.interval, period=period, **fetch_kwargs)
+
+        failures = store.refresh(symbols, interval=self.interval, period=self.period, **fetch_kwargs)
+        with self._lock:
+            panel = self.current()
+            source_version = store.data_version(self.interval)
+            stale = panel is None or panel.source_version != source_version
+            if stale or any(sym not in panel for sym in symbols if sym not in failures):
+                panel = self._rebuild(store, symbols, panel, source_version)
+
+        start = pd.Timestamp.now() - window
+        frames = {}
+        for sym in symbols:
+            df = panel.frame(sym, start) if sym in panel else None
+            if df is None or df.empty:
+                failures.setdefault(sym, "no stored data")
+            else:
+                frames[sym] = df
+                failures.pop(sym, None)
+        return frames, failures
+
+    def loader(self, store):
+        """``load(symbols, period)`` hook for the scanners, backed by ``store``."""
+        def load(symbols, period):
+            return self.load(store, symbols, period=period)
+        return load
+
+    def _rebuild(self, store, symbols, panel, source_version):
+        universe = list(dict.fromkeys(list(panel.symbols if panel is not None else []) + list(symbols)))
+        window = period_to_timedelta(self.period)
+        start = pd.Timestamp.now() - window if window is not None else None
+        frames = {sym: store.read(sym, self.interval, start=start) for sym in universe}
+        self._panel = write_panel(self.directory, frames, self.interval, source_version)
+        return self._panel
@@ -0,0 +1,238 @@
+"""
+Rate Limit Module
+Process-wide token buckets, backoff and circuit breaking for upstream fetches
+"""
+import os
+import random
+import threading
+import time
+
+
+class ThrottledError(Exception):
+    """The upstream told us to slow down (HTTP 429 / "rate limited")."""
+
+
+class CircuitOpenError(Exception):
+    """Calls are being rejected until the upstream has had time to recover."""
+
+
+_THROTTLE_MARKERS = ("too many requests", "rate limit", "ratelimit", "429")
+
+
+def is_throttle_message(text):
+    text = str(text or "").lower()
+    return any(marker in text for marker in _THROTTLE_MARKERS)
+
+
+def is_throttle_error(exc):
+    if isinstance(exc, ThrottledError) or exc.__class__.__name__ == "YFRateLimitError":
+        return True
+    return is_throttle_message(exc)
+
+
+def is_transport_error(exc):
+    # requests' and curl_cffi's connection/timeout errors all derive from OSError
+    return isinstance(exc, OSError)
+
+
+def is_upstream_failure(exc):
+    """Whether ``exc`` says the upstream is unhealthy, as opposed to a bad symbol or empty response."""
+    return is_throttle_error(exc) or is_transport_error(exc)
+
+
+class TokenBucket:
+    """Thread-safe token bucket whose refill rate adapts to throttling.
+
+    Every throttle halves the rate (down to ``min_rate``); every success
+    nudges it back up by a tenth of the configured rate.
+    """
+
+    def __init__(self, rate, capacity, min_rate=None):
+        self.base_rate = float(rate)
+        self.rate = float(rate)
+        self.min_rate = float(min_rate if min_rate is not None else rate / 16)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, cost=1.0):
+        """Block until ``cost`` tokens are available; returns the seconds waited."""
+        cost = min(float(cost), self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= cost:
+                    self.tokens -= cost
+                    return waited
+                delay = (cost - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def penalize(self):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+
+    def reward(self):
+        with self._lock:
+            self.rate = min(self.base_rate, self.rate + self.base_rate / 10)
+
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failures, probes again after ``reset_timeout``.
+
+    Once half-open a single caller is let through as the probe; everyone else
+    is rejected until it reports back, so a recovering upstream isn't hit by
+    the whole backlog at once.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "half-open" and not self.probing:
+                self.probing = True
+                return True
+            return state == "closed"
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.probing or self.failures >= self.failure_threshold:
+                # A failed half-open probe re-opens for another full timeout
+                self.opened_at = time.monotonic()
+            self.probing = False
+
+    def release(self):
+        """End a call that says nothing about upstream health, freeing the probe slot."""
+        with self._lock:
+            self.probing = False
+
+
+class UpstreamLimiter:
+    """Token bucket + jittered exponential backoff + circuit breaker for one upstream."""
+
+    def __init__(self, name, rate=10.0, burst=25, max_retries=3, base_delay=1.0, max_delay=16.0,
+                 failure_threshold=5, reset_timeout=60.0):
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.counters = {
+            "calls": 0,
+            "throttled": 0,
+            "retries": 0,
+            "errors": 0,
+            "rejected": 0,
+            "wait_seconds": 0.0,
+        }
+        self._lock = threading.Lock()
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def backoff(self, attempt):
+        """Full-jitter exponential delay for retry number ``attempt`` (0-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def call(self, fn, *args, cost=1.0, **kwargs):
+        """Run ``fn`` under the limiter, retrying throttles with backoff.
+
+        Raises CircuitOpenError while the breaker is open and ThrottledError
+        once retries are exhausted; other exceptions propagate unchanged.
+        """
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                self._count("rejected")
+                raise CircuitOpenError(f"{self.name} circuit open after repeated failures")
+            self._count("wait_seconds", self.bucket.acquire(cost))
+            self._count("calls")
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as exc:
+                if not is_upstream_failure(exc):
+                    # A bad symbol or empty response means the upstream answered
+                    self.breaker.release()
+                    self._count("errors")
+                    raise
+                self.breaker.record_failure()
+                if not is_throttle_error(exc):
+                    self._count("errors")
+                    raise
+                self._count("throttled")
+                self.bucket.penalize()
+                if attempt == self.max_retries:
+                    raise ThrottledError(f"{self.name} still throttling after {self.max_retries} retries") from exc
+                self._count("retries")
+                delay = self.backoff(attempt)
+                self._count("wait_seconds", delay)
+                time.sleep(delay)
+            else:
+                self.breaker.record_success()
+                self.bucket.reward()
+                return result
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+        stats["rate"] = round(self.bucket.rate, 3)
+        stats["circuit"] = self.breaker.state
+        return stats
+
+
+_LIMITERS = {}
+_REGISTRY_LOCK = threading.Lock()
+
+# Per-upstream defaults; rates are in symbols per second
+UPSTREAM_DEFAULTS = {
+    "yfinance": {
+        "rate": float(os.getenv("YAHOO_RATE_PER_SEC", "10")),
+        "burst": int(os.getenv("YAHOO_BURST", "25")),
+    },
+}
+
+
+def get_limiter(name):
+    """Process-wide limiter for upstream ``name``, created on first use."""
+    with _REGISTRY_LOCK:
+        limiter = _LIMITERS.get(name)
+        if limiter is None:
+            limiter = _LIMITERS[name] = UpstreamLimiter(name, **UPSTREAM_DEFAULTS.get(name, {}))
+        return limiter
+
+
+def limiter_stats():
+    """{upstream: counters} for every limiter used so far in this process."""
+    with _REGISTRY_LOCK:
+        limiters = list(_LIMITERS.values())
+    return {limiter.name: limiter.stats() for limiter in limiters}
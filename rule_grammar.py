@@ -0,0 +1,464 @@
+"""
+Rule Grammar Module
+Tokenize and parse custom rule text into normalized rules and a boolean expression over them
+"""
+import functools
+import re
+
+from ta_indicators import MAX_MOVING_AVERAGE_LENGTH
+
+# Signs only bind to numbers that start a token ("CCI < -100", not "50-DAY");
+# letters and digits split apart, so "EMA50" and "2X" read as two tokens
+_TOKEN = re.compile(r"""
+    (?P<money>\$\s*\d+(?:\.\d+)?)
+  | (?P<number>(?:(?<![A-Z0-9.])-)?\d+(?:\.\d+)?)
+  | (?P<op><=|>=|<|>)
+  | (?P<amp>&&?)
+  | (?P<pipe>\|\|?)
+  | (?P<lparen>\()
+  | (?P<rparen>\))
+  | (?P<word>%?[A-Z]+)
+""", re.VERBOSE)
+
+CONNECTIVES = {"AND", "OR"}
+NEGATION = "NOT"
+
+_GREATER = {">", ">=", "ABOVE", "OVER", "GREATER", "EXCEEDS", "EXCEEDING"}
+_LESS = {"<", "<=", "BELOW", "UNDER", "LESS", "BENEATH"}
+_BULLISH = {"BULL", "BULLISH", "UP", "GOLDEN"}
+_BEARISH = {"BEAR", "BEARISH", "DOWN", "DEATH"}
+_CROSSING = {"CROSS", "CROSSES", "CROSSED", "CROSSING"}
+
+
+class Token:
+    __slots__ = ("kind", "text", "value")
+
+    def __init__(self, kind, text, value=None):
+        self.kind = kind
+        self.text = text
+        self.value = value
+
+    def __repr__(self):
+        return f"Token({self.kind}, {self.text!r})"
+
+
+def tokenize(text):
+    """Tokens of ``text``, upper-cased; punctuation other than comparators and ``$`` is dropped."""
+    tokens = []
+    for match in _TOKEN.finditer(str(text).upper()):
+        kind, raw = match.lastgroup, match.group()
+        if kind == "money":
+            number = raw.lstrip("$").strip()
+            tokens.append(Token("money", f"${number}", float(number)))
+        elif kind == "number":
+            tokens.append(Token("number", raw, float(raw)))
+        elif kind == "amp":
+            tokens.append(Token("word", "AND"))
+        elif kind == "pipe":
+            tokens.append(Token("word", "OR"))
+        else:
+            tokens.append(Token(kind, raw))
+    return tokens
+
+
+def canonical_text(text):
+    """Whitespace- and case-insensitive form of ``text``: equal strategies give equal strings."""
+    return " ".join(token.text for token in tokenize(text))
+
+
+class _Condition:
+    """The tokens of one condition with the lookups every rule shape needs."""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.words = [t.text for t in tokens if t.kind in ("word", "op")]
+        self.numbers = [t.value for t in tokens if t.kind == "number"]
+        self.money = [t.value for t in tokens if t.kind == "money"]
+
+    def has(self, *words):
+        return any(word in self.words for word in words)
+
+    def comparison(self):
+        """The first comparator, else ``"<"`` / ``">"`` from a comparator word, else None.
+
+        ``<=`` / ``>=`` are kept as written; words ("above", "below") are strict.
+        """
+        for word in self.words:
+            if word in ("<=", ">="):
+                return word
+            if word in _GREATER:
+                return ">"
+            if word in _LESS:
+                return "<"
+        return None
+
+    def direction(self):
+        """``"BULL"`` / ``"BEAR"`` from trend words, falling back to above/below."""
+        for word in self.words:
+            if word in _BULLISH:
+                return "BULL"
+            if word in _BEARISH:
+                return "BEAR"
+        return {">": "BULL", "<": "BEAR"}.get((self.comparison() or "")[:1])
+
+    def threshold(self, default=None):
+        """The number compared against: the first one after the comparator, else the first one."""
+        seen_comparator = False
+        for token in self.tokens:
+            if token.text in _GREATER or token.text in _LESS:
+                seen_comparator = True
+            elif seen_comparator and token.kind == "number":
+                return token.value
+        return self.numbers[0] if self.numbers else default
+
+
+def _moving_average_length(numbers, default=200):
+    """First whole number usable as a moving-average length (any length is computed on demand)."""
+    for number in numbers:
+        if float(number).is_integer() and 1 <= int(number) <= MAX_MOVING_AVERAGE_LENGTH:
+            return int(number)
+    return default
+
+
+def _oscillator(rule_type, low, high, operators=("<", ">"), required=False):
+    """``indicator < / > value`` with the scan's default levels when no number is given."""
+    def parse(condition):
+        op = condition.comparison()
+        if op is None or op[0] not in operators:
+            return None
+        value = condition.threshold()
+        if value is None:
+            if required:
+                return None
+            value = low if op[0] == "<" else high
+        return (rule_type, op, float(value))
+    return parse
+
+
+def _rsi(condition):
+    if condition.has("OVERSOLD"):
+        return ("RSI", "<", float(condition.threshold(30)))
+    if condition.has("OVERBOUGHT"):
+        return ("RSI", ">", float(condition.threshold(70)))
+    return _oscillator("RSI", 30, 70)(condition)
+
+
+def _moving_average(condition):
+    kind = "EMA" if condition.has("EMA") else "SMA"
+    if condition.has(*_CROSSING):
+        return _ema_cross(condition)
+    op = condition.comparison()
+    if op is None:
+        return None
+    above = op[0] == ">"
+    return (f"PRICE_{'ABOVE' if above else 'BELOW'}_{kind}", op, _moving_average_length(condition.numbers))
+
+
+def _ema_cross(condition):
+    if condition.has("GOLDEN"):
+        return ("EMA_CROSS", "GOLDEN", None)
+    if condition.has("DEATH"):
+        return ("EMA_CROSS", "DEATH", None)
+    # Only the 50/200 pair has a cross check
+    if {50.0, 200.0} <= set(condition.numbers):
+        direction = condition.direction()
+        if direction:
+            return ("EMA_CROSS", "GOLDEN" if direction == "BULL" else "DEATH", None)
+    return None
+
+
+def _macd(condition):
+    op = condition.comparison()
+    if condition.has("HIST", "HISTOGRAM"):
+        value = condition.threshold()
+        return ("MACD_HIST", op, float(value)) if op and value is not None else None
+    if op and not condition.has(*_CROSSING, *_BULLISH, *_BEARISH):
+        # A comparison is a state ("MACD > signal", "MACD > 0"), not the crossing event
+        if condition.has("SIGNAL"):
+            return ("MACD_SIGNAL", op, None)
+        value = condition.threshold()
+        return ("MACD", op, float(value)) if value is not None else None
+    direction = condition.direction()
+    return ("MACD_CROSS", direction, None) if direction else None
+
+
+def _volume(condition):
+    multiplier = 2.0
+    for i, token in enumerate(condition.tokens):
+        following = condition.tokens[i + 1].text if i + 1 < len(condition.tokens) else None
+        if token.kind == "number" and following in ("X", "TIMES"):
+            multiplier = token.value
+            break
+    else:
+        if condition.has("TRIPLE"):
+            multiplier = 3.0
+        elif condition.has("DOUBLE"):
+            multiplier = 2.0
+        elif condition.numbers:
+            multiplier = condition.numbers[0]
+    if (condition.comparison() or "")[:1] == ">" or condition.has("SPIKE", "SURGE", "EXPLOSION"):
+        return ("VOLUME", ">", float(multiplier))
+    return None
+
+
+def _bollinger(condition):
+    if condition.has("SQUEEZE"):
+        return ("BB_SQUEEZE", None, None)
+    if condition.has("UPPER"):
+        return ("BB_TOUCH", "UPPER", None)
+    if condition.has("LOWER"):
+        return ("BB_TOUCH", "LOWER", None)
+    return None
+
+
+def _trend(rule_type):
+    def parse(condition):
+        direction = condition.direction()
+        return (rule_type, direction, None) if direction else None
+    return parse
+
+
+def _vwap(condition):
+    op = condition.comparison()
+    if op is None:
+        return None
+    return ("PRICE_ABOVE_VWAP" if op[0] == ">" else "PRICE_BELOW_VWAP", None, None)
+
+
+def _aroon(condition):
+    side = "AROON_UP" if condition.has("UP") else "AROON_DOWN" if condition.has("DOWN") else None
+    op, value = condition.comparison(), condition.threshold()
+    if side is None or op is None or op[0] != ">" or value is None:
+        return None
+    return (side, op, float(value))
+
+
+def _obv(condition):
+    return ("OBV_DIVERGENCE", None, None) if condition.has("DIVERGENCE", "DIV") else None
+
+
+def _price(condition):
+    op = condition.comparison()
+    value = condition.money[0] if condition.money else condition.threshold()
+    return ("PRICE", op, float(value)) if op and value is not None else None
+
+
+# (words that identify the indicator, parser); first match wins, so specific
+# phrases come before the generic ones they contain ("PRICE ABOVE VWAP")
+_GRAMMAR = (
+    (("GOLDEN", "DEATH"), _ema_cross),
+    (("MACD",), _macd),
+    (("EMA", "SMA"), _moving_average),
+    (("RSI",), _rsi),
+    (("VOLUME", "VOL"), _volume),
+    (("BOLLINGER", "BB", "BBANDS"), _bollinger),
+    (("STOCH", "STOCHASTIC"), _oscillator("STOCH", 20, 80)),
+    (("ADX",), _oscillator("ADX", 25, 25, operators=(">",))),
+    (("ATR",), _oscillator("ATR", None, None, operators=(">",), required=True)),
+    (("CCI",), _oscillator("CCI", -100, 100)),
+    (("WILLIAMS", "WILLR", "%R"), _oscillator("WILLR", -80, -20)),
+    (("OBV",), _obv),
+    (("VWAP",), _vwap),
+    (("SUPERTREND", "ST"), _trend("SUPERTREND")),
+    (("PSAR", "SAR"), _trend("PSAR")),
+    (("AROON",), _aroon),
+    (("MFI",), _oscillator("MFI", 20, 80)),
+    (("ROC",), _oscillator("ROC", None, None, required=True)),
+    (("PRICE", "CLOSE"), _price),
+)
+
+
+def _merge_compounds(tokens):
+    # "SUPER TREND" is one indicator name
+    merged = []
+    for token in tokens:
+        if merged and merged[-1].text == "SUPER" and token.text == "TREND":
+            merged[-1] = Token("word", "SUPERTREND")
+        else:
+            merged.append(token)
+    return merged
+
+
+def parse_condition(tokens):
+    """Normalized ``(rule_type, operator, value)`` for one condition, or None if unrecognised."""
+    condition = _Condition(_merge_compounds(tokens))
+    for words, parse in _GRAMMAR:
+        if condition.has(*words):
+            return parse(condition)
+    return None
+
+
+def _is_connective(token):
+    return token.kind == "word" and token.text in CONNECTIVES
+
+
+def _is_negation(token):
+    return token is not None and token.kind == "word" and token.text == NEGATION
+
+
+def _negate(expression):
+    """``("NOT", expression)``; double negation cancels and an unparsed part stays None."""
+    if expression is None:
+        return None
+    if isinstance(expression, tuple) and expression[0] == NEGATION:
+        return expression[1]
+    return (NEGATION, expression)
+
+
+class _Parser:
+    """Recursive descent over the token list, AND binding tighter than OR.
+
+    ``expression := term (OR term)*``, ``term := factor (AND factor)*``,
+    ``factor := NOT factor | "(" expression ")" | condition``. A NOT inside
+    a condition ("RSI NOT ABOVE 70") negates that condition. Conditions
+    become leaves numbered in reading order; the parser is lenient like
+    the old splitter:
+    an unclosed group closes at the end, a stray ``)`` is skipped, and a
+    condition that does not parse drops out of the expression.
+    """
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+        self.rules = []
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def expression(self):
+        terms = [self.term()]
+        while self.peek() is not None and self.peek().text == "OR":
+            self.pos += 1
+            terms.append(self.term())
+        return _node("OR", terms)
+
+    def term(self):
+        factors = [self.factor()]
+        while self.peek() is not None and self.peek().text == "AND":
+            self.pos += 1
+            factors.append(self.factor())
+        return _node("AND", factors)
+
+    def factor(self):
+        token = self.peek()
+        if _is_negation(token):
+            self.pos += 1
+            return _negate(self.factor())
+        if token is not None and token.kind == "lparen" and not self._argument_list():
+            self.pos += 1
+            inner = self.expression()
+            if self.peek() is not None and self.peek().kind == "rparen":
+                self.pos += 1
+            return inner
+        return self.condition()
+
+    def _argument_list(self):
+        """Whether the group at ``pos`` holds no connective, e.g. ``RSI(14)`` or ``(RSI < 30)``."""
+        depth = 0
+        for token in self.tokens[self.pos:]:
+            if token.kind == "lparen":
+                depth += 1
+            elif token.kind == "rparen":
+                depth -= 1
+                if depth == 0:
+                    return True
+            elif _is_connective(token):
+                return False
+        return True
+
+    def condition(self):
+        tokens, depth, negated = [], 0, False
+        while True:
+            token = self.peek()
+            if token is None or _is_connective(token):
+                break
+            if token.kind == "lparen":
+                if not self._argument_list():
+                    break
+                depth += 1
+            elif token.kind == "rparen":
+                # Closes an enclosing group unless an argument list is open
+                if depth == 0:
+                    break
+                depth -= 1
+            elif _is_negation(token):
+                negated = not negated
+            else:
+                tokens.append(token)
+            self.pos += 1
+        rule = parse_condition(tokens) if tokens else None
+        if rule is None:
+            return None
+        self.rules.append(rule)
+        return _negate(len(self.rules) - 1) if negated else len(self.rules) - 1
+
+    def parse(self):
+        expression = None
+        while self.pos < len(self.tokens):
+            part = self.expression()
+            expression = part if expression is None else _node("AND", [expression, part])
+            if self.pos < len(self.tokens):
+                # Unbalanced ")" at the top level: skip it and keep going
+                self.pos += 1
+        return tuple(self.rules), expression
+
+
+def _node(op, children):
+    """``(op, *children)`` with unparsed children dropped and same-op children flattened."""
+    flat = []
+    for child in children:
+        if child is None:
+            continue
+        if isinstance(child, tuple) and child[0] == op:
+            flat.extend(child[1:])
+        else:
+            flat.append(child)
+    if not flat:
+        return None
+    return flat[0] if len(flat) == 1 else (op, *flat)
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_canonical(canonical):
+    return _Parser(tokenize(canonical)).parse()
+
+
+def parse(text):
+    """``(rules, expression)`` for ``text``; memoized on its canonical form.
+
+    ``rules`` are the normalized ``(rule_type, operator, value)`` conditions
+    in reading order. ``expression`` combines them: a rule's index,
+    ``("AND" | "OR", *children)``, ``("NOT", child)``, or None when nothing
+    parsed. Both are
+    hashable, and strategies differing only in case, spacing or punctuation
+    parse identically, so together they key cached scans.
+    """
+    return _parse_canonical(canonical_text(text))
+
+
+def parse_rules(text):
+    """The normalized conditions of ``text``, in reading order."""
+    return parse(text)[0]
+
+
+def parse_expression(text):
+    """The boolean expression over ``parse_rules(text)``."""
+    return parse(text)[1]
+
+
+def expression_label(expression, labels):
+    """``expression`` written out with ``labels[i]`` for each rule, e.g. ``A AND (B OR C)``."""
+    if expression is None:
+        return ""
+    if isinstance(expression, int):
+        return labels[expression]
+    op, *children = expression
+    if op == NEGATION:
+        child = children[0]
+        inner = expression_label(child, labels)
+        return f"NOT ({inner})" if isinstance(child, tuple) else f"NOT {inner}"
+    parts = [
+        f"({expression_label(child, labels)})" if isinstance(child, tuple) else expression_label(child, labels)
+        for child in children
+    ]
+    return f" {op} ".join(parts)
@@ -0,0 +1,457 @@
+"""
+Rule Plan Module
+Compile parsed custom rules into vectorized predicates over the whole universe
+"""
+import functools
+import threading
+import time
+
+import numpy as np
+
+
+class LatestValues:
+    """Newest and previous value of each indicator for every symbol, as arrays.
+
+    Rules only read the last two bars, so a scan reduces each symbol's
+    indicator series to two floats per key; a missing indicator is NaN,
+    which every comparison treats as "no match".
+    """
+
+    def __init__(self, symbols, close, values):
+        self.symbols = list(symbols)
+        # (current, previous) arrays over symbols
+        self.close = close
+        self.values = values
+
+    @classmethod
+    def from_indicators(cls, frames, indicator_sets, keys):
+        """Collect ``keys`` from ``{symbol: {key: Series}}`` plus each frame's closes.
+
+        A value can also be a ``(current, previous)`` pair, as streamed
+        indicator states hold them.
+        """
+        symbols = list(indicator_sets)
+        n = len(symbols)
+        close = (np.full(n, np.nan), np.full(n, np.nan))
+        values = {key: (np.full(n, np.nan), np.full(n, np.nan)) for key in keys}
+        for row, sym in enumerate(symbols):
+            _fill(close, row, frames[sym].Close)
+            indicators = indicator_sets[sym]
+            for key, pair in values.items():
+                series = indicators.get(key)
+                if series is not None:
+                    _fill(pair, row, series)
+        return cls(symbols, close, values)
+
+    def take(self, rows):
+        """The values of the symbols at ``rows``, in that order."""
+        return LatestValues(
+            [self.symbols[row] for row in rows],
+            (self.close[0][rows], self.close[1][rows]),
+            {key: (current[rows], previous[rows]) for key, (current, previous) in self.values.items()},
+        )
+
+    def current(self, key):
+        return self.values[key][0] if key in self.values else np.full(len(self.symbols), np.nan)
+
+    def previous(self, key):
+        return self.values[key][1] if key in self.values else np.full(len(self.symbols), np.nan)
+
+
+def _fill(pair, row, series):
+    if isinstance(series, tuple):
+        pair[0][row], pair[1][row] = series
+        return
+    # Same fallbacks as reading .iloc[-1] / .iloc[-2]: one bar counts as its own previous
+    tail = np.asarray(series.to_numpy()[-2:], dtype=np.float64)
+    if len(tail):
+        pair[0][row] = tail[-1]
+        pair[1][row] = tail[0]
+
+
+_COMPARE = {"<": np.less, ">": np.greater, "<=": np.less_equal, ">=": np.greater_equal}
+
+
+class Predicate:
+    """One compiled rule: a boolean mask over the universe plus how a match is reported.
+
+    ``signal`` and ``explanation`` are format strings over ``v`` (the
+    indicator value), ``close`` and ``value`` (the rule's number).
+    """
+
+    key = None
+
+    def __init__(self, score, signal, explanation=None, value=None):
+        self.score = score
+        self.signal = signal
+        self.explanation = explanation
+        self.value = value
+
+    @property
+    def keys(self):
+        return () if self.key is None else (self.key,)
+
+    def mask(self, latest):
+        raise NotImplementedError
+
+    def describe(self, latest, row):
+        """(signal, explanation or None) for the symbol at ``row``."""
+        v = latest.current(self.key)[row] if self.key is not None else np.nan
+        fields = {"v": v, "close": latest.close[0][row], "value": self.value}
+        explanation = self.explanation.format(**fields) if self.explanation else None
+        return self.signal.format(**fields), explanation
+
+
+class Threshold(Predicate):
+    """indicator <op> the rule's number (RSI < 30, ADX > 25, ...)."""
+
+    def __init__(self, key, op, value, score, signal, explanation=None):
+        super().__init__(score, signal, explanation, value=value)
+        self.key = key
+        self.op = op
+
+    def mask(self, latest):
+        return _COMPARE[self.op](latest.current(self.key), self.value)
+
+
+class PriceVersus(Predicate):
+    """close <op> an indicator (price above EMA 50, SuperTrend bullish, ...)."""
+
+    def __init__(self, key, op, score, signal, explanation=None):
+        super().__init__(score, signal, explanation)
+        self.key = key
+        self.op = op
+
+    def mask(self, latest):
+        return _COMPARE[self.op](latest.close[0], latest.current(self.key))
+
+
+class Versus(Predicate):
+    """indicator <op> another indicator (MACD above its signal line)."""
+
+    def __init__(self, key, other, op, score, signal, explanation=None):
+        super().__init__(score, signal, explanation)
+        self.key = key
+        self.other = other
+        self.op = op
+
+    @property
+    def keys(self):
+        return (self.key, self.other)
+
+    def mask(self, latest):
+        return _COMPARE[self.op](latest.current(self.key), latest.current(self.other))
+
+
+class PriceThreshold(Predicate):
+    """close <op> the rule's number."""
+
+    def __init__(self, op, value, score, signal):
+        super().__init__(score, signal, value=value)
+        self.op = op
+
+    def mask(self, latest):
+        return _COMPARE[self.op](latest.close[0], self.value)
+
+
+class Cross(Predicate):
+    """``fast`` crossed ``slow`` on the newest bar (up when ``bullish``)."""
+
+    def __init__(self, fast, slow, bullish, score, signal, explanation=None):
+        super().__init__(score, signal, explanation)
+        self.fast = fast
+        self.slow = slow
+        self.bullish = bullish
+
+    @property
+    def keys(self):
+        return (self.fast, self.slow)
+
+    def mask(self, latest):
+        fast, slow = latest.current(self.fast), latest.current(self.slow)
+        fast_prev, slow_prev = latest.previous(self.fast), latest.previous(self.slow)
+        if self.bullish:
+            return (fast > slow) & (fast_prev <= slow_prev)
+        return (fast < slow) & (fast_prev >= slow_prev)
+
+
+class Never(Predicate):
+    """Parsed rule types the scanner has no check for (ATR, OBV divergence, ...)."""
+
+    def __init__(self):
+        super().__init__(0, "")
+
+    def mask(self, latest):
+        return np.zeros(len(latest.symbols), dtype=bool)
+
+
+def _oscillator(key, name, score, operators=("<", ">"), signal="{name} {{v:.1f}} {op} {{value}}",
+                explanations=None):
+    def compile_rule(operator, value):
+        # ``operators`` are the strict directions; "<=" / ">=" compile with their own comparison
+        if operator not in _COMPARE or operator[0] not in operators:
+            return Never()
+        explanation = (explanations or {}).get(operator[0])
+        return Threshold(key, operator, value, score, signal.format(name=name, op=operator), explanation)
+    return compile_rule
+
+
+def _moving_average(kind, direction):
+    word = "above" if direction == ">" else "below"
+
+    def compile_rule(operator, length):
+        # The rule type fixes the side; an inclusive operator keeps its equality
+        operator = operator if operator in (direction, direction + "=") else direction
+        explanation = f"Price ${{close:.2f}} {operator} {kind}{length} ${{v:.2f}}" if kind == "EMA" else None
+        return PriceVersus(f"{kind}_{length}", operator, 30, f"Price {word} {kind}{length}", explanation)
+    return compile_rule
+
+
+def _either(bullish, bearish):
+    def compile_rule(operator, _):
+        build = {"BULL": bullish, "GOLDEN": bullish, "UPPER": bullish,
+                 "BEAR": bearish, "DEATH": bearish, "LOWER": bearish}.get(operator)
+        return build() if build else Never()
+    return compile_rule
+
+
+# rule type -> compile(operator, value) -> Predicate; scores and wording are the scan's
+_COMPILERS = {
+    "RSI": _oscillator("RSI", "RSI", 30, explanations={
+        "<": "RSI oversold at {v:.1f}", ">": "RSI overbought at {v:.1f}"}),
+    "PRICE_ABOVE_EMA": _moving_average("EMA", ">"),
+    "PRICE_BELOW_EMA": _moving_average("EMA", "<"),
+    "PRICE_ABOVE_SMA": _moving_average("SMA", ">"),
+    "PRICE_BELOW_SMA": _moving_average("SMA", "<"),
+    "VOLUME": lambda op, value: Threshold(
+        "Volume_Ratio", ">=", value, 25, "Volume {v:.1f}x average", "Volume spike: {v:.1f}x normal",
+    ) if op == ">" else Never(),
+    "MACD": _oscillator("MACD", "MACD", 25, signal="{name} {{v:.2f}} {op} {{value}}"),
+    "MACD_SIGNAL": lambda op, value: Versus(
+        "MACD", "MACD_Signal", op, 25, f"MACD {'above' if op[0] == '>' else 'below'} signal",
+    ) if op in _COMPARE else Never(),
+    "MACD_CROSS": _either(
+        lambda: Cross("MACD", "MACD_Signal", True, 35, "MACD Bull Cross", "MACD crossed above signal line"),
+        lambda: Cross("MACD", "MACD_Signal", False, 35, "MACD Bear Cross"),
+    ),
+    "EMA_CROSS": _either(
+        lambda: Cross("EMA_50", "EMA_200", True, 35, "Golden Cross", "EMA50 crossed above EMA200"),
+        lambda: Cross("EMA_50", "EMA_200", False, 35, "Death Cross"),
+    ),
+    "BB_TOUCH": _either(
+        lambda: PriceVersus("BB_Upper", ">=", 25, "Price touched BB Upper"),
+        lambda: PriceVersus("BB_Lower", "<=", 25, "Price touched BB Lower"),
+    ),
+    "STOCH": _oscillator("Stoch_K", "Stoch", 25),
+    "ADX": _oscillator("ADX", "ADX", 30, operators=(">",), signal="{name} {{v:.1f}} {op} {{value}} (strong trend)"),
+    "CCI": _oscillator("CCI", "CCI", 25),
+    "WILLR": _oscillator("Williams_R", "Williams %R", 25),
+    "PRICE_ABOVE_VWAP": lambda op, value: PriceVersus("VWAP", ">", 30, "Price above VWAP", "Bullish VWAP position"),
+    "PRICE_BELOW_VWAP": lambda op, value: PriceVersus("VWAP", "<", 30, "Price below VWAP"),
+    "SUPERTREND": _either(
+        lambda: PriceVersus("SuperTrend", ">", 30, "SuperTrend Bullish"),
+        lambda: PriceVersus("SuperTrend", "<", 30, "SuperTrend Bearish"),
+    ),
+    "PSAR": _either(
+        lambda: PriceVersus("PSAR", ">", 25, "PSAR Bullish"),
+        lambda: PriceVersus("PSAR", "<", 25, "PSAR Bearish"),
+    ),
+    "MFI": _oscillator("MFI", "MFI", 25),
+    "ROC": _oscillator("ROC", "ROC", 25, signal="{name} {{v:.2f}}% {op} {{value}}%"),
+    "AROON_UP": _oscillator("Aroon_Up", "Aroon Up", 25, operators=(">",)),
+    "AROON_DOWN": _oscillator("Aroon_Down", "Aroon Down", 25, operators=(">",)),
+    "PRICE": lambda op, value: PriceThreshold(op, value, 20, f"Price ${{close:.2f}} {op} ${{value}}")
+    if op in _COMPARE else Never(),
+}
+
+
+def combine(expression, masks):
+    """Evaluate a ``rule_grammar`` expression over per-rule masks: AND / OR / NOT become elementwise ops."""
+    if isinstance(expression, int):
+        return masks[expression]
+    op, *children = expression
+    if op == "NOT":
+        return np.logical_not(combine(children[0], masks))
+    reduce = np.logical_and.reduce if op == "AND" else np.logical_or.reduce
+    return reduce([combine(child, masks) for child in children])
+
+
+def leaves(expression):
+    """Rule indexes an expression reads, in order."""
+    if isinstance(expression, int):
+        return [expression]
+    return [index for child in expression[1:] for index in leaves(child)]
+
+
+class RuleStats:
+    """Running pass rates and per-symbol costs of rules, shared across scans.
+
+    Pass rates are kept per rule (``("RSI", "<", 30.0)``) and per rule type,
+    the type's rate standing in for rules not seen yet; costs are per rule
+    type, since the indicators a type reads fix its work. Counts decay so
+    the statistics follow the market rather than its whole history.
+    """
+
+    DECAY = 0.95
+    # Exponential average weight of a new cost sample
+    COST_WEIGHT = 0.2
+
+    def __init__(self):
+        self._passes = {}
+        self._costs = {}
+        self._lock = threading.Lock()
+
+    def record(self, rule, evaluated, passed, seconds):
+        """Fold in one stage: ``passed`` of ``evaluated`` symbols matched ``rule`` in ``seconds``."""
+        if not evaluated:
+            return
+        with self._lock:
+            for key in (rule, rule[0]):
+                seen, matched = self._passes.get(key, (0.0, 0.0))
+                self._passes[key] = (seen * self.DECAY + evaluated, matched * self.DECAY + passed)
+            per_symbol = seconds / evaluated
+            previous = self._costs.get(rule[0])
+            self._costs[rule[0]] = per_symbol if previous is None else (
+                previous + self.COST_WEIGHT * (per_symbol - previous))
+
+    def pass_rate(self, rule):
+        """Estimated share of symbols passing ``rule`` (1/2 with no history)."""
+        with self._lock:
+            seen, matched = self._passes.get(rule) or self._passes.get(rule[0]) or (0.0, 0.0)
+        # Laplace smoothing keeps one lucky scan from pinning a rate to 0 or 1
+        return (matched + 1.0) / (seen + 2.0)
+
+    def cost(self, rule, default):
+        """Seconds per symbol to evaluate ``rule``, ``default`` until measured."""
+        with self._lock:
+            return self._costs.get(rule[0], default)
+
+    def snapshot(self):
+        """{rule type: (pass rate, seconds per symbol or None)}."""
+        with self._lock:
+            types = {key for key in self._passes if isinstance(key, str)}
+            return {
+                rule_type: ((self._passes[rule_type][1] + 1.0) / (self._passes[rule_type][0] + 2.0),
+                            self._costs.get(rule_type))
+                for rule_type in sorted(types)
+            }
+
+
+class RulePlan:
+    """Parsed rules compiled once into predicates evaluated for the whole universe at a time.
+
+    ``expression`` combines the rules (see ``rule_grammar.parse``); None
+    requires every rule, as a plain list of rules always has.
+    """
+
+    def __init__(self, rules, expression=None):
+        self.rules = list(rules)
+        self.expression = expression
+        self.predicates = [
+            _COMPILERS[rule_type](operator, value) if rule_type in _COMPILERS else Never()
+            for rule_type, operator, value in self.rules
+        ]
+
+    @property
+    def keys(self):
+        """Indicator keys the predicates read."""
+        return {key for predicate in self.predicates for key in predicate.keys}
+
+    def masks(self, latest):
+        """One boolean array over ``latest.symbols`` per rule."""
+        with np.errstate(invalid="ignore"):
+            return [np.asarray(predicate.mask(latest), dtype=bool) for predicate in self.predicates]
+
+    def evaluate(self, latest):
+        """(per-rule masks, mask of symbols satisfying the expression)."""
+        masks = self.masks(latest)
+        if not masks:
+            return masks, np.zeros(len(latest.symbols), dtype=bool)
+        if self.expression is None:
+            return masks, np.logical_and.reduce(masks)
+        return masks, combine(self.expression, masks)
+
+    @property
+    def conjuncts(self):
+        """Top-level parts that must all hold: each can eliminate symbols before the next runs."""
+        if self.expression is None:
+            return list(range(len(self.predicates)))
+        if isinstance(self.expression, tuple) and self.expression[0] == "AND":
+            return list(self.expression[1:])
+        return [self.expression]
+
+    def _estimate(self, expression, stats, prior_cost):
+        # (seconds per symbol, pass rate) of a sub-expression, treating rules as independent
+        if isinstance(expression, int):
+            rule = self.rules[expression]
+            return stats.cost(rule, prior_cost(self.predicates[expression].keys)), stats.pass_rate(rule)
+        estimates = [self._estimate(child, stats, prior_cost) for child in expression[1:]]
+        cost = sum(c for c, _ in estimates)
+        if expression[0] == "NOT":
+            return cost, 1.0 - estimates[0][1]
+        if expression[0] == "AND":
+            return cost, float(np.prod([p for _, p in estimates]))
+        return cost, 1.0 - float(np.prod([1.0 - p for _, p in estimates]))
+
+    def order(self, stats, prior_cost):
+        """Conjuncts cheapest-per-symbol-eliminated first: ascending cost / (1 - pass rate).
+
+        That ratio orders independent filters optimally; it puts a cheap
+        selective check ahead of an expensive one that rarely rejects.
+        """
+        def rank(conjunct):
+            cost, rate = self._estimate(conjunct, stats, prior_cost)
+            return cost / max(1.0 - rate, 1e-6)
+        return sorted(self.conjuncts, key=rank)
+
+    def evaluate_staged(self, symbols, latest_for, stats, prior_cost):
+        """Evaluate conjunct by conjunct, each only on the symbols every earlier one kept.
+
+        ``latest_for(symbols, keys)`` returns ``LatestValues`` for just those
+        symbols, so indicators of later conjuncts are never computed for
+        eliminated symbols. ``prior_cost(keys)`` guesses seconds per symbol
+        for rule types ``stats`` has not timed yet.
+
+        Returns (per-rule masks, matched mask, per-rule count of symbols the
+        rule was evaluated on); a rule's mask is False where it was skipped.
+        """
+        n = len(symbols)
+        masks = [np.zeros(n, dtype=bool) for _ in self.predicates]
+        evaluated = [0] * len(self.predicates)
+        alive = np.ones(n, dtype=bool) if self.predicates else np.zeros(n, dtype=bool)
+        for conjunct in self.order(stats, prior_cost):
+            rows = np.flatnonzero(alive)
+            if not len(rows):
+                break
+            members = leaves(conjunct)
+            keys = {key for index in members for key in self.predicates[index].keys}
+            started = time.perf_counter()
+            latest = latest_for([symbols[row] for row in rows], keys)
+            with np.errstate(invalid="ignore"):
+                for index in members:
+                    masks[index][rows] = np.asarray(self.predicates[index].mask(latest), dtype=bool)
+                    evaluated[index] = len(rows)
+            elapsed = (time.perf_counter() - started) / len(members)
+            for index in members:
+                stats.record(self.rules[index], len(rows), int(masks[index][rows].sum()), elapsed)
+            alive &= combine(conjunct, masks)
+        return masks, alive, evaluated
+
+    def describe(self, latest, row, masks):
+        """(score, signals, explanation parts) for the symbol at ``row``, in rule order."""
+        score, signals, explanations = 0, [], []
+        for predicate, mask in zip(self.predicates, masks):
+            if not mask[row]:
+                continue
+            signal, explanation = predicate.describe(latest, row)
+            score += predicate.score
+            signals.append(signal)
+            if explanation:
+                explanations.append(explanation)
+        return score, signals, explanations
+
+
+@functools.lru_cache(maxsize=256)
+def compile_rules(rules, expression=None):
+    """``RulePlan`` for a tuple of ``parse_custom_rules()`` output, compiled once per distinct strategy."""
+    return RulePlan(rules, expression)
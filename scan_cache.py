@@ -0,0 +1,127 @@
+"""
+Scan Cache Module
+Single-flight scan results with stale-while-revalidate
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapse concurrent calls for the same key into one execution.
+
+    The first caller runs ``fn``; everyone arriving while it is running waits
+    and receives the same result (or exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def in_flight(self, key):
+        with self._lock:
+            return key in self._calls
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+class ScanCache:
+    """Process-wide TTL cache for scan results.
+
+    * Fresh entries (younger than ``ttl``) are returned as-is.
+    * Stale entries (younger than ``ttl + stale_ttl``) are returned instantly
+      while one background refresh runs.
+    * Missing or expired entries are computed once; concurrent callers for the
+      same key wait on that single computation.
+
+    Cached values are shared between sessions and must not be mutated.
+    """
+
+    def __init__(self, ttl=900, stale_ttl=3600, max_entries=256):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _store(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def age(self, key):
+        """Seconds since ``key`` was computed, or None if it is not cached."""
+        entry = self._lookup(key)
+        return time.time() - entry[0] if entry is not None else None
+
+    def refresh(self, key, compute):
+        """Recompute ``key`` now (joining a refresh already in flight) and return the value."""
+        def run():
+            value = compute()
+            self._store(key, value)
+            return value
+        return self._flight.do(key, run)
+
+    def refresh_in_background(self, key, compute):
+        """Start a refresh of ``key`` unless one is already running."""
+        if self._flight.in_flight(key):
+            return
+
+        def run():
+            try:
+                self.refresh(key, compute)
+            except Exception:
+                pass  # keep serving the stale value; the next request retries
+
+        threading.Thread(target=run, name=f"scan-refresh-{key!r}", daemon=True).start()
+
+    def get(self, key, compute):
+        entry = self._lookup(key)
+        if entry is not None:
+            computed_at, value = entry
+            age = time.time() - computed_at
+            if age < self.ttl:
+                return value
+            if age < self.ttl + self.stale_ttl:
+                self.refresh_in_background(key, compute)
+                return value
+        return self.refresh(key, compute)
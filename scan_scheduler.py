@@ -0,0 +1,141 @@
+"""
+Scan Scheduler Module
+Background pre-warming of Quick Snipe results and rebuilds when new bars land
+"""
+import threading
+import time
+from datetime import datetime
+from datetime import time as dtime
+from zoneinfo import ZoneInfo
+
+NEW_YORK = ZoneInfo("America/New_York")
+MARKET_OPEN = dtime(9, 30)
+# Keep refreshing a little past the bell so the closing bar lands in the cache
+MARKET_CLOSE_GRACE = dtime(16, 20)
+
+
+def us_market_open(now=None):
+    """True during the regular US equity session (holidays are not modelled)."""
+    now = (now or datetime.now(tz=NEW_YORK)).astimezone(NEW_YORK)
+    return now.weekday() < 5 and MARKET_OPEN <= now.time() < MARKET_CLOSE_GRACE
+
+
+def always_open(now=None):
+    return True
+
+
+class PrewarmJob:
+    """One cache key recomputed on a cadence while ``is_active()`` holds."""
+
+    def __init__(self, key, compute, is_active=always_open):
+        self.key = key
+        self.compute = compute
+        self.is_active = is_active
+        self.last_run = 0.0
+        self.last_error = None
+
+
+class PrewarmScheduler:
+    """Daemon thread that keeps ScanCache entries fresh.
+
+    Active jobs are recomputed every ``interval`` seconds, which should be
+    shorter than the cache TTL so a click never lands on an expired entry.
+    Inactive jobs (e.g. stocks outside market hours) are only recomputed when
+    their entry is about to fall out of the stale window entirely - the data
+    isn't moving, so the last result stays correct.
+    """
+
+    def __init__(self, cache, jobs, interval=600):
+        self.cache = cache
+        self.jobs = list(jobs)
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="scan-prewarm", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _due(self, job, now):
+        if job.is_active():
+            return now - job.last_run >= self.interval
+        age = self.cache.age(job.key)
+        return age is None or age >= self.cache.ttl + self.cache.stale_ttl - self.interval
+
+    def run_pending(self):
+        """Run every due job once; jobs run one after another to spare the upstream."""
+        for job in self.jobs:
+            if self._stop.is_set():
+                return
+            now = time.time()
+            if not self._due(job, now):
+                continue
+            try:
+                self.cache.refresh(job.key, job.compute)
+                job.last_error = None
+            except Exception as exc:
+                job.last_error = exc
+            job.last_run = time.time()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.run_pending()
+            self._stop.wait(min(60, self.interval))
+
+
+_UNSEEN = object()
+
+
+class VersionWatcher:
+    """Daemon thread that calls ``on_change()`` whenever ``version()`` moves.
+
+    For derived data keyed on the bars rather than on a cache entry's age:
+    nothing runs while the version stays put, and a change is picked up
+    within ``interval`` seconds. The version is read before ``on_change``
+    runs, so bars that land mid-run trigger one more pass.
+    """
+
+    def __init__(self, version, on_change, interval=30, name="version-watch"):
+        self.version = version
+        self.on_change = on_change
+        self.interval = interval
+        self.name = name
+        self.seen = _UNSEEN
+        self.last_error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def check(self):
+        """Run ``on_change`` once if the version differs from the last one handled."""
+        try:
+            version = self.version()
+            if version == self.seen:
+                return False
+            self.on_change()
+            self.seen = version
+            self.last_error = None
+            return True
+        except Exception as exc:
+            self.last_error = exc
+            return False
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.check()
+            self._stop.wait(self.interval)
@@ -0,0 +1,665 @@
+"""
+Scanner Module
+Universes, custom rule parsing and the scan pipeline behind the app
+"""
+
+import os
+
+import numpy as np
+import pandas_ta as ta
+import plotly.graph_objects as go
+
+from indicator_cache import frame_key
+from indicator_panel import panel_indicators, supported_keys
+from market_data import slice_window
+from rule_grammar import expression_label, parse_expression, parse_rules
+from rule_plan import LatestValues, RuleStats, compile_rules
+from ta_indicators import calculate_all_indicators, tail_frame
+
+def _dedupe_symbols(symbols):
+    seen = set()
+    ordered = []
+    for sym in symbols:
+        if sym not in seen:
+            seen.add(sym)
+            ordered.append(sym)
+    return ordered
+
+
+# One history window for every scanner. The loader (shared price panel in the
+# app) keeps a single copy per symbol; each scan slices what it needs.
+HISTORY_PERIOD = "2y"
+# Quick Snipe charts only show the recent bars
+QUICK_CHART_PERIOD = "6mo"
+# Bar interval the loaders return
+SCAN_INTERVAL = "1d"
+# Evaluate custom rules stage by stage, dropping symbols as soon as a rule fails
+RULE_SHORT_CIRCUIT = os.getenv("RULE_SHORT_CIRCUIT", "1") == "1"
+
+TOP_CRYPTO_SYMBOLS = [
+    "BTC-USD","ETH-USD","SOL-USD","XRP-USD","DOGE-USD","ADA-USD","AVAX-USD","MATIC-USD","LINK-USD","BNB-USD",
+    "DOT-USD","LTC-USD","ATOM-USD","FIL-USD","OP-USD","ARB-USD","PEPE-USD","BONK-USD","TIA-USD","RUNE-USD",
+]
+EMERGING_CRYPTO_SYMBOLS = [
+    "SUI-USD","APT-USD","INJ-USD","AAVE-USD","PYTH-USD","IMX-USD","NEAR-USD","HBAR-USD","SEI-USD","WIF-USD",
+]
+TOP_STOCK_SYMBOLS = [
+    "NVDA","TSLA","AAPL","MSFT","GOOGL","AMZN","META","NFLX","AMD","SMCI",
+    "AVGO","ASML","SHOP","SNOW","UBER","PLTR","COIN","MARA","RIOT","SQ",
+]
+GROWTH_STOCK_SYMBOLS = [
+    "CELH","CRWD","SPOT","ROKU","ABNB","PYPL","AI","NIO","OXY","ARKK",
+]
+
+CUSTOM_CRYPTO_SYMBOLS = _dedupe_symbols(TOP_CRYPTO_SYMBOLS + EMERGING_CRYPTO_SYMBOLS + [
+    "HBAR-USD","XLM-USD","VET-USD","GRT-USD","ALGO-USD","ETC-USD","TRX-USD","FLOW-USD","SAND-USD","GALA-USD",
+])
+CUSTOM_STOCK_SYMBOLS = _dedupe_symbols(TOP_STOCK_SYMBOLS + GROWTH_STOCK_SYMBOLS + [
+    "BABA","DIS","NVDA","MSFT","META","AMAT","NVDS","TQQQ","IWM","QQQ",
+])
+CUSTOM_ALL_SYMBOLS = _dedupe_symbols(CUSTOM_CRYPTO_SYMBOLS + CUSTOM_STOCK_SYMBOLS)
+
+QUICK_SNIPE_UNIVERSES = {
+    "All": _dedupe_symbols(TOP_CRYPTO_SYMBOLS + TOP_STOCK_SYMBOLS),
+    "Crypto": TOP_CRYPTO_SYMBOLS,
+    "Stocks": TOP_STOCK_SYMBOLS,
+}
+
+CUSTOM_RULE_UNIVERSES = {
+    "All": CUSTOM_ALL_SYMBOLS,
+    "Crypto": CUSTOM_CRYPTO_SYMBOLS,
+    "Stocks": CUSTOM_STOCK_SYMBOLS,
+}
+
+
+def parse_custom_rules(rule_text):
+    """Parse custom rules from natural language into ``(rule_type, operator, value)`` tuples.
+
+    See ``rule_grammar``; parses are memoized on the text's canonical form.
+    """
+    return list(parse_rules(rule_text))
+
+
+def parse_rule_expression(rule_text):
+    """How the rules of ``rule_text`` combine: a rule index, ``("AND" | "OR", *children)`` or ``("NOT", child)``.
+
+    NOT binds tightest, then AND, then OR, and parentheses group, so
+    ``RSI < 30 OR Stoch < 20 AND NOT ADX > 25`` is ``("OR", 0, ("AND", 1, ("NOT", 2)))``.
+    """
+    return parse_expression(rule_text)
+
+
+def rule_to_label(rule):
+    rule_type, operator, value = rule
+    if rule_type in ("PRICE_ABOVE_EMA", "PRICE_BELOW_EMA"):
+        return f"Price {operator} EMA{value}"
+    if rule_type in ("PRICE_ABOVE_SMA", "PRICE_BELOW_SMA"):
+        return f"Price {operator} SMA{value}"
+    if rule_type == "RSI":
+        return f"RSI {operator} {value}"
+    if rule_type == "VOLUME":
+        return f"Volume {operator} {value}x avg"
+    if rule_type == "MACD":
+        return f"MACD {operator} {value}"
+    if rule_type == "MACD_SIGNAL":
+        return f"MACD {operator} signal"
+    if rule_type == "MACD_CROSS":
+        return f"MACD {operator} cross"
+    if rule_type == "EMA_CROSS":
+        return f"{operator.title()} Cross"
+    if rule_type == "BB_TOUCH":
+        return f"Bollinger {operator} touch"
+    if rule_type == "STOCH":
+        return f"Stochastic {operator} {value}"
+    if rule_type == "ADX":
+        return f"ADX {operator} {value}"
+    if rule_type == "ATR":
+        return f"ATR {operator} {value}"
+    if rule_type == "CCI":
+        return f"CCI {operator} {value}"
+    if rule_type == "WILLR":
+        return f"Williams %R {operator} {value}"
+    if rule_type == "OBV_DIVERGENCE":
+        return "OBV divergence"
+    if rule_type == "PRICE_ABOVE_VWAP":
+        return "Price > VWAP"
+    if rule_type == "PRICE_BELOW_VWAP":
+        return "Price < VWAP"
+    if rule_type == "SUPERTREND":
+        return f"SuperTrend {operator}"
+    if rule_type == "PSAR":
+        return f"Parabolic SAR {operator}"
+    if rule_type == "AROON_UP":
+        return f"Aroon Up {operator} {value}"
+    if rule_type == "AROON_DOWN":
+        return f"Aroon Down {operator} {value}"
+    if rule_type == "MFI":
+        return f"MFI {operator} {value}"
+    if rule_type == "ROC":
+        return f"ROC {operator} {value}"
+    if rule_type == "PRICE":
+        return f"Price {operator} {value}"
+    return rule_type
+
+
+# Indicator keys each rule type reads; EMA/SMA rules read the length they carry
+RULE_INDICATORS = {
+    "RSI": ("RSI",),
+    "VOLUME": ("Volume_Ratio",),
+    "MACD": ("MACD",),
+    "MACD_SIGNAL": ("MACD", "MACD_Signal"),
+    "MACD_CROSS": ("MACD", "MACD_Signal"),
+    "EMA_CROSS": ("EMA_50", "EMA_200"),
+    "BB_TOUCH": ("BB_Upper", "BB_Lower"),
+    "STOCH": ("Stoch_K",),
+    "ADX": ("ADX",),
+    "ATR": ("ATR",),
+    "CCI": ("CCI",),
+    "WILLR": ("Williams_R",),
+    "OBV_DIVERGENCE": ("OBV",),
+    "PRICE_ABOVE_VWAP": ("VWAP",),
+    "PRICE_BELOW_VWAP": ("VWAP",),
+    "SUPERTREND": ("SuperTrend",),
+    "PSAR": ("PSAR",),
+    "AROON_UP": ("Aroon_Up",),
+    "AROON_DOWN": ("Aroon_Down",),
+    "MFI": ("MFI",),
+    "ROC": ("ROC",),
+}
+
+# Always drawn on custom-rule charts
+CHART_INDICATORS = ("EMA_50", "EMA_200")
+
+
+def rule_indicators(rules):
+    """Indicator keys the rule checks read for ``rules``."""
+    keys = set()
+    for rule_type, _, value in rules:
+        if rule_type in ("PRICE_ABOVE_EMA", "PRICE_BELOW_EMA"):
+            keys.add(f"EMA_{value}")
+        elif rule_type in ("PRICE_ABOVE_SMA", "PRICE_BELOW_SMA"):
+            keys.add(f"SMA_{value}")
+        else:
+            keys.update(RULE_INDICATORS.get(rule_type, ()))
+    return keys
+
+
+# Seconds per symbol assumed for a rule type before it has been timed: panel
+# keys cost one vectorized pass over the universe, the rest a pass per symbol
+_PANEL_COST = 2e-5
+_SYMBOL_COST = 2e-3
+
+
+def _prior_cost(keys):
+    return _PANEL_COST if supported_keys(keys) >= set(keys) else _SYMBOL_COST
+
+
+def required_indicators(rules):
+    """Indicator keys needed to evaluate and chart ``rules``."""
+    return rule_indicators(rules) | set(CHART_INDICATORS)
+
+
+def classify_bias(signals):
+    """Rudimentary sentiment classifier driven by signal wording."""
+    if not signals:
+        return "Neutral"
+    bull_keywords = ["above", "bull", "golden", "oversold", "support", "spike", "breakout", "accumulation"]
+    bear_keywords = ["below", "bear", "death", "overbought", "resistance", "sell", "short", "breakdown"]
+    bull_hits = sum(any(keyword in signal.lower() for keyword in bull_keywords) for signal in signals)
+    bear_hits = sum(any(keyword in signal.lower() for keyword in bear_keywords) for signal in signals)
+    if bull_hits > bear_hits:
+        return "Bullish"
+    if bear_hits > bull_hits:
+        return "Bearish"
+    return "Neutral"
+
+
+def action_from_bias(bias, score):
+    """Map bias + score to a plain-English trading action."""
+    if bias == "Bullish":
+        return "Potential BUY setup" if score >= 60 else "Bullish but wait for confirmation"
+    if bias == "Bearish":
+        return "Potential SELL / hedge setup" if score >= 60 else "Bearish but patience is advised"
+    return "Indecisive - stay on watch"
+
+
+def build_ai_summary(symbol, timeframe, score, price, change_pct, bias, signals, action, extra_context=None):
+    """Generate a human-readable narrative for the scan result."""
+    key_signals = ", ".join(signals[:3]) if signals else "no major signals"
+    change_str = f"{change_pct:+.2f}%" if change_pct is not None else "0.00%"
+    bias_text = bias.lower() if bias != "Neutral" else "mixed"
+    context = ""
+    if extra_context:
+        context_bits = [part for part in extra_context if part]
+        if context_bits:
+            context = f" Notables: {', '.join(context_bits[:2])}."
+    return (
+        f"{symbol} on the {timeframe} chart looks {bias_text} (score {score}/100). "
+        f"Price is near ${price:,.2f} ({change_str} today) with signals such as {key_signals}. "
+        f"{action}.{context}"
+    ).strip()
+
+def create_enhanced_chart(df, sym_clean, score, indicators=None, rules=None):
+    """Create a high-quality Plotly chart with premium styling."""
+    fig = go.Figure()
+    
+    # Enhanced candlesticks with thicker lines and better colors
+    fig.add_trace(
+        go.Candlestick(
+            x=df.index,
+            open=df.Open,
+            high=df.High,
+            low=df.Low,
+            close=df.Close,
+            name="Price",
+            increasing_line_color="#00ff88",
+            decreasing_line_color="#ff4d4d",
+            increasing_fillcolor="#00ff88",
+            decreasing_fillcolor="#ff4d4d",
+            line=dict(width=2),
+            whiskerwidth=0.8,
+        )
+    )
+    
+    # Add EMAs with thicker, smoother lines
+    if indicators:
+        if indicators.get('EMA_50') is not None:
+            ema50 = indicators['EMA_50']
+            fig.add_trace(go.Scatter(
+                x=df.index,
+                y=ema50,
+                name="EMA50",
+                line=dict(color="#ffb347", width=2.5, smoothing=1.3),
+                opacity=0.9,
+            ))
+        if indicators.get('EMA_200') is not None:
+            ema200 = indicators['EMA_200']
+            fig.add_trace(go.Scatter(
+                x=df.index,
+                y=ema200,
+                name="EMA200",
+                line=dict(color="#9b59b6", width=2.5, smoothing=1.3),
+                opacity=0.9,
+            ))
+        
+        # Add Bollinger Bands if used
+        if rules and any(r[0] == "BB_TOUCH" for r in rules):
+            if indicators.get('BB_Upper') is not None:
+                fig.add_trace(go.Scatter(
+                    x=df.index,
+                    y=indicators['BB_Upper'],
+                    name="BB Upper",
+                    line=dict(color="#2980b9", dash="dash", width=1.5),
+                    opacity=0.7,
+                ))
+            if indicators.get('BB_Lower') is not None:
+                fig.add_trace(go.Scatter(
+                    x=df.index,
+                    y=indicators['BB_Lower'],
+                    name="BB Lower",
+                    line=dict(color="#2980b9", dash="dash", width=1.5),
+                    opacity=0.7,
+                ))
+        
+        # Add VWAP if used
+        if rules and any(r[0] in ["PRICE_ABOVE_VWAP", "PRICE_BELOW_VWAP"] for r in rules):
+            if indicators.get('VWAP') is not None:
+                fig.add_trace(go.Scatter(
+                    x=df.index,
+                    y=indicators['VWAP'],
+                    name="VWAP",
+                    line=dict(color="#f1c40f", width=2, dash="dot"),
+                    opacity=0.8,
+                ))
+    else:
+        # Fallback for Quick Snipe (no indicators dict)
+        if "EMA50" in df.columns:
+            fig.add_trace(go.Scatter(
+                x=df.index,
+                y=df.EMA50,
+                name="EMA50",
+                line=dict(color="#ffb347", width=2.5, smoothing=1.3),
+                opacity=0.9,
+            ))
+        if "EMA200" in df.columns:
+            fig.add_trace(go.Scatter(
+                x=df.index,
+                y=df.EMA200,
+                name="EMA200",
+                line=dict(color="#9b59b6", width=2.5, smoothing=1.3),
+                opacity=0.9,
+            ))
+    
+    # Enhanced volume bars
+    if "Volume" in df.columns and not df["Volume"].isna().all():
+        fig.add_trace(
+            go.Bar(
+                x=df.index,
+                y=df["Volume"],
+                name="Volume",
+                marker=dict(
+                    color="rgba(0,255,136,0.35)",
+                    line=dict(color="rgba(0,255,136,0.5)", width=0.5),
+                ),
+                yaxis="y2",
+                opacity=0.6,
+            )
+        )
+    
+    # Premium layout with enhanced styling
+    fig.update_layout(
+        height=580,
+        title=dict(
+            text=f"{sym_clean} – Score {score}/100",
+            font=dict(size=20, color="#e6f8ff", family="Arial Black, sans-serif"),
+            x=0.5,
+        ),
+        template="plotly_dark",
+        paper_bgcolor="#0a0e1a",
+        plot_bgcolor="#0a0e1a",
+        xaxis=dict(
+            gridcolor="rgba(255,255,255,0.1)",
+            gridwidth=1,
+            showgrid=True,
+            zeroline=False,
+            tickfont=dict(color="#a0a0a0", size=11),
+        ),
+        yaxis=dict(
+            title=dict(text="Price", font=dict(color="#00ff88", size=13)),
+            gridcolor="rgba(255,255,255,0.1)",
+            gridwidth=1,
+            showgrid=True,
+            zeroline=False,
+            tickfont=dict(color="#a0a0a0", size=11),
+        ),
+        yaxis2=dict(
+            title=dict(text="Volume", font=dict(color="#00ff88", size=13)),
+            overlaying="y",
+            side="right",
+            showgrid=False,
+            rangemode="tozero",
+            tickfont=dict(color="#00ff88", size=10),
+        ),
+        xaxis_rangeslider_visible=False,
+        hovermode="x unified",
+        margin=dict(l=50, r=50, t=70, b=50),
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1,
+            bgcolor="rgba(10,14,26,0.8)",
+            bordercolor="rgba(0,255,136,0.3)",
+            borderwidth=1,
+            font=dict(color="#e6f8ff", size=11),
+        ),
+        hoverlabel=dict(
+            bgcolor="rgba(0,0,0,0.9)",
+            bordercolor="#00ff88",
+            font=dict(color="#e6f8ff", size=12),
+        ),
+    )
+    
+    return fig
+
+
+def scan_indicators(frames, keys, indicator_cache=None):
+    """{symbol: {key: series}} of ``keys`` for every frame.
+
+    Panel-supported keys are computed for the whole universe in one
+    vectorized pass, the rest per symbol. With an ``IndicatorCache`` only
+    the (symbol, key) pairs it does not already hold are computed.
+    """
+    cached, missing, addresses = {}, {}, {}
+    for sym, df in frames.items():
+        if indicator_cache is None:
+            cached[sym], missing[sym] = {}, set(keys)
+        else:
+            addresses[sym] = frame_key(sym, SCAN_INTERVAL, df)
+            cached[sym], missing[sym] = indicator_cache.lookup(addresses[sym], keys)
+
+    panel_keys = supported_keys(set().union(*missing.values()))
+    panel_frames = {sym: frames[sym] for sym, todo in missing.items() if todo & panel_keys}
+    panel_sets = panel_indicators(panel_frames, panel_keys) if panel_frames else {}
+
+    results = {}
+    for sym, df in frames.items():
+        todo = missing[sym]
+        computed = {key: series for key, series in panel_sets.get(sym, {}).items() if key in todo}
+        if todo - panel_keys:
+            computed.update(calculate_all_indicators(df, only=todo - panel_keys))
+        if indicator_cache is not None:
+            computed = indicator_cache.store(addresses[sym], computed, todo, df.index)
+        indicators = {**cached[sym], **computed}
+        results[sym] = {key: series for key, series in indicators.items() if series is not None}
+    return results
+
+
+def rule_indicator_sets(frames, eval_frames, keys, indicator_cache=None, indicator_states=None):
+    """``scan_indicators`` over ``eval_frames``, with streaming keys read from ``indicator_states``.
+
+    ``IndicatorStates`` advances each symbol's state with the new bars of
+    its full frame in ``frames`` and contributes ``(current, previous)``
+    pairs; only the keys without a streaming state are computed.
+    """
+    streamed, streamed_keys = {}, set()
+    if indicator_states is not None:
+        streamed, streamed_keys = indicator_states.latest(
+            {sym: frames[sym] for sym in eval_frames}, keys, SCAN_INTERVAL,
+        )
+    indicator_sets = scan_indicators(eval_frames, set(keys) - streamed_keys, indicator_cache)
+    for sym, values in streamed.items():
+        indicator_sets[sym].update(values)
+    return indicator_sets
+
+
+def _evaluation_error(exc):
+    return f"evaluation error: {exc.__class__.__name__}: {exc}"
+
+
+def run_custom_rule_scan(rules, universe_key, load, indicator_cache=None, expression=None, rule_stats=None,
+                         signal_index=None, indicator_states=None):
+    """Evaluate parsed ``rules`` across a custom-rule universe.
+
+    ``load(symbols, period)`` returns ``(frames, failures)``; the app passes
+    the shared price panel, benchmarks can pass ``source_loader(...)``.
+    An ``IndicatorCache`` lets repeated scans of unchanged bars reuse series.
+    ``expression`` (from ``parse_rule_expression``) combines the rules with
+    AND / OR; by default a symbol must match every rule. ``rule_stats`` is a
+    ``RuleStats`` shared across scans to order the rules by measured cost
+    and selectivity; each rule's tally then counts matches among the
+    symbols that reached it (``rule_evaluated``). A current ``SignalIndex``
+    answers rules over the indicators it stores without computing any.
+    ``indicator_states`` (an ``IndicatorStates``) supplies the streaming
+    indicators from per-symbol state advanced with the newly loaded bars.
+    Symbols that could not be fetched or evaluated are reported with a
+    reason in the debug summary's ``failed_symbols``.
+    """
+    results = []
+    symbols = CUSTOM_RULE_UNIVERSES.get(universe_key, CUSTOM_ALL_SYMBOLS)
+    scan_targets = symbols[:500]
+    total_targets = len(scan_targets)
+    rule_labels = [rule_to_label(r) for r in rules]
+    needed = rule_indicators(rules)
+    
+    # Full shared history so EMA200 and friends are warmed up
+    frames, fetch_failures = load(scan_targets, HISTORY_PERIOD)
+    failures = dict(fetch_failures)
+    # Rules only read the last two bars, so evaluate on the trailing history
+    # that still pins those down; matches get full-length series for the chart
+    eval_frames = {
+        sym: tail_frame(frames[sym], needed) for sym in scan_targets
+        if sym in frames and len(frames[sym]) >= 60
+    }
+    plan = compile_rules(tuple(rules), expression)
+    answer = signal_index.lookup(plan, frames, list(eval_frames)) if signal_index is not None else None
+    if answer is not None:
+        # Precomputed bitmaps for these exact bars: a bitmap intersection per query
+        latest, masks, matched = answer
+        rule_evaluated = [len(eval_frames)] * len(masks)
+    elif RULE_SHORT_CIRCUIT:
+        # Conjunct by conjunct, cheapest and most selective first; indicators
+        # of later conjuncts are computed only for symbols still in the running
+        indicator_sets = {sym: {} for sym in eval_frames}
+
+        def latest_for(syms, keys):
+            computed = rule_indicator_sets(
+                frames, {sym: eval_frames[sym] for sym in syms}, keys, indicator_cache, indicator_states,
+            )
+            for sym in syms:
+                indicator_sets[sym].update(computed[sym])
+            return LatestValues.from_indicators(frames, {sym: indicator_sets[sym] for sym in syms}, keys)
+
+        masks, matched, rule_evaluated = plan.evaluate_staged(
+            list(eval_frames), latest_for, rule_stats if rule_stats is not None else RuleStats(), _prior_cost,
+        )
+        latest = LatestValues.from_indicators(frames, indicator_sets, plan.keys)
+    else:
+        # Every rule for every symbol at once; only matches are handled per symbol
+        indicator_sets = rule_indicator_sets(frames, eval_frames, needed, indicator_cache, indicator_states)
+        latest = LatestValues.from_indicators(frames, indicator_sets, plan.keys)
+        masks, matched = plan.evaluate(latest)
+        rule_evaluated = [len(eval_frames)] * len(masks)
+    rule_tally = [int(mask.sum()) for mask in masks]
+
+    for row in np.flatnonzero(matched):
+        sym = latest.symbols[row]
+        try:
+            df = frames[sym]
+            latest_bar = df.iloc[-1]
+            prev = df.iloc[-2] if len(df) > 1 else latest_bar
+            score, signals, explanation_parts = plan.describe(latest, row, masks)
+
+            sym_clean = sym.replace("-USD","")
+            timeframe_label = "1D (Daily)"
+            change_pct = float(((latest_bar.Close - prev.Close) / prev.Close) * 100) if prev.Close != 0 else 0.0
+            price_val = float(latest_bar.Close)
+
+            # Create enhanced chart with premium styling
+            chart_keys = required_indicators(rules)
+            if indicator_cache is not None:
+                chart_indicators = indicator_cache.get(sym, SCAN_INTERVAL, df, chart_keys, calculate_all_indicators)
+            else:
+                chart_indicators = calculate_all_indicators(df, only=chart_keys)
+            fig = create_enhanced_chart(df, sym_clean, score, chart_indicators, rules)
+            fig.update_layout(title=dict(text=f"{sym_clean} – Custom Rules Match (Score: {score}/100)"))
+
+            figure_dict = fig.to_dict()
+            explanation = " | ".join(explanation_parts) if explanation_parts else "Matches your custom rules"
+            bias = classify_bias(signals)
+            action = action_from_bias(bias, score)
+            narrative = build_ai_summary(
+                sym_clean,
+                timeframe_label,
+                score,
+                price_val,
+                change_pct,
+                bias,
+                signals,
+                action,
+                explanation_parts,
+            )
+
+            results.append({
+                "sym": sym_clean,
+                "score": score,
+                "signals": signals,
+                "figure": figure_dict,
+                "explanation": explanation,
+                "timeframe": timeframe_label,
+                "bias": bias,
+                "action": action,
+                "narrative": narrative,
+                "price": price_val,
+                "change_pct": change_pct,
+            })
+        except Exception as exc:
+            failures[sym] = _evaluation_error(exc)
+    
+    debug_summary = {
+        "rule_labels": rule_labels,
+        "rule_tally": rule_tally,
+        "rule_evaluated": rule_evaluated,
+        "expression": expression_label(expression, rule_labels) if expression is not None else None,
+        "total_symbols": total_targets,
+        "failed_symbols": failures,
+    }
+    return sorted(results, key=lambda x: x["score"], reverse=True), None, debug_summary
+
+
+def run_quick_scan(universe_key, load, failures=None):
+    """Score a Quick Snipe universe; ``load`` works as in run_custom_rule_scan().
+
+    ``failures``, when given, is filled with ``{symbol: reason}`` for symbols
+    that could not be fetched or evaluated.
+    """
+    results = []
+    failures = {} if failures is None else failures
+    symbols = QUICK_SNIPE_UNIVERSES.get(universe_key, QUICK_SNIPE_UNIVERSES["All"])
+    frames, fetch_failures = load(symbols, HISTORY_PERIOD)
+    failures.update(fetch_failures)
+    
+    for sym in symbols:
+        try:
+            df = frames.get(sym)
+            if df is None or len(df) < 50:
+                continue
+            
+            df["EMA50"] = ta.ema(df.Close, 50)
+            df["EMA200"] = ta.ema(df.Close, 200)
+            df["RSI"] = ta.rsi(df.Close, 14)
+            
+            latest = df.iloc[-1]
+            prev = df.iloc[-2] if len(df) > 1 else latest
+            score = 0
+            signals = []
+            
+            if latest.EMA50 > latest.EMA200 and df.EMA50.iloc[-2] <= df.EMA200.iloc[-2]:
+                signals.append("Golden Cross"); score += 35
+            
+            if latest.RSI < 30:
+                signals.append("Oversold"); score += 25
+            
+            if latest.Volume > df.Volume.rolling(20).mean().iloc[-1]*2:
+                signals.append("Volume Spike"); score += 20
+            
+            if score >= 50:
+                sym_clean = sym.replace("-USD","")
+                timeframe_label = "1D (Daily)"
+                change_pct = float(((latest.Close - prev.Close) / prev.Close) * 100) if prev.Close != 0 else 0.0
+                price_val = float(latest.Close)
+                
+                # Indicators use the full history; the chart shows the recent window
+                chart_df = slice_window(df, period=QUICK_CHART_PERIOD)
+                fig = create_enhanced_chart(chart_df, sym_clean, score, indicators=None, rules=None)
+                
+                bias = classify_bias(signals)
+                action = action_from_bias(bias, score)
+                narrative = build_ai_summary(
+                    sym_clean,
+                    timeframe_label,
+                    score,
+                    price_val,
+                    change_pct,
+                    bias,
+                    signals,
+                    action,
+                )
+                
+                results.append({
+                    "sym": sym_clean,
+                    "score": score,
+                    "signals": signals,
+                    "figure": fig.to_dict(),
+                    "timeframe": timeframe_label,
+                    "price": price_val,
+                    "change_pct": change_pct,
+                    "bias": bias,
+                    "action": action,
+                    "narrative": narrative,
+                })
+        except Exception as exc:
+            failures[sym] = _evaluation_error(exc)
+    
+    return sorted(results, key=lambda x: x["score"], reverse=True)[:10]
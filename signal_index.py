@@ -0,0 +1,172 @@
+"""
+Signal Index Module
+Precomputed per-condition bitmaps over the custom-rule universe
+"""
+import threading
+
+import numpy as np
+
+from indicator_cache import frame_key
+from rule_plan import LatestValues, compile_rules
+from scanner import (
+    CUSTOM_ALL_SYMBOLS,
+    HISTORY_PERIOD,
+    RULE_INDICATORS,
+    SCAN_INTERVAL,
+    rule_indicator_sets,
+    rule_indicators,
+)
+from ta_indicators import tail_frame
+
+# Conditions materialized on every refresh. Other rules over the indexed
+# indicators are answered from the stored values and memoized alongside.
+INDEXED_RULES = (
+    *(("RSI", "<", float(level)) for level in (20, 30, 40)),
+    *(("RSI", ">", float(level)) for level in (50, 60, 70)),
+    *(
+        (f"PRICE_{side}_{kind}", op, length)
+        for kind, lengths in (("EMA", (9, 20, 50, 100, 200)), ("SMA", (20, 50, 200)))
+        for length in lengths
+        for side, op in (("ABOVE", ">"), ("BELOW", "<"))
+    ),
+    ("MACD_CROSS", "BULL", None), ("MACD_CROSS", "BEAR", None),
+    ("EMA_CROSS", "GOLDEN", None), ("EMA_CROSS", "DEATH", None),
+    *(("VOLUME", ">", multiple) for multiple in (1.5, 2.0, 3.0)),
+    ("SUPERTREND", "BULL", None), ("SUPERTREND", "BEAR", None),
+    ("PSAR", "BULL", None), ("PSAR", "BEAR", None),
+    ("STOCH", "<", 20.0), ("STOCH", ">", 80.0),
+    ("ADX", ">", 25.0),
+)
+
+# Memoized ad-hoc bitmaps per snapshot; a new snapshot starts empty
+MAX_ADHOC_BITMAPS = 1024
+
+
+def _combine_bits(expression, bitmaps):
+    # rule_plan.combine over packed bitmaps: one bitwise op per 8 symbols
+    if isinstance(expression, int):
+        return bitmaps[expression]
+    op, *children = expression
+    if op == "NOT":
+        # Pad bits past the last symbol flip too; unpacking with count=n drops them
+        return np.invert(_combine_bits(children[0], bitmaps))
+    reduce = np.bitwise_and.reduce if op == "AND" else np.bitwise_or.reduce
+    return reduce([_combine_bits(child, bitmaps) for child in children])
+
+
+class _Snapshot:
+    """Indicator values and bitmaps for one set of bars, swapped out whole on refresh."""
+
+    def __init__(self, latest, versions, bitmaps):
+        self.latest = latest
+        self.rows = {sym: row for row, sym in enumerate(latest.symbols)}
+        self.versions = versions
+        self.bitmaps = bitmaps
+
+    def bitmap(self, rule):
+        """Packed bitmap of ``rule`` over the snapshot's symbols, or None if it reads unindexed values."""
+        bits = self.bitmaps.get(rule)
+        if bits is None:
+            plan = compile_rules((rule,))
+            if not plan.keys <= self.latest.values.keys():
+                return None
+            bits = np.packbits(plan.masks(self.latest)[0])
+            if len(self.bitmaps) < len(INDEXED_RULES) + MAX_ADHOC_BITMAPS:
+                self.bitmaps[rule] = bits
+        return bits
+
+
+class SignalIndex:
+    """Per-condition bitmaps over ``CUSTOM_ALL_SYMBOLS``, rebuilt when new bars arrive.
+
+    ``refresh`` computes every rule indicator for the universe once and
+    packs one bit per symbol for each of ``INDEXED_RULES``. A custom-rules
+    query over indexed indicators then reduces to bitmap ANDs/ORs instead
+    of indicator work. ``lookup`` answers only when the scan's bars are the
+    ones the index was built from; otherwise the scan computes as usual.
+
+    Values come from the same warm-up tail and streaming states as
+    ``run_custom_rule_scan``, so an indexed answer equals the computed one.
+    """
+
+    def __init__(self, rules=INDEXED_RULES, symbols=CUSTOM_ALL_SYMBOLS):
+        self.rules = tuple(rules)
+        self.symbols = list(symbols)
+        ma_keys = rule_indicators(rule for rule in self.rules if rule[0].startswith("PRICE_"))
+        self.keys = {key for keys in RULE_INDICATORS.values() for key in keys} | ma_keys
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.hits = 0
+        self.misses = 0
+
+    def refresh(self, load, indicator_cache=None, indicator_states=None):
+        """Rebuild from ``load(symbols, period)`` bars; returns ``stats()``.
+
+        ``indicator_states`` supplies the streaming indicators as in
+        ``run_custom_rule_scan``, so both read the same values.
+        """
+        frames, _ = load(self.symbols, HISTORY_PERIOD)
+        eval_frames = {
+            sym: tail_frame(frames[sym], self.keys) for sym in self.symbols
+            if sym in frames and len(frames[sym]) >= 60
+        }
+        indicator_sets = rule_indicator_sets(frames, eval_frames, self.keys, indicator_cache, indicator_states)
+        latest = LatestValues.from_indicators(frames, indicator_sets, self.keys)
+        masks = compile_rules(self.rules).masks(latest)
+        snapshot = _Snapshot(
+            latest,
+            {sym: frame_key(sym, SCAN_INTERVAL, frames[sym]) for sym in eval_frames},
+            {rule: np.packbits(mask) for rule, mask in zip(self.rules, masks)},
+        )
+        with self._lock:
+            self._snapshot = snapshot
+            self.builds += 1
+        return self.stats()
+
+    def lookup(self, plan, frames, symbols):
+        """(``LatestValues``, per-rule masks, matched mask) over ``symbols`` for ``plan``, or None.
+
+        None when the index is missing a symbol, holds older bars than
+        ``frames``, or ``plan`` reads an indicator it does not store.
+        """
+        snapshot = self._snapshot
+        answer = self._answer(snapshot, plan, frames, symbols) if snapshot is not None else None
+        with self._lock:
+            if answer is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return answer
+
+    def _answer(self, snapshot, plan, frames, symbols):
+        rows = [snapshot.rows.get(sym) for sym in symbols]
+        if any(row is None for row in rows):
+            return None
+        if any(snapshot.versions[sym] != frame_key(sym, SCAN_INTERVAL, frames[sym]) for sym in symbols):
+            return None
+        bitmaps = [snapshot.bitmap(rule) for rule in plan.rules]
+        if any(bits is None for bits in bitmaps):
+            return None
+        n = len(snapshot.latest.symbols)
+        if not bitmaps:
+            matched_bits = np.packbits(np.zeros(n, dtype=bool))
+        elif plan.expression is None:
+            matched_bits = np.bitwise_and.reduce(bitmaps)
+        else:
+            matched_bits = _combine_bits(plan.expression, bitmaps)
+        rows = np.asarray(rows, dtype=int)
+        unpack = lambda bits: np.unpackbits(bits, count=n).astype(bool)[rows]
+        masks = [unpack(bits) for bits in bitmaps]
+        return snapshot.latest.take(rows), masks, unpack(matched_bits)
+
+    def stats(self):
+        snapshot = self._snapshot
+        with self._lock:
+            return {
+                "symbols": len(snapshot.rows) if snapshot is not None else 0,
+                "bitmaps": len(snapshot.bitmaps) if snapshot is not None else 0,
+                "builds": self.builds,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
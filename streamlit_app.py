@@ -1,11 +1,13 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
 import pandas_ta as ta
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import base64
 from io import BytesIO
+from indicator_kernels import rolling_extreme
+from market_data import fetch_universe, slice_window
+from scanner import HISTORY_PERIOD, QUICK_CHART_PERIOD
 
 st.set_page_config(page_title="SnipeVision", layout="wide")
 st.title("🏹 SnipeVision – Never Miss Another 10x Again")
@@ -18,22 +20,25 @@ if 'paid' not in st.session_state:
     st.session_state.paid = False
 
 @st.cache_data(ttl=900)  # refresh every 15 min
-def scan_market(market):
+def scan_market(market, _source=None):
+    # _source (any market_data source, e.g. LocalFileSource) is left out of the cache key
     results = []
     symbols = {
         "Crypto": ["BTC-USD","ETH-USD","SOL-USD","XRP-USD","ADA-USD","DOGE-USD","BNB-USD","AVAX-USD","LINK-USD","MATIC-USD"],
         "Stocks": ["AAPL","NVDA","TSLA","AMD","META","AMZN","GOOGL","MSFT","SMCI","COIN"]
     }[market]
+    frames, _ = fetch_universe(symbols, period=HISTORY_PERIOD, interval="1d", fetcher=_source)
 
     for sym in symbols:
         try:
-            data = yf.download(sym, period="6mo", interval="1d", progress=False)
-            if len(data) < 50: continue
+            data = frames.get(sym)
+            if data is None or len(data) < 50: continue
 
             data['EMA50'] = ta.ema(data.Close, 50)
             data['EMA200'] = ta.ema(data.Close, 200)
             data['RSI'] = ta.rsi(data.Close, 14)
             data['Volume_MA'] = data.Volume.rolling(20).mean()
+            data['High_9'], _ = rolling_extreme(data.High, 9)
 
             latest = data.iloc[-1]
             prev = data.iloc[-2]
@@ -47,15 +52,16 @@ def scan_market(market):
                 signals.append("Oversold RSI"); score += 25
             if latest.Volume > latest.Volume_MA * 2:
                 signals.append("Volume Explosion"); score += 20
-            if latest.Close > data.High.iloc[-10:-1].max():
+            if latest.Close > prev.High_9:
                 signals.append("Breaking Out"); score += 20
 
             if score >= 50:
-                # Chart
+                # Chart the recent window; the EMAs were computed on full history
+                chart = slice_window(data, period=QUICK_CHART_PERIOD)
                 fig = go.Figure()
-                fig.add_trace(go.Candlestick(x=data.index, open=data.Open, high=data.High, low=data.Low, close=data.Close, name=sym))
-                fig.add_trace(go.Scatter(x=data.index, y=data.EMA50, name="EMA50", line=dict(color="#f7931a")))
-                fig.add_trace(go.Scatter(x=data.index, y=data.EMA200, name="EMA200", line=dict(color="red")))
+                fig.add_trace(go.Candlestick(x=chart.index, open=chart.Open, high=chart.High, low=chart.Low, close=chart.Close, name=sym))
+                fig.add_trace(go.Scatter(x=chart.index, y=chart.EMA50, name="EMA50", line=dict(color="#f7931a")))
+                fig.add_trace(go.Scatter(x=chart.index, y=chart.EMA200, name="EMA200", line=dict(color="red")))
                 fig.update_layout(height=500, title=f"{sym} → Score {score}/100")
                 
                 buf = BytesIO()
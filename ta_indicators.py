@@ -2,102 +2,642 @@
 Technical Analysis Indicators Module
 Comprehensive indicator calculations using pandas-ta
 """
+import math
+import os
+import re
+import sys
+import threading
+import time
+from collections.abc import Mapping
+
+import numpy as np
 import pandas as pd
 import pandas_ta as ta
 
-def calculate_all_indicators(df):
-    """Calculate all technical indicators for a dataframe"""
-    indicators = {}
-    
-    try:
-        # Trend Indicators
-        indicators['SMA_20'] = ta.sma(df.Close, length=20)
-        indicators['SMA_50'] = ta.sma(df.Close, length=50)
-        indicators['SMA_200'] = ta.sma(df.Close, length=200)
-        indicators['EMA_9'] = ta.ema(df.Close, length=9)
-        indicators['EMA_12'] = ta.ema(df.Close, length=12)
-        indicators['EMA_26'] = ta.ema(df.Close, length=26)
-        indicators['EMA_50'] = ta.ema(df.Close, length=50)
-        indicators['EMA_200'] = ta.ema(df.Close, length=200)
-        
-        # MACD
-        macd = ta.macd(df.Close)
-        if macd is not None and isinstance(macd, pd.DataFrame):
-            indicators['MACD'] = macd.iloc[:, 0] if len(macd.columns) > 0 else None
-            indicators['MACD_Signal'] = macd.iloc[:, 1] if len(macd.columns) > 1 else None
-            indicators['MACD_Hist'] = macd.iloc[:, 2] if len(macd.columns) > 2 else None
-        
-        # ADX
-        adx = ta.adx(df.High, df.Low, df.Close)
-        if adx is not None and isinstance(adx, pd.DataFrame):
-            indicators['ADX'] = adx.iloc[:, 0] if len(adx.columns) > 0 else None
-        
-        # Parabolic SAR
-        indicators['PSAR'] = ta.psar(df.High, df.Low)
-        
-        # Aroon
-        aroon = ta.aroon(df.High, df.Low)
-        if aroon is not None and isinstance(aroon, pd.DataFrame):
-            indicators['Aroon_Up'] = aroon.iloc[:, 0] if len(aroon.columns) > 0 else None
-            indicators['Aroon_Down'] = aroon.iloc[:, 1] if len(aroon.columns) > 1 else None
-        
-        # SuperTrend
-        supertrend = ta.supertrend(df.High, df.Low, df.Close)
-        if supertrend is not None and isinstance(supertrend, pd.DataFrame):
-            indicators['SuperTrend'] = supertrend.iloc[:, 0] if len(supertrend.columns) > 0 else None
-        
-        # Momentum Indicators
-        rsi = ta.rsi(df.Close, length=14)
-        if rsi is not None:
-            indicators['RSI'] = rsi.fillna(method="bfill")
-        stoch = ta.stoch(df.High, df.Low, df.Close)
-        if stoch is not None and isinstance(stoch, pd.DataFrame):
-            indicators['Stoch_K'] = stoch.iloc[:, 0] if len(stoch.columns) > 0 else None
-            indicators['Stoch_D'] = stoch.iloc[:, 1] if len(stoch.columns) > 1 else None
-        indicators['CCI'] = ta.cci(df.High, df.Low, df.Close)
-        indicators['Williams_R'] = ta.willr(df.High, df.Low, df.Close)
-        indicators['ROC'] = ta.roc(df.Close)
-        indicators['MFI'] = ta.mfi(df.High, df.Low, df.Close, df.Volume)
-        
-        # Volatility Indicators
-        bb = ta.bbands(df.Close, length=20)
-        if bb is not None and isinstance(bb, pd.DataFrame):
-            indicators['BB_Upper'] = bb.iloc[:, 0] if len(bb.columns) > 0 else None
-            indicators['BB_Middle'] = bb.iloc[:, 1] if len(bb.columns) > 1 else None
-            indicators['BB_Lower'] = bb.iloc[:, 2] if len(bb.columns) > 2 else None
-        indicators['ATR'] = ta.atr(df.High, df.Low, df.Close)
-        indicators['STD'] = df.Close.rolling(20).std()
-        
-        # Volume Indicators
-        indicators['OBV'] = ta.obv(df.Close, df.Volume)
-        indicators['VWAP'] = ta.vwap(df.High, df.Low, df.Close, df.Volume)
-        indicators['CMF'] = ta.cmf(df.High, df.Low, df.Close, df.Volume)
-        volume_ma = df.Volume.rolling(20).mean()
-        indicators['Volume_MA'] = volume_ma
-        indicators['Volume_Ratio'] = df.Volume / volume_ma if volume_ma.iloc[-1] > 0 else 0
-        
-        # Additional Moving Averages
-        indicators['Hull_MA'] = ta.hma(df.Close)
-        indicators['TEMA'] = ta.tema(df.Close)
+import indicator_kernels
+
+# Indicator groups in computation order. Each entry is
+# (function, keys it produces, keys it needs computed first).
+_GROUPS = []
+# key -> index into _GROUPS
+_PRODUCER = {}
+# Shared building blocks; computed on demand but never returned to callers
+_INTERMEDIATES = set()
+
+_EPSILON = sys.float_info.epsilon
+
+# "numpy" runs PSAR, SuperTrend and KAMA through indicator_kernels;
+# "pandas_ta" keeps the library implementations (parity baseline)
+INDICATOR_KERNELS = os.getenv("INDICATOR_KERNELS", "numpy")
+
+
+def indicator(*keys, requires=()):
+    """Register a function that fills ``keys`` of the indicators dict."""
+    def register(fn):
+        # Append before publishing the keys: groups may be registered while scans resolve others
+        _GROUPS.append((fn, keys, tuple(requires)))
+        for key in keys:
+            _PRODUCER[key] = len(_GROUPS) - 1
+        return fn
+    return register
+
+
+def intermediate(*keys, requires=()):
+    """Register a shared building block that other indicators ``require``."""
+    _INTERMEDIATES.update(keys)
+    return indicator(*keys, requires=requires)
+
+
+def _column(frame, prefix):
+    """Column of a pandas-ta result by name prefix (``"AROONU"`` -> ``AROONU_14``).
+
+    Column order differs between indicators and pandas-ta releases, so
+    selecting by position mislabels outputs.
+    """
+    if not isinstance(frame, pd.DataFrame):
+        return None
+    for column in frame.columns:
+        if str(column).split("_", 1)[0] == prefix:
+            return frame[column]
+    return None
+
+
+def _wilder_atr(tr, length):
+    """pandas-ta's ATR from a precomputed true range: SMA seed, then RMA."""
+    tr = tr.copy()
+    tr.iloc[length - 1] = tr.iloc[:length].mean()
+    tr.iloc[:length - 1] = np.nan
+    return ta.rma(tr, length=length)
+
+
+# Shared intermediates
+@intermediate("tr")
+def _true_range(df, indicators):
+    indicators['tr'] = ta.true_range(df.High, df.Low, df.Close)
+
+
+@intermediate("close_std_20")
+def _close_std(df, indicators):
+    indicators['close_std_20'] = df.Close.rolling(20).std()
+
+
+# Williams %R, Aroon (length + 1 bars) and Donchian
+_EXTREMA_WINDOWS = (14, 15, 20)
+
+
+@intermediate("hl_extrema")
+def _hl_extrema(df, indicators):
+    # One monotonic-deque pass over High/Low serves every window above
+    indicators['hl_extrema'] = indicator_kernels.rolling_extrema(
+        df.High.to_numpy(), df.Low.to_numpy(), _EXTREMA_WINDOWS)
+
+
+# Trend Indicators
+def _moving_average(kind, length):
+    fn = ta.sma if kind == "SMA" else ta.ema
+
+    @indicator(f"{kind}_{length}")
+    def compute(df, indicators):
+        indicators[f"{kind}_{length}"] = fn(df.Close, length=length)
+    return compute
+
+
+for _length in (20, 50, 200):
+    _moving_average("SMA", _length)
+for _length in (9, 12, 26, 50, 200):
+    _moving_average("EMA", _length)
+
+# Any other EMA_<n>/SMA_<n> is registered the first time a caller asks for it;
+# those groups only run when requested, never as part of "all indicators"
+_MOVING_AVERAGE_KEY = re.compile(r"(EMA|SMA)_([1-9][0-9]*)")
+MAX_MOVING_AVERAGE_LENGTH = 1000
+_ON_DEMAND = set()
+_REGISTER_LOCK = threading.Lock()
+
+
+def moving_average_spec(key):
+    """``("EMA" | "SMA", length)`` for a moving-average key such as ``EMA_21``, else None."""
+    match = _MOVING_AVERAGE_KEY.fullmatch(str(key))
+    if match is None or int(match.group(2)) > MAX_MOVING_AVERAGE_LENGTH:
+        return None
+    return match.group(1), int(match.group(2))
+
+
+def _register_on_demand(keys):
+    for key in keys:
+        if key in _PRODUCER or moving_average_spec(key) is None:
+            continue
+        with _REGISTER_LOCK:
+            if key not in _PRODUCER:
+                _moving_average(*moving_average_spec(key))
+                _ON_DEMAND.add(_PRODUCER[key])
+
+
+@indicator("MACD", "MACD_Signal", "MACD_Hist", requires=("EMA_12", "EMA_26"))
+def _macd(df, indicators):
+    macd = indicators['EMA_12'] - indicators['EMA_26']
+    signal = ta.ema(macd.loc[macd.first_valid_index():], length=9).reindex(macd.index)
+    indicators['MACD'] = macd
+    indicators['MACD_Signal'] = signal
+    indicators['MACD_Hist'] = macd - signal
+
+
+@indicator("ADX", requires=("tr",))
+def _adx(df, indicators, length=14):
+    # pandas-ta's ADX smooths a true range whose first bar is blanked out
+    tr = indicators['tr'].copy()
+    tr.iloc[0] = np.nan
+    k = 100 / _wilder_atr(tr, length)
+    up = df.High - df.High.shift(1)
+    dn = df.Low.shift(1) - df.Low
+    pos = ((up > dn) & (up > 0)) * up
+    neg = ((dn > up) & (dn > 0)) * dn
+    pos = pos.mask(pos.abs() < _EPSILON, 0)
+    neg = neg.mask(neg.abs() < _EPSILON, 0)
+    dmp = k * ta.rma(pos, length=length)
+    dmn = k * ta.rma(neg, length=length)
+    dx = 100 * (dmp - dmn).abs() / (dmp + dmn)
+    indicators['ADX'] = ta.rma(dx, length=length)
+
+
+@indicator("PSAR")
+def _psar(df, indicators):
+    if INDICATOR_KERNELS == "numpy":
+        psar = indicator_kernels.psar(df.High.to_numpy(), df.Low.to_numpy())
+        indicators['PSAR'] = pd.Series(psar, index=df.index)
+        return
+    psar = ta.psar(df.High, df.Low)
+    long, short = _column(psar, "PSARl"), _column(psar, "PSARs")
+    if long is not None and short is not None:
+        # The SAR sits in the long column while bullish and the short one while bearish
+        indicators['PSAR'] = long.fillna(short)
+
+
+@indicator("Aroon_Up", "Aroon_Down", requires=("hl_extrema",))
+def _aroon(df, indicators, length=14):
+    _, highest_at, _, lowest_at = indicators['hl_extrema'][length + 1]
+    position = np.arange(len(df))
+    for key, at in (('Aroon_Up', highest_at), ('Aroon_Down', lowest_at)):
+        since = np.where(at >= 0, position - at, np.nan)
+        indicators[key] = pd.Series(100 * (1 - since / length), index=df.index)
+
+
+@indicator("SuperTrend", requires=("tr",))
+def _supertrend(df, indicators, length=7, multiplier=3.0):
+    if INDICATOR_KERNELS != "numpy":
+        indicators['SuperTrend'] = _column(
+            ta.supertrend(df.High, df.Low, df.Close, length=length, multiplier=multiplier), "SUPERT")
+        return
+    trend = indicator_kernels.supertrend(
+        df.High.to_numpy(), df.Low.to_numpy(), df.Close.to_numpy(), length, multiplier,
+        atr=_wilder_atr(indicators['tr'], length).to_numpy(dtype=float),
+    )
+    indicators['SuperTrend'] = pd.Series(trend, index=df.index)
+
+
+# Momentum Indicators
+@indicator("RSI")
+def _rsi(df, indicators):
+    rsi = ta.rsi(df.Close, length=14)
+    if rsi is not None:
+        indicators['RSI'] = rsi.bfill()
+
+
+@indicator("Stoch_K", "Stoch_D")
+def _stoch(df, indicators):
+    stoch = ta.stoch(df.High, df.Low, df.Close)
+    indicators['Stoch_K'] = _column(stoch, "STOCHk")
+    indicators['Stoch_D'] = _column(stoch, "STOCHd")
+
+
+@indicator("CCI")
+def _cci(df, indicators):
+    indicators['CCI'] = ta.cci(df.High, df.Low, df.Close)
+
+
+@indicator("Williams_R", requires=("hl_extrema",))
+def _willr(df, indicators, length=14):
+    highest, _, lowest, _ = indicators['hl_extrema'][length]
+    highest, lowest = pd.Series(highest, index=df.index), pd.Series(lowest, index=df.index)
+    indicators['Williams_R'] = 100 * ((df.Close - lowest) / (highest - lowest) - 1)
+
+
+@indicator("ROC")
+def _roc(df, indicators):
+    indicators['ROC'] = ta.roc(df.Close)
+
+
+@indicator("MFI")
+def _mfi(df, indicators):
+    indicators['MFI'] = ta.mfi(df.High, df.Low, df.Close, df.Volume)
+
+
+# Volatility Indicators
+@indicator("BB_Upper", "BB_Middle", "BB_Lower", requires=("SMA_20", "close_std_20"))
+def _bbands(df, indicators, width=2.0):
+    mid, std = indicators['SMA_20'], indicators['close_std_20']
+    indicators['BB_Upper'] = mid + width * std
+    indicators['BB_Middle'] = mid
+    indicators['BB_Lower'] = mid - width * std
+
+
+@indicator("ATR", requires=("tr",))
+def _atr(df, indicators):
+    indicators['ATR'] = _wilder_atr(indicators['tr'], 14)
+
+
+@indicator("STD", requires=("close_std_20",))
+def _std(df, indicators):
+    indicators['STD'] = indicators['close_std_20']
+
+
+# Volume Indicators
+@indicator("OBV")
+def _obv(df, indicators):
+    indicators['OBV'] = ta.obv(df.Close, df.Volume)
+
+
+@indicator("VWAP")
+def _vwap(df, indicators):
+    indicators['VWAP'] = ta.vwap(df.High, df.Low, df.Close, df.Volume)
+
+
+@indicator("CMF")
+def _cmf(df, indicators):
+    indicators['CMF'] = ta.cmf(df.High, df.Low, df.Close, df.Volume)
+
+
+@indicator("Volume_MA")
+def _volume_ma(df, indicators):
+    indicators['Volume_MA'] = df.Volume.rolling(20).mean()
+
+
+@indicator("Volume_Ratio", requires=("Volume_MA",))
+def _volume_ratio(df, indicators):
+    volume_ma = indicators['Volume_MA']
+    if volume_ma.iloc[-1] > 0:
+        indicators['Volume_Ratio'] = df.Volume / volume_ma
+    else:
+        # No volume baseline (zero-volume symbol, or under 20 bars): flat 0, as the panel reports
+        indicators['Volume_Ratio'] = pd.Series(0.0, index=df.index)
+
+
+# Additional Moving Averages
+@indicator("Hull_MA")
+def _hma(df, indicators):
+    indicators['Hull_MA'] = ta.hma(df.Close)
+
+
+@indicator("TEMA")
+def _tema(df, indicators):
+    indicators['TEMA'] = ta.tema(df.Close)
+
+
+@indicator("KAMA")
+def _kama(df, indicators):
+    if INDICATOR_KERNELS == "numpy":
+        indicators['KAMA'] = pd.Series(indicator_kernels.kama(df.Close.to_numpy()), index=df.index)
+    else:
         indicators['KAMA'] = ta.kama(df.Close)
-        indicators['VWMA'] = ta.vwma(df.Close, df.Volume)
-        
-        # Ichimoku (simplified)
-        ichimoku = ta.ichimoku(df.High, df.Low, df.Close)
-        if ichimoku is not None:
-            if isinstance(ichimoku, tuple) and len(ichimoku) > 0:
-                ichi_df = ichimoku[0] if isinstance(ichimoku[0], pd.DataFrame) else None
-                if ichi_df is not None:
-                    indicators['Ichimoku_Base'] = ichi_df.iloc[:, 0] if len(ichi_df.columns) > 0 else None
-                    indicators['Ichimoku_Conversion'] = ichi_df.iloc[:, 1] if len(ichi_df.columns) > 1 else None
-        
-        # Donchian Channels
-        indicators['Donchian_High'] = df.High.rolling(20).max()
-        indicators['Donchian_Low'] = df.Low.rolling(20).min()
-        indicators['Donchian_Mid'] = (indicators['Donchian_High'] + indicators['Donchian_Low']) / 2
-        
-    except Exception as e:
-        pass
-    
+
+
+@indicator("VWMA")
+def _vwma(df, indicators):
+    indicators['VWMA'] = ta.vwma(df.Close, df.Volume)
+
+
+# Ichimoku (simplified)
+@indicator("Ichimoku_Base", "Ichimoku_Conversion")
+def _ichimoku(df, indicators):
+    ichimoku = ta.ichimoku(df.High, df.Low, df.Close)
+    if isinstance(ichimoku, tuple) and len(ichimoku) > 0:
+        indicators['Ichimoku_Base'] = _column(ichimoku[0], "IKS")
+        indicators['Ichimoku_Conversion'] = _column(ichimoku[0], "ITS")
+
+
+# Donchian Channels
+@indicator("Donchian_High", "Donchian_Low", requires=("hl_extrema",))
+def _donchian(df, indicators, length=20):
+    highest, _, lowest, _ = indicators['hl_extrema'][length]
+    indicators['Donchian_High'] = pd.Series(highest, index=df.index)
+    indicators['Donchian_Low'] = pd.Series(lowest, index=df.index)
+
+
+@indicator("Donchian_Mid", requires=("Donchian_High", "Donchian_Low"))
+def _donchian_mid(df, indicators):
+    indicators['Donchian_Mid'] = (indicators['Donchian_High'] + indicators['Donchian_Low']) / 2
+
+
+INDICATOR_KEYS = tuple(key for key in _PRODUCER if key not in _INTERMEDIATES)
+
+# Seed error left in a tail-computed value, relative to the error right after seeding
+TAIL_TOLERANCE = float(os.getenv("SCAN_TAIL_TOLERANCE", "1e-5"))
+
+
+def _decay_bars(alpha, tolerance):
+    """Bars for an ``alpha`` recurrence to shrink a seeding error below ``tolerance``."""
+    return int(math.ceil(math.log(tolerance) / math.log(1.0 - alpha)))
+
+
+def _ema_warmup(length):
+    return lambda tol: length + _decay_bars(2.0 / (length + 1), tol)
+
+
+def _wilder_warmup(seed_length, passes=1, length=14):
+    return lambda tol: seed_length + passes * _decay_bars(1.0 / length, tol)
+
+
+def _fixed(bars):
+    return lambda tol: bars
+
+
+# Bars of history each indicator needs before its newest value stops depending
+# on where the history starts. None means it never does: OBV is a running
+# total, and PSAR, SuperTrend and KAMA carry path-dependent state.
+_WARMUP = {
+    'RSI': _wilder_warmup(1),
+    'ATR': _wilder_warmup(14),
+    'ADX': _wilder_warmup(14, passes=3),
+    'MACD': lambda tol: _ema_warmup(26)(tol) + _ema_warmup(9)(tol),
+    # pandas-ta's stoch returns nothing on fewer than k + smooth_k + d - 2 bars
+    'Stoch_K': _fixed(14 + 3 + 3 - 2),
+    'Stoch_D': _fixed(14 + 3 + 3 - 2),
+    'CCI': _fixed(20),
+    'Williams_R': _fixed(14),
+    'ROC': _fixed(11),
+    'MFI': _fixed(15),
+    'Aroon_Up': _fixed(15),
+    'Aroon_Down': _fixed(15),
+    'BB_Upper': _fixed(20),
+    'BB_Middle': _fixed(20),
+    'BB_Lower': _fixed(20),
+    'STD': _fixed(20),
+    'VWAP': _fixed(1),
+    'CMF': _fixed(20),
+    'Volume_MA': _fixed(20),
+    'Volume_Ratio': _fixed(20),
+    'Hull_MA': _fixed(13),
+    'TEMA': lambda tol: 3 * _ema_warmup(10)(tol),
+    'VWMA': _fixed(10),
+    # ta.ichimoku needs its full 52-bar span before it returns any line
+    'Ichimoku_Base': _fixed(52),
+    'Ichimoku_Conversion': _fixed(52),
+    'Donchian_High': _fixed(20),
+    'Donchian_Low': _fixed(20),
+    'Donchian_Mid': _fixed(20),
+    'PSAR': None,
+    'SuperTrend': None,
+    'KAMA': None,
+    'OBV': None,
+}
+_WARMUP['MACD_Signal'] = _WARMUP['MACD_Hist'] = _WARMUP['MACD']
+
+
+def _warmup(key):
+    if key in _WARMUP:
+        return _WARMUP[key]
+    spec = moving_average_spec(key)
+    if spec is None:
+        return None
+    kind, length = spec
+    return _fixed(length) if kind == "SMA" else _ema_warmup(length)
+
+
+def warmup_bars(keys, tolerance=TAIL_TOLERANCE):
+    """History needed for the newest values of ``keys`` to be within ``tolerance``; None if unbounded."""
+    bars = 1
+    for key in keys:
+        warmup = _warmup(key)
+        if warmup is None:
+            return None
+        bars = max(bars, warmup(tolerance))
+    return bars
+
+
+def tail_frame(df, keys, tail=2, tolerance=TAIL_TOLERANCE):
+    """The trailing slice of ``df`` that still yields the last ``tail`` values of ``keys``.
+
+    Returns ``df`` itself when a key has no bounded warm-up or ``tolerance``
+    is 0 (tail evaluation disabled).
+    """
+    warmup = warmup_bars(keys, tolerance) if tolerance else None
+    if warmup is not None and warmup + tail < len(df):
+        return df.iloc[-(warmup + tail):]
+    return df
+
+
+def calculate_tail_indicators(df, only, tail=2, tolerance=TAIL_TOLERANCE):
+    """Like ``calculate_all_indicators(df, only)`` but over just enough trailing history.
+
+    The returned series cover the shortened window, so only their last
+    ``tail`` values are meaningful - which is all the rule checks read.
+    """
+    return calculate_all_indicators(tail_frame(df, only, tail, tolerance), only=only)
+
+
+def resolve_groups(keys):
+    """Indices of the groups needed for ``keys`` plus their dependencies, in computation order."""
+    _register_on_demand(keys)
+    needed = set()
+    pending = [key for key in keys if key in _PRODUCER]
+    while pending:
+        group = _PRODUCER[pending.pop()]
+        if group not in needed:
+            needed.add(group)
+            pending.extend(_GROUPS[group][2])
+    return sorted(needed)
+
+
+def as_series(value, index):
+    """``value`` as a Series over ``index``: Series pass through, scalars are broadcast, None stays None."""
+    if value is None or isinstance(value, pd.Series):
+        return value
+    return pd.Series(float(value), index=index)
+
+
+class CompactIndicators(Mapping):
+    """Indicator dict stored as one float32 (bars, keys) array over a single shared index.
+
+    A drop-in for the dict ``calculate_all_indicators`` returns wherever it
+    is only read: ``indicators['RSI'].iloc[-1]``, ``.get()``, ``in`` and
+    iteration all work, and each lookup is a zero-copy float32 Series view.
+    Roughly a quarter of the dict's size (no per-series index copies, half
+    the bytes per value), at about 7 significant digits.
+    """
+
+    def __init__(self, index, keys, values):
+        self.index = index
+        self.columns = tuple(keys)
+        self.values = values
+        self._positions = {key: i for i, key in enumerate(self.columns)}
+
+    @classmethod
+    def from_dict(cls, indicators, index):
+        """Pack ``{key: Series}`` aligned to ``index``; None entries are dropped, scalars broadcast."""
+        keys = [key for key, series in indicators.items() if series is not None]
+        # Column-major, so each indicator is one contiguous run of bars
+        values = np.empty((len(index), len(keys)), dtype=np.float32, order="F")
+        for i, key in enumerate(keys):
+            series = as_series(indicators[key], index)
+            if len(series) != len(index) or not series.index.equals(index):
+                series = series.reindex(index)
+            values[:, i] = series.to_numpy(dtype=np.float32, na_value=np.nan)
+        return cls(index, keys, values)
+
+    def __getitem__(self, key):
+        return pd.Series(self.values[:, self._positions[key]], index=self.index, name=key, copy=False)
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def __len__(self):
+        return len(self.columns)
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + self.index.nbytes
+
+    def to_dict(self):
+        """Plain ``{key: float64 Series}``, e.g. to add entries."""
+        return {key: self[key].astype(np.float64) for key in self.columns}
+
+
+def calculate_all_indicators(df, only=None, compact=False):
+    """Calculate technical indicators for a dataframe.
+
+    With ``only`` (an iterable of indicator keys, e.g. ``{"RSI", "EMA_200"}``)
+    just those indicators and whatever they depend on are computed; unknown
+    keys are ignored; ``EMA_<n>``/``SMA_<n>`` work for any length up to
+    MAX_MOVING_AVERAGE_LENGTH. Without it every standard indicator is computed.
+
+    Shared intermediates (true range, the 20-bar close deviation, ...) are
+    computed once per call and reused by every indicator built on them.
+
+    ``compact=True`` returns a read-only ``CompactIndicators`` instead of a dict.
+    """
+    indicators = {}
+    if only is None:
+        groups = [group for group in range(len(_GROUPS)) if group not in _ON_DEMAND]
+    else:
+        groups = resolve_groups(only)
+    for group in groups:
+        fn, _, requires = _GROUPS[group]
+        if any(indicators.get(key) is None for key in requires):
+            continue
+        try:
+            fn(df, indicators)
+        except Exception:
+            pass
+    for key in _INTERMEDIATES:
+        indicators.pop(key, None)
+    if compact:
+        return CompactIndicators.from_dict(indicators, df.index)
     return indicators
 
+
+def reference_indicators(df):
+    """The shared-intermediate and kernel indicators computed straight from pandas-ta, one call each.
+
+    This is how ``calculate_all_indicators`` used to compute them; it is kept
+    as the parity and benchmark baseline.
+    """
+    macd = ta.macd(df.Close)
+    bb = ta.bbands(df.Close, length=20)
+    psar = ta.psar(df.High, df.Low)
+    aroon = ta.aroon(df.High, df.Low)
+    return {
+        'EMA_12': ta.ema(df.Close, length=12),
+        'EMA_26': ta.ema(df.Close, length=26),
+        'MACD': _column(macd, "MACD"),
+        'MACD_Signal': _column(macd, "MACDs"),
+        'MACD_Hist': _column(macd, "MACDh"),
+        'SMA_20': ta.sma(df.Close, length=20),
+        'BB_Upper': _column(bb, "BBU"),
+        'BB_Middle': _column(bb, "BBM"),
+        'BB_Lower': _column(bb, "BBL"),
+        'STD': df.Close.rolling(20).std(),
+        'ATR': ta.atr(df.High, df.Low, df.Close),
+        'ADX': _column(ta.adx(df.High, df.Low, df.Close), "ADX"),
+        'SuperTrend': _column(ta.supertrend(df.High, df.Low, df.Close), "SUPERT"),
+        'PSAR': _column(psar, "PSARl").fillna(_column(psar, "PSARs")),
+        'KAMA': ta.kama(df.Close),
+        'Aroon_Up': _column(aroon, "AROONU"),
+        'Aroon_Down': _column(aroon, "AROOND"),
+        'Williams_R': ta.willr(df.High, df.Low, df.Close),
+        'Donchian_High': df.High.rolling(20).max(),
+        'Donchian_Low': df.Low.rolling(20).min(),
+    }
+
+
+def check_parity(frames, rtol=1e-9, atol=1e-9):
+    """{symbol: [keys that differ from reference_indicators()]} - empty when everything matches."""
+    mismatches = {}
+    for sym, df in frames.items():
+        expected = reference_indicators(df)
+        actual = calculate_all_indicators(df, only=expected)
+        bad = [
+            key for key, series in expected.items()
+            if series is None or actual.get(key) is None
+            or not np.allclose(actual[key].to_numpy(dtype=float), series.to_numpy(dtype=float),
+                               rtol=rtol, atol=atol, equal_nan=True)
+        ]
+        if bad:
+            mismatches[sym] = bad
+    return mismatches
+
+
+def check_tail_parity(frames, keys=None, tail=2, tolerance=TAIL_TOLERANCE):
+    """{symbol: [keys whose last ``tail`` values differ on the warm-up tail]} - empty when all match.
+
+    Covers every key with a bounded warm-up by default. A key missing from
+    the tail result counts as a mismatch, which catches warm-ups shorter
+    than what the underlying pandas-ta call needs.
+    """
+    keys = sorted(keys or (key for key, warmup in _WARMUP.items() if warmup is not None))
+    mismatches = {}
+    for sym, df in frames.items():
+        full = calculate_all_indicators(df, only=keys)
+        bad = []
+        for key in keys:
+            expected = full.get(key)
+            if expected is None:
+                continue
+            actual = calculate_tail_indicators(df, {key}, tail, tolerance).get(key)
+            expected = expected.to_numpy(dtype=float)[-tail:]
+            scale = max(1.0, float(np.nanmax(np.abs(expected)))) if not np.isnan(expected).all() else 1.0
+            if actual is None or not np.allclose(actual.to_numpy(dtype=float)[-tail:], expected,
+                                                 rtol=0, atol=tolerance * scale * 10, equal_nan=True):
+                bad.append(key)
+        if bad:
+            mismatches[sym] = bad
+    return mismatches
+
+
+def benchmark_indicators(frames, runs=3):
+    """Seconds per pass over ``frames``: pandas-ta one call per indicator vs the shared graph."""
+    keys = set(reference_indicators(next(iter(frames.values()))))
+    timings = {}
+    for label, fn in (
+        ("reference", reference_indicators),
+        ("graph", lambda df: calculate_all_indicators(df, only=keys)),
+        ("all_indicators", calculate_all_indicators),
+    ):
+        best = float("inf")
+        for _ in range(runs):
+            started = time.perf_counter()
+            for df in frames.values():
+                fn(df)
+            best = min(best, time.perf_counter() - started)
+        timings[label] = best
+    return timings
+
+
+if __name__ == "__main__":
+    from market_data import StubSource
+    from scanner import CUSTOM_ALL_SYMBOLS
+
+    frames = StubSource(latency=0).fetch(CUSTOM_ALL_SYMBOLS, period="2y")
+    print("parity mismatches:", check_parity(frames) or "none")
+    print("tail parity mismatches:", check_tail_parity(dict(list(frames.items())[:10])) or "none")
+    for label, seconds in benchmark_indicators(frames).items():
+        print(f"{label:>15}: {seconds:.3f}s for {len(frames)} symbols")
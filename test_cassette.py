@@ -0,0 +1,34 @@
+"""
+Cassette Tests
+Recording deduplicates repeated requests; replay serves what was recorded
+"""
+from cassette import Cassette, ReplaySource
+from market_data import StubSource, source_loader
+
+SYMBOLS = ["AAPL", "MSFT", "BTC-USD"]
+
+
+def test_repeated_scans_record_each_request_once(tmp_path):
+    cassette = Cassette(str(tmp_path / "scan.cassette"))
+    load = cassette.recording_loader(source_loader(StubSource(latency=0)))
+    for _ in range(3):
+        load(SYMBOLS, "2y")
+    load(SYMBOLS, "6mo")
+    assert len(list(cassette.records())) == 2 * len(SYMBOLS)
+
+
+def test_restarted_recording_skips_keys_already_in_the_file(tmp_path):
+    path = str(tmp_path / "scan.cassette")
+    source_load = source_loader(StubSource(latency=0))
+    Cassette(path).recording_loader(source_load)(SYMBOLS, "2y")
+    Cassette(path).recording_loader(source_load)(SYMBOLS, "2y")
+    assert len(list(Cassette(path).records())) == len(SYMBOLS)
+
+
+def test_replay_serves_the_recorded_frames(tmp_path):
+    cassette = Cassette(str(tmp_path / "scan.cassette"))
+    frames, _ = cassette.recording_loader(source_loader(StubSource(latency=0)))(SYMBOLS, "2y")
+    replayed, failures = source_loader(ReplaySource(cassette))(SYMBOLS, "2y")
+    assert failures == {}
+    for sym in SYMBOLS:
+        assert replayed[sym].equals(frames[sym])
@@ -0,0 +1,49 @@
+"""
+Indicator Cache Tests
+Frame addressing and cache hits on frames with NaN in their edge bars
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pandas_ta")
+
+from indicator_cache import IndicatorCache, frame_key
+from ta_indicators import calculate_all_indicators
+
+
+def frame(bars=120):
+    close = 100 + np.cumsum(np.random.default_rng(3).normal(0, 1, bars))
+    df = pd.DataFrame({
+        "Open": close, "High": close + 1, "Low": close - 1, "Close": close,
+        "Volume": np.full(bars, 1e6),
+    }, index=pd.date_range("2024-01-01", periods=bars, freq="D"))
+    # Yahoo leaves Volume blank on some bars, often the first and the forming one
+    df.iloc[[0, -1], df.columns.get_loc("Volume")] = np.nan
+    return df
+
+
+def test_key_with_nan_edges_equals_itself():
+    df = frame()
+    assert frame_key("AAA", "1d", df) == frame_key("AAA", "1d", df.copy())
+
+
+def test_key_tells_nan_from_zero_and_revised_bars():
+    df = frame()
+    zero = df.copy()
+    zero.iloc[-1, zero.columns.get_loc("Volume")] = 0.0
+    revised = df.copy()
+    revised.iloc[-1, revised.columns.get_loc("Close")] += 0.5
+    keys = {frame_key("AAA", "1d", d) for d in (df, zero, revised)}
+    assert len(keys) == 3
+
+
+def test_repeat_lookup_hits_and_adds_no_entries():
+    cache = IndicatorCache()
+    df = frame()
+    keys = {"RSI", "EMA_50"}
+    cache.get("AAA", "1d", df, keys, lambda d, missing: calculate_all_indicators(d, only=missing))
+    entries = cache.stats()["entries"]
+    cache.get("AAA", "1d", df.copy(), keys, lambda d, missing: pytest.fail(f"recomputed {missing}"))
+    assert cache.stats()["entries"] == entries
+    assert cache.hits == len(keys)
@@ -0,0 +1,92 @@
+"""
+Indicator Kernels Tests
+Parity of the NumPy kernels with pandas-ta, plus a microbenchmark
+"""
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ta = pytest.importorskip("pandas_ta")
+
+import indicator_kernels
+
+LENGTHS = (250, 10_000)
+
+
+def random_walk(bars, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, bars)))
+    spread = np.abs(rng.normal(0, 0.01, bars)) * close
+    index = pd.date_range("2000-01-03", periods=bars, freq="D")
+    return pd.DataFrame({"High": close + spread, "Low": close - spread, "Close": close}, index=index)
+
+
+def flat(bars):
+    """Random walk with repeated flat stretches (halted / illiquid symbol)."""
+    df = random_walk(bars, seed=11)
+    for start in range(20, bars - 30, 97):
+        df.iloc[start:start + 15] = df.iloc[start].to_numpy()
+    return df
+
+
+def gapped(bars):
+    """Random walk with overnight gaps of several percent and missing sessions."""
+    df = random_walk(bars, seed=13)
+    rng = np.random.default_rng(13)
+    jumps = np.where(rng.random(bars) < 0.03, rng.choice([0.9, 1.12], bars), 1.0)
+    df = df.mul(np.cumprod(jumps), axis=0)
+    keep = rng.random(bars) > 0.1
+    keep[:30] = True
+    return df[keep]
+
+
+SERIES = {"random_walk": random_walk, "flat": flat, "gapped": gapped}
+
+
+def reference(name, df):
+    if name == "PSAR":
+        result = ta.psar(df.High, df.Low)
+        return result.iloc[:, 0].fillna(result.iloc[:, 1]).to_numpy()
+    if name == "SuperTrend":
+        return ta.supertrend(df.High, df.Low, df.Close).iloc[:, 0].to_numpy()
+    return ta.kama(df.Close).to_numpy()
+
+
+def kernel(name, df):
+    if name == "PSAR":
+        return indicator_kernels.psar(df.High.to_numpy(), df.Low.to_numpy())
+    if name == "SuperTrend":
+        return indicator_kernels.supertrend(df.High.to_numpy(), df.Low.to_numpy(), df.Close.to_numpy())
+    return indicator_kernels.kama(df.Close.to_numpy())
+
+
+@pytest.mark.parametrize("bars", LENGTHS)
+@pytest.mark.parametrize("series", SERIES)
+@pytest.mark.parametrize("name", indicator_kernels.KERNEL_NAMES)
+def test_matches_pandas_ta(name, series, bars):
+    df = SERIES[series](bars)
+    np.testing.assert_allclose(kernel(name, df), reference(name, df), rtol=1e-8, atol=1e-8, equal_nan=True)
+
+
+def test_kama_survives_flat_window():
+    close = random_walk(120)["Close"].to_numpy(copy=True)
+    close[10:25] = close[10]
+    result = indicator_kernels.kama(close)
+    assert not np.isnan(result[9:]).any()
+
+
+@pytest.mark.parametrize("name", indicator_kernels.KERNEL_NAMES)
+def test_faster_than_pandas_ta(name):
+    df = random_walk(10_000)
+
+    def best(fn):
+        elapsed = float("inf")
+        for _ in range(3):
+            started = time.perf_counter()
+            fn(name, df)
+            elapsed = min(elapsed, time.perf_counter() - started)
+        return elapsed
+
+    assert best(kernel) < best(reference)
@@ -0,0 +1,69 @@
+"""
+Indicator Panel Tests
+Parity of the panel engine with pandas-ta and the per-symbol path
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+ta = pytest.importorskip("pandas_ta")
+
+from indicator_panel import PANEL_KEYS, check_parity, panel_indicators
+
+
+def ohlcv(bars, seed, flat_every=None, gap_rate=0.0):
+    rng = np.random.default_rng(seed)
+    jumps = np.where(rng.random(bars) < gap_rate, rng.choice([0.9, 1.12], bars), 1.0)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, bars))) * np.cumprod(jumps)
+    spread = np.abs(rng.normal(0, 0.01, bars)) * close
+    df = pd.DataFrame({
+        "Open": np.roll(close, 1),
+        "High": close + spread,
+        "Low": close - spread,
+        "Close": close,
+        "Volume": rng.integers(100_000, 1_000_000, bars).astype(float),
+    }, index=pd.date_range("2020-01-01", periods=bars, freq="D"))
+    df.iloc[0, 0] = close[0]
+    if flat_every:
+        # Halted stretches: no range at all, so true range and moves are exactly zero
+        for start in range(20, bars - 30, flat_every):
+            df.iloc[start:start + 15, :4] = close[start]
+    return df
+
+
+@pytest.fixture(scope="module")
+def frames():
+    # Different lengths, so the shorter rows sit left-padded in the panel
+    return {
+        "LONG": ohlcv(700, 1),
+        "SHORT": ohlcv(80, 2),
+        "FLAT": ohlcv(500, 3, flat_every=97),
+        "GAPPED": ohlcv(650, 4, gap_rate=0.03),
+    }
+
+
+REFERENCES = {
+    "RSI": lambda df: ta.rsi(df.Close, length=14).bfill(),
+    "ATR": lambda df: ta.atr(df.High, df.Low, df.Close),
+    "ADX": lambda df: ta.adx(df.High, df.Low, df.Close)["ADX_14"],
+    "SuperTrend": lambda df: ta.supertrend(df.High, df.Low, df.Close).iloc[:, 0],
+    "EMA_50": lambda df: ta.ema(df.Close, length=50),
+    "EMA_200": lambda df: ta.ema(df.Close, length=200),
+}
+
+
+@pytest.mark.parametrize("key", REFERENCES)
+def test_wilder_and_ema_match_pandas_ta_from_the_first_bar(frames, key):
+    computed = panel_indicators(frames, {key})
+    for sym, df in frames.items():
+        expected = REFERENCES[key](df)
+        # pandas-ta returns None when the history is shorter than the window
+        expected = np.full(len(df), np.nan) if expected is None else expected.to_numpy(dtype=float)
+        np.testing.assert_allclose(
+            computed[sym][key].to_numpy(), expected,
+            rtol=1e-8, atol=1e-8, equal_nan=True, err_msg=f"{key} {sym}",
+        )
+
+
+def test_every_panel_key_matches_the_per_symbol_path(frames):
+    assert check_parity(frames, PANEL_KEYS) == {}
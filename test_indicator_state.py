@@ -0,0 +1,89 @@
+"""
+Indicator State Tests
+Streaming indicator state against a full pandas-ta recompute, bar by bar
+"""
+import math
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pandas_ta")
+
+from indicator_state import STREAMING_KEYS, SymbolState, streaming_keys
+from ta_indicators import calculate_all_indicators
+
+# Every bar through the warm-up windows, then a sample of the converged tail
+CHECKPOINTS = [*range(1, 60), *range(60, 400, 17), 399]
+
+
+def ohlcv(bars=400, seed=5):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, bars)))
+    spread = np.abs(rng.normal(0, 0.01, bars)) * close
+    df = pd.DataFrame({
+        "Open": np.roll(close, 1),
+        "High": close + spread,
+        "Low": close - spread,
+        "Close": close,
+        "Volume": rng.integers(100_000, 1_000_000, bars).astype(float),
+    }, index=pd.date_range("2020-01-01", periods=bars, freq="D"))
+    df.iloc[0, 0] = close[0]
+    # A flat stretch, where RSI's gains and losses both decay to zero
+    df.iloc[100:112, :4] = close[100]
+    return df
+
+
+def assert_matches_recompute(values, prefix, bar):
+    expected = calculate_all_indicators(prefix, only=STREAMING_KEYS)
+    for key, value in values.items():
+        reference = expected.get(key)
+        if reference is None:
+            continue
+        reference = float(reference.iloc[-1]) if hasattr(reference, "iloc") else float(reference)
+        if key == "RSI" and bar == 1:
+            # The batch RSI back-fills its first bar; there is nothing to stream yet
+            continue
+        assert (math.isnan(value) and math.isnan(reference)) or math.isclose(
+            value, reference, rel_tol=1e-9, abs_tol=1e-9
+        ), f"{key} at bar {bar}: streamed {value}, recomputed {reference}"
+
+
+def test_bar_by_bar_matches_full_recompute():
+    df = ohlcv()
+    state = SymbolState(STREAMING_KEYS)
+    columns = [df[name].to_numpy(dtype=float) for name in ("Open", "High", "Low", "Close", "Volume")]
+    for bar, ts in enumerate(df.index):
+        values = state.update(ts, *(column[bar] for column in columns))
+        if bar + 1 in CHECKPOINTS:
+            assert_matches_recompute(values, df.iloc[:bar + 1], bar + 1)
+
+
+def test_revised_last_bar_matches_recompute():
+    df = ohlcv()
+    state = SymbolState.from_frame(df.iloc[:300], STREAMING_KEYS)
+    revised = df.iloc[:300].copy()
+    revised.iloc[-1, revised.columns.get_loc("Close")] *= 1.03
+    revised.iloc[-1, revised.columns.get_loc("High")] = revised.iloc[-1][["High", "Close"]].max()
+    revised.iloc[-1, revised.columns.get_loc("Volume")] *= 2
+    state.advance(revised)
+    assert_matches_recompute(state.values, revised, len(revised))
+
+
+def test_streaming_keys_registers_concurrently():
+    keys = [f"EMA_{length}" for length in range(300, 340)] + [f"SMA_{length}" for length in range(300, 340)]
+    errors = []
+
+    def register():
+        try:
+            assert streaming_keys(keys) == set(keys)
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=register) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
@@ -0,0 +1,21 @@
+"""
+Market Data Tests
+Fetch engine behaviour around stalled tickers
+"""
+import time
+
+from market_data import StubSource, fetch_universe
+
+
+def test_stalled_chunks_do_not_block_their_retries():
+    # Both workers stall on a slow ticker; the per-symbol retries must not queue behind them
+    symbols = ["AAPL", "SLOW1", "MSFT", "NVDA", "SLOW2", "AMD"]
+    source = StubSource(latency=0, jitter=0, slow_symbols={"SLOW1", "SLOW2"}, slow_latency=5.0)
+    started = time.monotonic()
+    frames, failures = fetch_universe(
+        symbols, fetcher=source, batch_size=3, max_workers=2, symbol_timeout=0.5, deadline=3.0,
+    )
+    assert time.monotonic() - started < 3.0
+    assert sorted(frames) == ["AAPL", "AMD", "MSFT", "NVDA"]
+    assert set(failures) == {"SLOW1", "SLOW2"}
+    assert all(reason.startswith("timed out") for reason in failures.values())
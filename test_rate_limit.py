@@ -0,0 +1,78 @@
+"""
+Rate Limit Tests
+Circuit breaker probing and which errors count against an upstream
+"""
+import threading
+
+import pytest
+
+from rate_limit import CircuitBreaker, CircuitOpenError, UpstreamLimiter
+
+
+def half_open_breaker():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.0)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "half-open"
+    return breaker
+
+
+def test_half_open_lets_a_single_probe_through():
+    breaker = half_open_breaker()
+    barrier = threading.Barrier(8)
+    allowed = []
+
+    def caller():
+        barrier.wait()
+        allowed.append(breaker.allow())
+
+    threads = [threading.Thread(target=caller) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert allowed.count(True) == 1
+
+
+def test_probe_outcome_closes_or_reopens():
+    breaker = half_open_breaker()
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+    breaker = half_open_breaker()
+    breaker.reset_timeout = 60.0
+    breaker.opened_at -= 60.0
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def test_only_upstream_failures_trip_the_breaker():
+    limiter = UpstreamLimiter("test", rate=1000, burst=1000, failure_threshold=2, reset_timeout=60.0)
+
+    def bad_symbol():
+        raise KeyError("no data for ZZZZ")
+
+    def unreachable():
+        raise ConnectionError("connection reset")
+
+    for _ in range(5):
+        with pytest.raises(KeyError):
+            limiter.call(bad_symbol)
+    assert limiter.breaker.state == "closed"
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            limiter.call(unreachable)
+    with pytest.raises(CircuitOpenError):
+        limiter.call(bad_symbol)
+
+
+def test_data_error_frees_the_probe_slot():
+    breaker = half_open_breaker()
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.release()
+    assert breaker.allow()
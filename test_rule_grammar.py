@@ -0,0 +1,65 @@
+"""
+Rule Grammar Tests
+Comparators, negation and MACD state rules, parsed and evaluated
+"""
+import numpy as np
+import pytest
+
+pytest.importorskip("pandas_ta")
+
+from rule_grammar import parse
+from rule_plan import LatestValues, compile_rules
+
+
+@pytest.mark.parametrize("text, rules", [
+    ("RSI >= 70", (("RSI", ">=", 70.0),)),
+    ("RSI <= 30", (("RSI", "<=", 30.0),)),
+    ("RSI > 70", (("RSI", ">", 70.0),)),
+    ("Price >= 50 EMA", (("PRICE_ABOVE_EMA", ">=", 50),)),
+    ("Price >= $100", (("PRICE", ">=", 100.0),)),
+])
+def test_inclusive_comparators_are_kept(text, rules):
+    assert parse(text)[0] == rules
+
+
+@pytest.mark.parametrize("text, expression", [
+    ("RSI > 50 and not RSI > 70", ("AND", 0, ("NOT", 1))),
+    ("RSI not above 70", ("NOT", 0)),
+    ("not (RSI < 30 or Stochastic < 20) and ADX > 25", ("AND", ("NOT", ("OR", 0, 1)), 2)),
+    ("not not RSI < 30", 0),
+])
+def test_negation_is_part_of_the_expression(text, expression):
+    assert parse(text)[1] == expression
+
+
+@pytest.mark.parametrize("text, rule", [
+    ("MACD > signal", ("MACD_SIGNAL", ">", None)),
+    ("MACD below signal line", ("MACD_SIGNAL", "<", None)),
+    ("MACD > 0", ("MACD", ">", 0.0)),
+    ("MACD crosses above signal", ("MACD_CROSS", "BULL", None)),
+    ("MACD bull cross", ("MACD_CROSS", "BULL", None)),
+])
+def test_macd_comparisons_are_states_and_crosses_are_events(text, rule):
+    assert parse(text)[0] == (rule,)
+
+
+def latest(rsi, macd, signal):
+    n = len(rsi)
+    pair = lambda values: (np.asarray(values, dtype=float), np.asarray(values, dtype=float))
+    return LatestValues(
+        [f"S{i}" for i in range(n)], pair([100.0] * n),
+        {"RSI": pair(rsi), "MACD": pair(macd), "MACD_Signal": pair(signal)},
+    )
+
+
+def test_evaluation_honours_equality_negation_and_macd_state():
+    values = latest(rsi=[70.0, 75.0, 60.0, 50.0], macd=[1.0, -1.0, 2.0, 0.5], signal=[0.0, 0.0, 2.0, 0.0])
+
+    _, matched = compile_rules(*parse("RSI >= 70")).evaluate(values)
+    assert matched.tolist() == [True, True, False, False]
+
+    _, matched = compile_rules(*parse("RSI > 55 and not RSI > 70")).evaluate(values)
+    assert matched.tolist() == [True, False, True, False]
+
+    _, matched = compile_rules(*parse("MACD > signal")).evaluate(values)
+    assert matched.tolist() == [True, False, False, True]
@@ -0,0 +1,38 @@
+"""
+Scanner Tests
+Per-symbol evaluation errors are reported rather than swallowed
+"""
+import pytest
+
+pytest.importorskip("pandas_ta")
+
+import scanner
+from market_data import StubSource, source_loader
+
+
+def test_custom_scan_reports_symbols_that_fail_to_evaluate(monkeypatch):
+    def broken_chart(*args, **kwargs):
+        raise ValueError("chart exploded")
+
+    monkeypatch.setattr(scanner, "create_enhanced_chart", broken_chart)
+    rules = scanner.parse_custom_rules("RSI > 0")
+    results, _, debug = scanner.run_custom_rule_scan(rules, "Crypto", source_loader(StubSource(latency=0)))
+    assert results == []
+    failed = debug["failed_symbols"]
+    assert failed
+    assert all(reason == "evaluation error: ValueError: chart exploded" for reason in failed.values())
+
+
+def test_quick_scan_reports_fetch_and_evaluation_failures():
+    source = StubSource(latency=0)
+
+    def load(symbols, period):
+        # No Volume column, so scoring fails on every symbol after the first
+        frames = {sym: source.make_frame(sym).drop(columns="Volume") for sym in symbols[1:]}
+        return frames, {symbols[0]: "no data returned"}
+
+    failures = {}
+    assert scanner.run_quick_scan("Crypto", load, failures) == []
+    symbols = scanner.QUICK_SNIPE_UNIVERSES["Crypto"]
+    assert failures[symbols[0]] == "no data returned"
+    assert all(failures[sym].startswith("evaluation error: AttributeError") for sym in symbols[1:])
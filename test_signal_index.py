@@ -0,0 +1,58 @@
+"""
+Signal Index Tests
+Index lookups against the bars it was built from
+"""
+import numpy as np
+import pytest
+
+pytest.importorskip("pandas_ta")
+
+from market_data import StubSource
+from rule_plan import compile_rules
+from signal_index import SignalIndex
+
+SYMBOLS = ["AAPL", "MSFT", "NVDA", "BTC-USD", "ETH-USD"]
+
+
+def nan_edge_loader():
+    """Stub bars whose first and latest Volume are blank, as Yahoo often leaves them."""
+    source = StubSource(latency=0)
+
+    def load(symbols, period):
+        frames = {}
+        for sym in symbols:
+            df = source.make_frame(sym)
+            df.iloc[[0, -1], df.columns.get_loc("Volume")] = np.nan
+            frames[sym] = df
+        return frames, {}
+    return load
+
+
+def test_lookup_hits_for_bars_with_nan_edges():
+    load = nan_edge_loader()
+    index = SignalIndex(symbols=SYMBOLS)
+    index.refresh(load)
+    frames, _ = load(SYMBOLS, "2y")
+    plan = compile_rules((("RSI", "<", 40.0), ("PRICE_ABOVE_EMA", ">", 50)))
+    assert index.lookup(plan, frames, SYMBOLS) is not None
+    assert index.stats()["hits"] == 1
+
+
+def test_lookup_misses_after_the_latest_bar_changes():
+    load = nan_edge_loader()
+    index = SignalIndex(symbols=SYMBOLS)
+    index.refresh(load)
+    frames, _ = load(SYMBOLS, "2y")
+    frames["AAPL"].iloc[-1, frames["AAPL"].columns.get_loc("Close")] *= 1.01
+    plan = compile_rules((("RSI", "<", 40.0),))
+    assert index.lookup(plan, frames, SYMBOLS) is None
+
+
+def test_negated_query_matches_plan_evaluation():
+    load = nan_edge_loader()
+    index = SignalIndex(symbols=SYMBOLS)
+    index.refresh(load)
+    frames, _ = load(SYMBOLS, "2y")
+    plan = compile_rules((("RSI", ">", 50.0), ("PRICE_ABOVE_EMA", ">", 50)), ("AND", ("NOT", 0), 1))
+    latest, _, matched = index.lookup(plan, frames, SYMBOLS)
+    assert matched.tolist() == plan.evaluate(latest)[1].tolist()